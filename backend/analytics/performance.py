@@ -0,0 +1,205 @@
+# backend/analytics/performance.py
+"""
+Live performance analytics, updated incrementally as the ExecutionEngine
+closes trades (pass `tracker.on_trade_closed` as its on_trade_closed hook).
+
+For the portfolio and for each symbol and strategy it keeps trades, wins,
+net PnL, fees, running equity with its peak and max drawdown, and a rolling
+Sharpe over the last ROLLING_TRADES trade returns (net PnL / portfolio
+equity before the trade, not annualized). Every update is O(1): the rolling
+window keeps running sums. A trade counts for every strategy that voted to
+open it.
+
+`save_snapshot()` replaces the rows of performance_summary in one
+transaction (one row per scope/name, including the rolling window's
+returns), so the dashboard reads all of it in one query. `restore()` loads
+that snapshot back at startup, so the stats, like the equity_curve points
+each closed trade adds through an optional write-behind writer, are
+cumulative across restarts.
+"""
+
+import json
+import math
+import threading
+from collections import deque
+
+from sqlalchemy import text
+
+ROLLING_TRADES = 100
+
+DELETE_SUMMARY_SQL = text("DELETE FROM performance_summary")
+
+INSERT_SUMMARY_SQL = text('''
+    INSERT INTO performance_summary (
+        scope, name, trades, wins, win_rate, net_pnl, fees,
+        equity, peak_equity, max_drawdown, rolling_sharpe, returns, since, updated_at
+    ) VALUES (
+        :scope, :name, :trades, :wins, :win_rate, :net_pnl, :fees,
+        :equity, :peak_equity, :max_drawdown, :rolling_sharpe, :returns, :since, :updated_at
+    )
+''')
+
+INSERT_EQUITY_SQL = text('''
+    INSERT INTO equity_curve (timestamp, symbol, net_pnl, equity, drawdown)
+    VALUES (:timestamp, :symbol, :net_pnl, :equity, :drawdown)
+''')
+
+SELECT_SUMMARY_SQL = text('''
+    SELECT scope, name, trades, wins, win_rate, net_pnl, fees,
+           equity, peak_equity, max_drawdown, rolling_sharpe, returns, since, updated_at
+    FROM performance_summary
+    ORDER BY scope, net_pnl DESC
+''')
+
+SELECT_EQUITY_SQL = text('''
+    SELECT timestamp, equity, drawdown FROM equity_curve
+    ORDER BY timestamp DESC
+    LIMIT :limit
+''')
+
+
+class RunningStats:
+    def __init__(self, starting_equity=0.0, window=ROLLING_TRADES):
+        self.trades = 0
+        self.wins = 0
+        self.net_pnl = 0.0
+        self.fees = 0.0
+        self.starting_equity = float(starting_equity)
+        self.peak_equity = self.starting_equity
+        self.max_drawdown = 0.0
+        self._returns = deque(maxlen=window)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    @classmethod
+    def from_row(cls, row, window=ROLLING_TRADES):
+        """Rebuild from a performance_summary row."""
+        stats = cls(row['equity'] - row['net_pnl'], window)
+        stats.trades = int(row['trades'])
+        stats.wins = int(row['wins'])
+        stats.net_pnl = float(row['net_pnl'])
+        stats.fees = float(row['fees'])
+        stats.peak_equity = float(row['peak_equity'])
+        stats.max_drawdown = float(row['max_drawdown'])
+        for ret in json.loads(row['returns'] or '[]')[-window:]:
+            stats._returns.append(ret)
+            stats._sum += ret
+            stats._sum_sq += ret * ret
+        return stats
+
+    @property
+    def equity(self):
+        return self.starting_equity + self.net_pnl
+
+    def add(self, pnl, fees, ret):
+        self.trades += 1
+        self.wins += int(pnl > 0)
+        self.net_pnl += pnl
+        self.fees += fees
+        self.peak_equity = max(self.peak_equity, self.equity)
+        self.max_drawdown = max(self.max_drawdown, self.peak_equity - self.equity)
+
+        if len(self._returns) == self._returns.maxlen:
+            old = self._returns[0]
+            self._sum -= old
+            self._sum_sq -= old * old
+        self._returns.append(ret)
+        self._sum += ret
+        self._sum_sq += ret * ret
+
+    def rolling_sharpe(self):
+        n = len(self._returns)
+        if n < 2:
+            return None
+        mean = self._sum / n
+        var = max(0.0, (self._sum_sq - n * mean * mean) / (n - 1))
+        return mean / math.sqrt(var) if var > 0 else None
+
+    def row(self, scope, name):
+        return {
+            'scope': scope, 'name': name,
+            'trades': self.trades, 'wins': self.wins,
+            'win_rate': self.wins / self.trades if self.trades else None,
+            'net_pnl': self.net_pnl, 'fees': self.fees,
+            'equity': self.equity, 'peak_equity': self.peak_equity,
+            'max_drawdown': self.max_drawdown, 'rolling_sharpe': self.rolling_sharpe(),
+            'returns': json.dumps(list(self._returns)),
+        }
+
+
+class PerformanceTracker:
+    def __init__(self, starting_balance, clock, writer=None, window=ROLLING_TRADES):
+        self.clock = clock
+        self.writer = writer    # optional WriteBehindWriter for INSERT_EQUITY_SQL
+        self.window = window
+        self.since = clock()
+        self.portfolio = RunningStats(starting_balance, window)
+        self.by_symbol = {}
+        self.by_strategy = {}
+        self.version = 0        # bumped per trade; save_snapshot skips unchanged state
+        self._saved_version = None
+        self._lock = threading.Lock()
+
+    def restore(self, engine):
+        """Continue from the last saved snapshot; returns the number of rows restored."""
+        with engine.connect() as conn:
+            rows = conn.execute(SELECT_SUMMARY_SQL).mappings().all()
+        tables = {'symbol': self.by_symbol, 'strategy': self.by_strategy}
+        with self._lock:
+            for row in rows:
+                stats = RunningStats.from_row(row, self.window)
+                if row['scope'] == 'portfolio':
+                    self.portfolio = stats
+                    self.since = row['since'] or self.since
+                elif row['scope'] in tables:
+                    tables[row['scope']][row['name']] = stats
+            self._saved_version = self.version
+        return len(rows)
+
+    def on_trade_closed(self, trade):
+        """ExecutionEngine hook: trade is its pnl_log record."""
+        with self._lock:
+            # Plain floats: pnl_log values can be numpy scalars, which DB drivers may not adapt
+            pnl, fees = float(trade['pnl']), float(trade['fees'])
+            equity_before = self.portfolio.equity
+            ret = pnl / equity_before if equity_before else 0.0
+            self.portfolio.add(pnl, fees, ret)
+            self._stats(self.by_symbol, trade['symbol']).add(pnl, fees, ret)
+            for strategy in trade.get('strategies') or ['unknown']:
+                self._stats(self.by_strategy, strategy).add(pnl, fees, ret)
+            self.version += 1
+            point = {
+                'timestamp': trade['exit_time'], 'symbol': trade['symbol'], 'net_pnl': pnl,
+                'equity': self.portfolio.equity,
+                'drawdown': self.portfolio.peak_equity - self.portfolio.equity,
+            }
+        if self.writer:
+            self.writer.submit(point)
+
+    def _stats(self, table, key):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = RunningStats(0.0, self.window)
+        return stats
+
+    def rows(self):
+        with self._lock:
+            now = self.clock()
+            rows = [self.portfolio.row('portfolio', 'all')]
+            rows += [s.row('symbol', k) for k, s in sorted(self.by_symbol.items())]
+            rows += [s.row('strategy', k) for k, s in sorted(self.by_strategy.items())]
+        for row in rows:
+            row.update(since=self.since, updated_at=now)
+        return rows
+
+    def save_snapshot(self, engine, force=False):
+        """Replace performance_summary with the current state; returns rows written (0 = unchanged)."""
+        version = self.version
+        if version == self._saved_version and not force:
+            return 0
+        rows = self.rows()
+        with engine.begin() as conn:
+            conn.execute(DELETE_SUMMARY_SQL)
+            conn.execute(INSERT_SUMMARY_SQL, rows)
+        self._saved_version = version
+        return len(rows)
@@ -0,0 +1,80 @@
+# backend/data/candle_buffer.py
+"""
+Fixed-capacity, array-backed rolling buffer of closed candles for one symbol.
+
+The live bot appends every closed kline here and strategies read their
+feature frame straight from memory, so Postgres is only written to on the
+hot path. Each buffer is warm-started from the DB once at startup.
+"""
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class CandleBuffer:
+    def __init__(self, capacity=100, columns=OHLCV_COLUMNS):
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self._col_index = {c: i for i, c in enumerate(self.columns)}
+        self._timestamps = np.zeros(capacity, dtype='int64')   # open time, ms since epoch
+        self._values = np.full((capacity, len(self.columns)), np.nan, dtype='float64')
+        self._start = 0         # slot of the oldest candle
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp_ms, values):
+        """Add a closed candle. `values` maps column name -> float; missing columns stay NaN."""
+        timestamp_ms = int(timestamp_ms)
+        if self._size and timestamp_ms <= self.last_timestamp():
+            return False    # duplicate or out-of-order candle (e.g. websocket replay)
+
+        if self._size < self.capacity:
+            slot = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        self._timestamps[slot] = timestamp_ms
+        row = self._values[slot]
+        row.fill(np.nan)
+        for name, value in values.items():
+            idx = self._col_index.get(name)
+            if idx is not None:
+                row[idx] = value
+        return True
+
+    def extend(self, df):
+        """Bulk-load candles from a frame with a `timestamp` column (oldest first)."""
+        if df.empty:
+            return
+        ts = pd.to_datetime(df['timestamp'], utc=True)
+        ts_ms = (ts - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)
+        cols = [c for c in self.columns if c in df.columns]
+        values = df[cols].astype('float64').to_numpy()
+        for t, row in zip(ts_ms.tolist(), values):
+            self.append(t, dict(zip(cols, row)))
+
+    def last_timestamp(self):
+        if not self._size:
+            return None
+        return int(self._timestamps[(self._start + self._size - 1) % self.capacity])
+
+    def _ordered(self):
+        # Indices of live slots, oldest first
+        return (self._start + np.arange(self._size)) % self.capacity
+
+    def column(self, name):
+        """Return a copy of one column, oldest first."""
+        return self._values[self._ordered(), self._col_index[name]]
+
+    def to_frame(self):
+        """Materialize the buffer as a DataFrame shaped like a `market_data` query (oldest first)."""
+        order = self._ordered()
+        df = pd.DataFrame(self._values[order], columns=self.columns)
+        df.insert(0, 'timestamp', pd.to_datetime(self._timestamps[order], unit='ms', utc=True))
+        return df
@@ -0,0 +1,38 @@
+# backend/data/downsample.py
+"""
+OHLC bucket downsampling for charts.
+
+Merging k consecutive candles into one (first open, max high, min low,
+last close) keeps every wick and the visible price range, which a
+point-picking method like LTTB does not, and the chart still has at most
+`max_points` candles. Buckets are aligned to multiples of k candle lengths
+from the epoch rather than to the first row, so a history that grows at the
+right end keeps the same buckets from one refresh to the next.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def downsample_ohlc(df, max_points):
+    """df: 'timestamp' + open/high/low/close (+ volume) rows, oldest first."""
+    if len(df) <= max_points:
+        return df
+
+    ms = np.asarray((df['timestamp'] - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1), dtype='int64')
+    step = int(np.median(np.diff(ms)))      # one candle
+    k = -(-len(df) // max_points) + 1       # +1: epoch alignment can add a partial bucket at each end
+    keys = ms // (step * k)
+    starts = np.r_[0, np.flatnonzero(np.diff(keys)) + 1]
+    ends = np.r_[starts[1:], len(df)] - 1
+
+    out = {
+        'timestamp': df['timestamp'].to_numpy()[starts],
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[ends],
+    }
+    if 'volume' in df.columns:
+        out['volume'] = np.add.reduceat(df['volume'].to_numpy(), starts)
+    return pd.DataFrame(out)
@@ -0,0 +1,186 @@
+# backend/data/gaps.py
+"""
+Gap detection and automatic gap-fill for `market_data`.
+
+Stored history is scanned in SQL: LEAD() over the (symbol, timestamp)
+primary key yields one row per missing range, so no candles are pulled
+into Python. The scan is bounded by the first candle expected in the window
+and the last closed one, so ranges missing at either end are found too.
+Live gaps (a websocket drop/reconnect) are detected in O(1) per candle by
+comparing each closed candle with the previous one.
+
+Missing ranges go onto a queue drained by a background thread that refetches
+them through the backfill code; a failed refetch is retried after
+RETRY_DELAYS, then given up on until the range is reported again. Per-symbol
+gap counts are kept as metrics.
+"""
+
+import heapq
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+INTERVAL_MS = 60_000
+RETRY_DELAYS = (5, 30, 120, 600)    # seconds before each refetch retry
+
+# A sentinel one step before the window and LEAD's default one step after it
+# turn a missing start or end of the window into ordinary gaps
+FIND_GAPS_SQL = text('''
+    SELECT gap_start, gap_end FROM (
+        SELECT timestamp + make_interval(secs => :step) AS gap_start,
+               LEAD(timestamp, 1, CAST(:after AS TIMESTAMPTZ)) OVER (ORDER BY timestamp)
+                   - make_interval(secs => :step) AS gap_end
+        FROM (
+            SELECT CAST(:before AS TIMESTAMPTZ) AS timestamp
+            UNION ALL
+            SELECT timestamp FROM market_data
+            WHERE symbol = :symbol AND timestamp BETWEEN :first AND :last
+        ) candles
+    ) gaps
+    WHERE gap_end >= gap_start
+    ORDER BY gap_start
+''')
+
+
+def _to_ms(ts):
+    return int(ts.timestamp() * 1000)
+
+
+def _from_ms(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def expected_range(start, end, interval_ms=INTERVAL_MS):
+    """Open times (ms) of the first candle at or after `start` and the last one closed by `end`."""
+    first = -(-_to_ms(start) // interval_ms) * interval_ms
+    last = _to_ms(end) // interval_ms * interval_ms - interval_ms
+    return first, last
+
+
+def find_gaps(engine, symbol, start, end, interval_ms=INTERVAL_MS):
+    """Missing candle ranges [(first_missing_ms, last_missing_ms), ...] among the candles expected in [start, end]."""
+    first, last = expected_range(start, end, interval_ms)
+    if last < first:
+        return []
+    with engine.connect() as conn:
+        rows = conn.execute(FIND_GAPS_SQL, {
+            'symbol': symbol.lower(), 'step': interval_ms / 1000,
+            'first': _from_ms(first), 'last': _from_ms(last),
+            'before': _from_ms(first - interval_ms), 'after': _from_ms(last + interval_ms),
+        }).fetchall()
+    return [(_to_ms(gap_start), _to_ms(gap_end)) for gap_start, gap_end in rows]
+
+
+class GapFiller:
+    def __init__(self, refetch, on_filled=None, interval_ms=INTERVAL_MS, retry_delays=RETRY_DELAYS,
+                 clock=time.monotonic):
+        self.refetch = refetch          # refetch(symbol, start_ms, end_ms) -> candles stored
+        self.on_filled = on_filled      # on_filled(symbol, start_ms, end_ms) after a range is back in the DB
+        self.interval_ms = interval_ms
+        self.retry_delays = retry_delays
+        self.queue = queue.Queue()
+        self.metrics = defaultdict(lambda: {
+            'gaps_detected': 0, 'candles_missing': 0,
+            'gaps_filled': 0, 'candles_filled': 0, 'retries': 0, 'gaps_failed': 0
+        })
+        self._pending = set()           # queued or waiting for a retry; reported again only once settled
+        self._retries = []              # heap of (due, attempt, key), only touched by the worker thread
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="gap-filler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def report_gap(self, symbol, start_ms, end_ms):
+        key = (symbol, start_ms, end_ms)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            m = self.metrics[symbol]
+            m['gaps_detected'] += 1
+            m['candles_missing'] += (end_ms - start_ms) // self.interval_ms + 1
+        print(f"[Gap] {symbol.upper()} missing {datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)} "
+              f"-> {datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc)} | queued for refetch")
+        self.queue.put(key)
+
+    def check_candle(self, symbol, prev_ts, ts):
+        """Queue the range between two consecutive live candles if they are not adjacent."""
+        if prev_ts is not None and ts - prev_ts > self.interval_ms:
+            self.report_gap(symbol, prev_ts + self.interval_ms, ts - self.interval_ms)
+            return True
+        return False
+
+    def scan(self, engine, symbols, start, end):
+        """Queue every stored gap for `symbols` in [start, end]."""
+        found = 0
+        for symbol in symbols:
+            for start_ms, end_ms in find_gaps(engine, symbol, start, end, self.interval_ms):
+                self.report_gap(symbol, start_ms, end_ms)
+                found += 1
+        return found
+
+    def gap_counts(self):
+        with self._lock:
+            return {symbol: dict(m) for symbol, m in self.metrics.items()}
+
+    def _next(self):
+        """(key, attempt) of the next range to refetch, or None on stop (pending retries are dropped;
+        the next startup scan finds those ranges again)."""
+        while True:
+            if self._retries and self._retries[0][0] <= self._clock():
+                _, attempt, key = heapq.heappop(self._retries)
+                return key, attempt
+            timeout = max(0.0, self._retries[0][0] - self._clock()) if self._retries else None
+            try:
+                key = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            return None if key is None else (key, 0)
+
+    def _fill(self, key, attempt):
+        symbol, start_ms, end_ms = key
+        try:
+            filled = self.refetch(symbol, start_ms, end_ms)
+        except Exception as e:
+            if attempt < len(self.retry_delays):
+                delay = self.retry_delays[attempt]
+                heapq.heappush(self._retries, (self._clock() + delay, attempt + 1, key))
+                with self._lock:
+                    self.metrics[symbol]['retries'] += 1
+                print(f"[Gap Error] ❌ Refetch failed for {symbol.upper()}: {e} | retrying in {delay}s")
+                return
+            with self._lock:
+                self.metrics[symbol]['gaps_failed'] += 1
+                self._pending.discard(key)
+            print(f"[Gap Error] ❌ Refetch failed for {symbol.upper()} after {attempt + 1} attempts, giving up: {e}")
+            return
+
+        with self._lock:
+            self.metrics[symbol]['gaps_filled'] += 1
+            self.metrics[symbol]['candles_filled'] += filled or 0
+            self._pending.discard(key)
+        if self.on_filled:
+            try:
+                self.on_filled(symbol, start_ms, end_ms)
+            except Exception as e:
+                print(f"[Gap Error] ❌ on_filled failed for {symbol.upper()}: {e}")
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            self._fill(*item)
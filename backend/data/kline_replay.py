@@ -0,0 +1,195 @@
+# backend/data/kline_replay.py
+"""
+Offline stand-in for `binance.ThreadedWebsocketManager` kline streams.
+
+Messages are Binance kline stream payloads ({'e': 'kline', 'E': ..., 's':
+'BTCUSDT', 'k': {'t', 'T', 'o', 'h', 'l', 'c', 'v', 'x', ...}}), either
+recorded from the live stream (KlineRecorder, one JSON message per line) or
+built from stored candles (store_messages). ReplaySocketManager takes the
+same start_kline_socket() calls as the real manager and feeds the messages
+to the registered callbacks in order, at max speed or `speed`x real time,
+moving a SimulatedClock to each message's event time.
+
+With bar_sync (default) every evaluation started by one bar finishes before
+the next bar is sent, as in the live bot where bars are a minute apart, so a
+replay is deterministic and trades are stamped with the bar's own time.
+Without it messages are sent as fast as the callback accepts them, which
+measures the evaluation pool under backlog.
+"""
+
+import heapq
+import json
+import threading
+import time
+
+import numpy as np
+
+INTERVAL_MS = 60_000
+
+
+# === Message Sources ===
+def read_messages(path):
+    """Recorded messages, one JSON payload per line, in recording order."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_messages(path, messages):
+    count = 0
+    with open(path, 'w') as f:
+        for msg in messages:
+            f.write(json.dumps(msg) + '\n')
+            count += 1
+    return count
+
+
+def kline_message(symbol, open_ms, o, h, l, c, v, interval='1m', interval_ms=INTERVAL_MS):
+    """A closed-kline stream payload, with prices as strings like Binance sends them."""
+    symbol = symbol.upper()
+    close_ms = open_ms + interval_ms - 1
+    return {
+        'e': 'kline', 'E': close_ms + 1, 's': symbol,
+        'k': {
+            't': open_ms, 'T': close_ms, 's': symbol, 'i': interval,
+            'o': repr(float(o)), 'h': repr(float(h)), 'l': repr(float(l)),
+            'c': repr(float(c)), 'v': repr(float(v)), 'x': True,
+        },
+    }
+
+
+def block_messages(symbol, block, interval='1m'):
+    """Messages for a (6, n) OHLCVStore block, oldest first."""
+    times = block[0].astype('int64')
+    for i in range(block.shape[1]):
+        yield kline_message(symbol, int(times[i]), *block[1:, i], interval=interval)
+
+
+def store_messages(store, symbols, start=None, end=None, interval='1m'):
+    """Stored candles for several symbols merged into one stream in event-time order."""
+    streams = [block_messages(symbol, store.read_block(symbol, start, end), interval) for symbol in symbols]
+    # Ties keep the symbols' order, like the live sockets opened one after another
+    return heapq.merge(*streams, key=lambda msg: msg['E'])
+
+
+# === Recording (live bot) ===
+class KlineRecorder:
+    """Appends every message a wrapped callback receives to a JSONL file for later replay."""
+
+    def __init__(self, path):
+        self._file = open(path, 'a')
+        self._lock = threading.Lock()
+
+    def wrap(self, callback):
+        def recording(msg):
+            line = json.dumps(msg) + '\n'
+            with self._lock:
+                self._file.write(line)
+            return callback(msg)
+        return recording
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+# === Replay ===
+class ReplayStats:
+    def __init__(self):
+        self.delivered = 0      # messages handed to a callback
+        self.skipped = 0        # no callback registered for the symbol
+        self.latencies = []     # seconds from callback entry to evaluation done
+        self.wall_seconds = 0.0
+        self._in_flight = 0
+        self._idle = threading.Condition()
+
+    def started(self):
+        with self._idle:
+            self._in_flight += 1
+
+    def finished(self, seconds):
+        with self._idle:
+            self.latencies.append(seconds)
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.notify_all()
+
+    def wait_idle(self):
+        with self._idle:
+            self._idle.wait_for(lambda: not self._in_flight)
+
+    def summary(self):
+        wall = self.wall_seconds or float('nan')
+        out = {
+            'delivered': self.delivered,
+            'evaluated': len(self.latencies),
+            'skipped': self.skipped,
+            'wall_seconds': self.wall_seconds,
+            'candles_per_second': self.delivered / wall,
+        }
+        if self.latencies:
+            ms = np.asarray(self.latencies) * 1000
+            out.update({f'p{q}_ms': float(np.percentile(ms, q)) for q in (50, 90, 99)})
+            out['max_ms'] = float(ms.max())
+        return out
+
+
+class ReplaySocketManager:
+    def __init__(self, messages, speed=None, clock=None, bar_sync=True):
+        self.messages = messages
+        self.speed = speed          # None = as fast as possible, else N x real time
+        self.clock = clock          # SimulatedClock moved to each message's event time
+        self.bar_sync = bar_sync
+        self.callbacks = {}
+        self.stats = ReplayStats()
+        self._stopped = threading.Event()
+
+    # === ThreadedWebsocketManager interface ===
+    def start(self):
+        self._stopped.clear()
+
+    def start_kline_socket(self, callback, symbol, interval='1m'):
+        self.callbacks[symbol.lower()] = callback
+        return f"{symbol.lower()}@kline_{interval}"
+
+    def stop(self):
+        self._stopped.set()
+
+    # === Dispatch ===
+    def run(self):
+        """Feed every message (blocking) and wait for the evaluations they started; returns the stats."""
+        stats = self.stats
+        began = time.perf_counter()
+        first_ms, bar_ms = None, None
+
+        for msg in self.messages:
+            if self._stopped.is_set():
+                break
+            callback = self.callbacks.get(msg.get('s', '').lower())
+            if callback is None:
+                stats.skipped += 1
+                continue
+
+            event_ms = int(msg.get('E') or msg['k']['T'])
+            if self.bar_sync and event_ms != bar_ms:
+                stats.wait_idle()
+                bar_ms = event_ms
+            if self.speed:
+                first_ms = event_ms if first_ms is None else first_ms
+                delay = began + (event_ms - first_ms) / 1000 / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if self.clock is not None:
+                self.clock.set_ms(event_ms)
+
+            received = time.perf_counter()
+            future = callback(msg)
+            stats.delivered += 1
+            if future is not None:     # the bot's callback returns the evaluation future
+                stats.started()
+                future.add_done_callback(lambda f, t=received: stats.finished(time.perf_counter() - t))
+
+        stats.wait_idle()
+        stats.wall_seconds = time.perf_counter() - began
+        return stats
@@ -0,0 +1,230 @@
+# backend/data/ohlcv_store.py
+"""
+Local columnar OHLCV cache for research workloads (backtests, training,
+walk-forward, dashboard).
+
+Layout: data/ohlcv/<symbol>/<YYYY-MM-DD>.npy, one file per UTC day holding
+a float64 array of shape (6, n): row 0 is the open time in epoch ms (exact
+in float64), rows 1-5 are open/high/low/close/volume. Files are opened with
+mmap, so a single-day read is a view over the page cache, and each row is a
+contiguous column, so a multi-day read is one concatenate and the frame is
+built over that block without further copies.
+
+`sync()` pulls only candles newer than the last stored one (minus a short
+overlap, so recently gap-filled candles are picked up) from Postgres, and
+rewrites just the day files they touch, atomically (temp file + os.replace).
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from backend.data.candle_buffer import OHLCV_COLUMNS
+
+COLUMNS = list(OHLCV_COLUMNS)
+
+STORE_DIR = os.path.join("data", "ohlcv")
+DAY_MS = 86_400_000
+SYNC_OVERLAP_MS = DAY_MS        # re-read the last day on every sync (late gap fills)
+SYNC_BATCH_ROWS = 100_000
+
+SELECT_CANDLES_AFTER_SQL = text('''
+    SELECT timestamp, open, high, low, close, volume FROM market_data
+    WHERE symbol = :symbol AND timestamp > :after
+    ORDER BY timestamp
+    LIMIT :limit
+''')
+
+
+def _to_ms(ts):
+    if ts is None:
+        return None
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+    return ts.value // 1_000_000
+
+
+def _day(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def _day_start_ms(day):
+    return _to_ms(pd.Timestamp(day, tz='UTC'))
+
+
+class OHLCVStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    # === Layout ===
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def days(self, symbol):
+        path = os.path.join(self.root, symbol.lower())
+        if not os.path.isdir(path):
+            return []
+        return sorted(name[:-4] for name in os.listdir(path) if name.endswith('.npy'))
+
+    def _path(self, symbol, day):
+        return os.path.join(self.root, symbol.lower(), f"{day}.npy")
+
+    def _read_day(self, symbol, day):
+        return np.load(self._path(symbol, day), mmap_mode='r')
+
+    def last_timestamp(self, symbol):
+        """Open time (ms) of the newest stored candle, or None."""
+        days = self.days(symbol)
+        return int(self._read_day(symbol, days[-1])[0, -1]) if days else None
+
+    # === Write ===
+    def write(self, symbol, timestamps, values):
+        """Merge candles (ms open times + (n, 5) OHLCV) into their day files; returns rows written."""
+        timestamps = np.asarray(timestamps, dtype='int64')
+        values = np.asarray(values, dtype='float64')
+        if not len(timestamps):
+            return 0
+        os.makedirs(os.path.join(self.root, symbol.lower()), exist_ok=True)
+
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, values = timestamps[order], values[order]
+        day_index = timestamps // DAY_MS
+        bounds = np.flatnonzero(np.diff(day_index)) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(timestamps)]):
+            block = np.vstack([timestamps[lo:hi].astype('float64'), values[lo:hi].T])
+            day = _day(int(day_index[lo]) * DAY_MS)
+            path = self._path(symbol, day)
+            if os.path.exists(path):
+                block = np.hstack([np.load(path), block])   # existing first: new rows win below
+
+            # Sort by time, keeping the last occurrence of each timestamp
+            order = np.argsort(block[0], kind='stable')[::-1]
+            _, first = np.unique(block[0, order], return_index=True)
+            block = np.ascontiguousarray(block[:, order[first]])
+
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, block)
+            os.replace(tmp, path)
+        return len(timestamps)
+
+    def write_frame(self, symbol, df):
+        """Store a frame with a timestamp index or column and OHLCV columns (e.g. an imported CSV)."""
+        times = df.index if 'timestamp' not in df.columns else df['timestamp']
+        times = pd.to_datetime(times, utc=True)
+        timestamps = np.asarray((times - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1), dtype='int64')
+        return self.write(symbol, timestamps, df[COLUMNS].to_numpy(dtype='float64'))
+
+    # === Read ===
+    def read_block(self, symbol, start=None, end=None):
+        """(6, n) block [timestamp_ms, open, high, low, close, volume] for start <= open time <= end."""
+        start_ms, end_ms = _to_ms(start), _to_ms(end)
+        days = self.days(symbol)
+        if start_ms is not None:
+            days = [d for d in days if _day_start_ms(d) + DAY_MS > start_ms]
+        if end_ms is not None:
+            days = [d for d in days if _day_start_ms(d) <= end_ms]
+        if not days:
+            return np.empty((len(OHLCV_COLUMNS) + 1, 0))
+
+        blocks = [self._read_day(symbol, d) for d in days]
+        block = blocks[0] if len(blocks) == 1 else np.concatenate(blocks, axis=1)
+        if start_ms is not None or end_ms is not None:
+            lo = np.searchsorted(block[0], start_ms, 'left') if start_ms is not None else 0
+            hi = np.searchsorted(block[0], end_ms, 'right') if end_ms is not None else block.shape[1]
+            block = block[:, lo:hi]
+        return block
+
+    def tail_block(self, symbol, rows):
+        """The most recent `rows` candles, touching only the day files needed."""
+        days = self.days(symbol)
+        blocks, have = [], 0
+        for day in reversed(days):
+            blocks.append(self._read_day(symbol, day))
+            have += blocks[-1].shape[1]
+            if have >= rows:
+                break
+        if not blocks:
+            return np.empty((len(OHLCV_COLUMNS) + 1, 0))
+        block = np.concatenate(blocks[::-1], axis=1) if len(blocks) > 1 else blocks[0]
+        return block[:, -rows:]
+
+    def load(self, symbol, start=None, end=None, tail=None):
+        """Candles as a frame indexed by UTC timestamp with OHLCV columns (backtester layout)."""
+        block = self.tail_block(symbol, tail) if tail else self.read_block(symbol, start, end)
+        return self.to_frame(block)
+
+    @staticmethod
+    def to_frame(block):
+        index = pd.DatetimeIndex(pd.to_datetime(block[0].astype('int64'), unit='ms', utc=True), name='timestamp')
+        # DataFrame stores one (columns, rows) block internally: block[1:] is used as-is
+        return pd.DataFrame(block[1:].T, index=index, columns=COLUMNS, copy=False)
+
+    # === Sync from Postgres ===
+    def sync(self, engine, symbols, batch_rows=SYNC_BATCH_ROWS):
+        """Append candles newer than each symbol's last stored one; returns {symbol: rows pulled}."""
+        pulled = {}
+        for symbol in symbols:
+            symbol = symbol.lower()
+            last = self.last_timestamp(symbol)
+            after_ms = last - SYNC_OVERLAP_MS if last is not None else -1
+            total = 0
+            with engine.connect() as conn:
+                while True:
+                    after = pd.Timestamp(after_ms, unit='ms', tz='UTC').to_pydatetime()
+                    rows = conn.execute(SELECT_CANDLES_AFTER_SQL,
+                                        {'symbol': symbol, 'after': after, 'limit': batch_rows}).fetchall()
+                    if not rows:
+                        break
+                    df = pd.DataFrame(rows, columns=['timestamp'] + COLUMNS)
+                    self.write_frame(symbol, df)
+                    total += len(df)
+                    after_ms = _to_ms(df['timestamp'].iloc[-1])
+                    if len(rows) < batch_rows:
+                        break
+            pulled[symbol] = total
+        return pulled
+
+    def try_sync(self, engine, symbols):
+        """
+        sync(), but fall back to the candles already on disk if Postgres is
+        unreachable or not configured. `engine` may be get_engine itself, so
+        offline tools only create the engine here.
+        """
+        try:
+            if callable(engine):
+                engine = engine()
+            return self.sync(engine, symbols)
+        except Exception as e:
+            print(f"[Store] ⚠️ Sync failed, using local candles only: {e}")
+            return None
+
+
+# === Main ===
+if __name__ == '__main__':
+    from backend.db.database import get_engine
+    from config import SYMBOLS
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--import-csv', help="store a one-off OHLCV CSV (e.g. models/market_data.csv) for --symbols[0]")
+    args = parser.parse_args()
+
+    store = OHLCVStore()
+    start = time.perf_counter()
+    if args.import_csv:
+        rows = store.write_frame(args.symbols[0], pd.read_csv(args.import_csv))
+        print(f"[Store] ✅ Imported {rows} candles into {args.symbols[0].upper()}")
+    else:
+        for symbol, rows in store.sync(get_engine(), args.symbols).items():
+            print(f"[Store] ✅ {symbol.upper()}: {rows} candles pulled, last {store.last_timestamp(symbol)}")
+    print(f"[Store] Done in {time.perf_counter() - start:.1f}s")
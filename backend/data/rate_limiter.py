@@ -0,0 +1,53 @@
+# backend/data/rate_limiter.py
+"""
+Thread-safe token bucket measured in Binance request weight.
+
+Every REST call acquires its weight before it is sent. The bucket refills
+continuously at `limit_per_minute / 60` per second, and whenever Binance
+reports the weight already used this minute (X-MBX-USED-WEIGHT-1M) the
+bucket is pulled down to match, so other clients sharing the IP are
+accounted for too.
+"""
+
+import threading
+import time
+
+
+class WeightRateLimiter:
+    def __init__(self, limit_per_minute=1200, clock=time.monotonic, sleep=time.sleep):
+        self.capacity = float(limit_per_minute)
+        self.refill_per_sec = limit_per_minute / 60.0
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.refill_per_sec)
+        self._last = now
+
+    def acquire(self, weight=1):
+        """Block until `weight` tokens are available, then take them."""
+        if weight > self.capacity:
+            # The bucket never holds more than capacity, so this would wait forever
+            raise ValueError(f"weight {weight} exceeds the limit of {self.capacity:g} per minute")
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.refill_per_sec
+                self.waited_seconds += wait
+            self._sleep(wait)
+
+    def observe_used_weight(self, used_weight):
+        """Sync with the server's view of weight used in the current minute."""
+        if used_weight is None:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, max(0.0, self.capacity - float(used_weight)))
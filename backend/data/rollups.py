@@ -0,0 +1,147 @@
+# backend/data/rollups.py
+"""
+Higher-timeframe candles (5m ... 1d) materialized from market_data into
+market_data_rollup, for the dashboard's timeframe selector.
+
+Buckets are UTC-aligned epoch multiples (the same boundaries Binance uses).
+`refresh_rollups()` is incremental, like a continuous aggregate: per interval
+and symbol it re-aggregates only the candles from one bucket before the
+newest stored bucket onward (the newest bucket is usually still filling, and
+the one before it may still receive a late candle), an index range scan on
+market_data, and upserts those few buckets. The bot runs it every minute; a
+chart read is one primary-key range scan.
+
+Candles written further back (the gap filler refetching a historical range,
+or a backfill of older history) are not picked up by that; the writer calls
+`invalidate_rollups()` for the range, which re-aggregates just the buckets
+covering it.
+
+    python backend/data/rollups.py                      # refresh now
+    python backend/data/rollups.py --since 2024-01-01   # rebuild after backfilling older history
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+ROLLUP_INTERVALS = {"5m": 300, "15m": 900, "1h": 3600, "4h": 14_400, "1d": 86_400}
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+LAST_BUCKETS_SQL = text('''
+    SELECT symbol, MAX(bucket) FROM market_data_rollup
+    WHERE timeframe = :timeframe
+    GROUP BY symbol
+''')
+
+REFRESH_ROLLUP_SQL = text('''
+    INSERT INTO market_data_rollup (timeframe, symbol, bucket, open, high, low, close, volume, candles)
+    SELECT CAST(:timeframe AS TEXT), symbol,
+           to_timestamp(floor(extract(epoch FROM timestamp) / :seconds) * :seconds) AS bucket,
+           (array_agg(open ORDER BY timestamp))[1],
+           MAX(high), MIN(low),
+           (array_agg(close ORDER BY timestamp DESC))[1],
+           SUM(volume), COUNT(*)
+    FROM market_data
+    WHERE symbol = :symbol AND timestamp >= :since
+      AND (CAST(:until AS TIMESTAMPTZ) IS NULL OR timestamp < :until)
+    GROUP BY symbol, bucket
+    ON CONFLICT (timeframe, symbol, bucket) DO UPDATE SET
+        open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low,
+        close = EXCLUDED.close, volume = EXCLUDED.volume, candles = EXCLUDED.candles
+''')
+
+SELECT_ROLLUP_SQL = text('''
+    SELECT bucket AS timestamp, open, high, low, close, volume FROM market_data_rollup
+    WHERE timeframe = :timeframe AND symbol = :symbol AND bucket >= :after
+    ORDER BY bucket DESC
+    LIMIT :limit
+''')
+
+SELECT_CANDLES_SQL = text('''
+    SELECT timestamp, open, high, low, close, volume FROM market_data
+    WHERE symbol = :symbol AND timestamp >= :after
+    ORDER BY timestamp DESC
+    LIMIT :limit
+''')
+
+
+def refresh_rollups(engine, symbols, intervals=ROLLUP_INTERVALS):
+    """Bring every rollup interval up to date for `symbols`; returns {interval: buckets upserted}."""
+    upserted = {}
+    for interval in intervals:
+        with engine.begin() as conn:
+            last = dict(conn.execute(LAST_BUCKETS_SQL, {'timeframe': interval}).fetchall())
+            total = 0
+            for symbol in symbols:
+                symbol = symbol.lower()
+                seconds = ROLLUP_INTERVALS[interval]
+                since = last[symbol] - timedelta(seconds=seconds) if last.get(symbol) else EPOCH
+                total += conn.execute(REFRESH_ROLLUP_SQL, {
+                    'timeframe': interval, 'symbol': symbol, 'seconds': seconds, 'since': since, 'until': None
+                }).rowcount
+            upserted[interval] = total
+    return upserted
+
+
+def bucket_floor(ts, seconds):
+    return EPOCH + timedelta(seconds=(ts - EPOCH).total_seconds() // seconds * seconds)
+
+
+def invalidate_rollups(engine, symbol, start, end, intervals=ROLLUP_INTERVALS):
+    """Re-aggregate every bucket that contains a candle in [start, end] (UTC datetimes) after
+    candles there were inserted late; returns {interval: buckets upserted}."""
+    upserted = {}
+    with engine.begin() as conn:
+        for interval in intervals:
+            seconds = ROLLUP_INTERVALS[interval]
+            upserted[interval] = conn.execute(REFRESH_ROLLUP_SQL, {
+                'timeframe': interval, 'symbol': symbol.lower(), 'seconds': seconds,
+                'since': bucket_floor(start, seconds),
+                'until': bucket_floor(end, seconds) + timedelta(seconds=seconds),
+            }).rowcount
+    return upserted
+
+
+def load_candles(engine, symbol, interval="1m", limit=2000, after=None):
+    """The latest `limit` candles of one timeframe (opening at or after `after`), oldest first:
+    1m from market_data, the rest from rollups."""
+    params = {'symbol': symbol.lower(), 'limit': limit, 'after': after or EPOCH}
+    if interval == "1m":
+        statement = SELECT_CANDLES_SQL
+    else:
+        statement = SELECT_ROLLUP_SQL
+        params['timeframe'] = interval
+    df = pd.read_sql(statement, engine, params=params)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+# === Main ===
+if __name__ == '__main__':
+    from backend.db.database import get_engine
+    from backend.db.schema import ensure_schema
+    from config import SYMBOLS
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--since', default=None, help="YYYY-MM-DD: rebuild every bucket from this date on")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    ensure_schema(engine)
+    start = time.perf_counter()
+    if args.since:
+        since = datetime.fromisoformat(args.since).replace(tzinfo=timezone.utc)
+        for symbol in args.symbols:
+            for interval, rows in invalidate_rollups(engine, symbol, since, datetime.now(timezone.utc)).items():
+                print(f"[Rollup] ✅ {symbol.upper()} {interval}: {rows} buckets rebuilt")
+    for interval, rows in refresh_rollups(engine, args.symbols).items():
+        print(f"[Rollup] ✅ {interval}: {rows} buckets refreshed")
+    print(f"[Rollup] Done in {time.perf_counter() - start:.1f}s")
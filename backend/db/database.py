@@ -0,0 +1,159 @@
+# backend/db/database.py
+"""
+One pooled SQLAlchemy engine per process, shared by every module.
+
+Connection settings come from the environment (DATABASE_URL, or DB_USER /
+DB_PASSWORD / DB_HOST / DB_PORT / DB_NAME) and the pool is explicitly sized
+(DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE) with
+pre-ping, so the Supabase pooler sees a bounded number of connections.
+
+`pool_stats()` reports checkouts and the time callers spent waiting for a
+connection, for tuning the pool size.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL
+from sqlalchemy.pool import QueuePool
+
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '5'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))     # seconds to wait for a free connection
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))     # seconds; pooler drops idle sessions
+STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '500'))
+
+
+class PoolStats:
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)     # recent checkout waits, seconds
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def count(self, name):
+        # Pool events fire on whichever thread checks a connection in or out
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self._waits.append(seconds)
+            self.waits += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            p95 = waits[int(len(waits) * 0.95) - 1] if waits else 0.0
+            return {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': 1000 * self.total_wait / self.waits if self.waits else 0.0,
+                'p95_wait_ms': 1000 * p95,
+                'max_wait_ms': 1000 * self.max_wait,
+            }
+
+
+stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def database_url():
+    """DATABASE_URL, else a Postgres URL from DB_USER / DB_PASSWORD / DB_HOST (DB_PORT 5432, DB_NAME postgres)."""
+    url = os.getenv('DATABASE_URL')
+    if url:
+        return url
+    missing = [name for name in ('DB_USER', 'DB_PASSWORD', 'DB_HOST') if not os.getenv(name)]
+    if missing:
+        raise RuntimeError(
+            "No database configured: set DATABASE_URL, or DB_USER, DB_PASSWORD and DB_HOST "
+            f"(missing: {', '.join(missing)})"
+        )
+    return URL.create(
+        "postgresql+psycopg2",
+        username=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        host=os.getenv('DB_HOST'),
+        port=int(os.getenv('DB_PORT', '5432')),
+        database=os.getenv('DB_NAME', 'postgres'),
+    )
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+
+def _create_engine():
+    engine = create_engine(
+        database_url(),
+        poolclass=TimedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=True,
+        query_cache_size=STATEMENT_CACHE_SIZE,
+    )
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_conn, record):
+        stats.count('connects')
+
+    @event.listens_for(engine, 'checkout')
+    def _on_checkout(dbapi_conn, record, proxy):
+        stats.count('checkouts')
+
+    @event.listens_for(engine, 'checkin')
+    def _on_checkin(dbapi_conn, record):
+        stats.count('checkins')
+
+    return engine
+
+
+def pool_stats():
+    """Checkout/wait counters plus the pool's current occupancy."""
+    snapshot = stats.snapshot()
+    if _engine is not None:
+        pool = _engine.pool
+        snapshot.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(0, pool.overflow()),
+        })
+    return snapshot
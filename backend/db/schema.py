@@ -0,0 +1,163 @@
+# backend/db/schema.py
+"""
+Versioned schema bootstrap for every table the bot, backfill and dashboard use.
+
+`ensure_schema(engine)` runs once at process startup: it applies any
+migration newer than the version recorded in `schema_version`, inside one
+transaction guarded by an advisory lock so the bot and a backfill starting
+together do not race. Nothing on the candle/signal/trade hot path runs DDL.
+
+To change the schema, append a new (version, description, statements)
+entry to MIGRATIONS; never edit one that has shipped.
+"""
+
+from sqlalchemy import text
+
+SCHEMA_LOCK_ID = 727_001    # pg_advisory_xact_lock key for migrations
+
+MIGRATIONS = [
+    (1, "core tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS market_data (
+            symbol TEXT NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL,
+            open FLOAT, high FLOAT, low FLOAT, close FLOAT, volume FLOAT,
+            PRIMARY KEY (symbol, timestamp)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS strategy_signals (
+            id SERIAL PRIMARY KEY,
+            timestamp TIMESTAMPTZ,
+            symbol TEXT,
+            strategy TEXT,
+            action TEXT,
+            price FLOAT,
+            reason TEXT,
+            executed BOOLEAN DEFAULT TRUE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS trades (
+            id SERIAL PRIMARY KEY,
+            timestamp TIMESTAMPTZ,
+            symbol TEXT,
+            action TEXT,
+            price FLOAT,
+            strategy TEXT,
+            reason TEXT,
+            entry_time TIMESTAMPTZ,
+            entry_price FLOAT,
+            exit_price FLOAT,
+            gross_pnl FLOAT,
+            fees FLOAT,
+            net_pnl FLOAT
+        )
+        ''',
+    ]),
+    (2, "symbol/time lookup indexes", [
+        # The original backfill.py created market_data keyed on timestamp alone,
+        # with no symbol column, and only ever stored BTCUSDT. Upgrade such a table
+        # to the current layout before indexing it. A legacy table could never get
+        # past this migration before (the symbol index failed), so databases that
+        # already applied it are unaffected.
+        '''
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema()
+                  AND table_name = 'market_data' AND column_name = 'symbol'
+            ) THEN
+                ALTER TABLE market_data ADD COLUMN symbol TEXT;
+                UPDATE market_data SET symbol = 'btcusdt';
+                ALTER TABLE market_data ALTER COLUMN symbol SET NOT NULL;
+                ALTER TABLE market_data DROP CONSTRAINT market_data_pkey;
+                ALTER TABLE market_data ADD PRIMARY KEY (symbol, timestamp);
+            END IF;
+        END
+        $$
+        ''',
+        # Latest-N candles per symbol (warm start, LIMIT 100 reads, resume points) are a
+        # backward scan of the (symbol, timestamp) primary key; no extra index needed
+        'CREATE INDEX IF NOT EXISTS idx_strategy_signals_symbol_ts ON strategy_signals (symbol, timestamp DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_strategy_signals_strategy_ts ON strategy_signals (strategy, timestamp DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_trades_symbol_ts ON trades (symbol, timestamp DESC)',
+    ]),
+    (3, "higher-timeframe candle rollups", [
+        # Filled incrementally by backend/data/rollups.py; the key serves chart reads
+        '''
+        CREATE TABLE IF NOT EXISTS market_data_rollup (
+            timeframe TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            bucket TIMESTAMPTZ NOT NULL,
+            open FLOAT, high FLOAT, low FLOAT, close FLOAT, volume FLOAT,
+            candles INT,
+            PRIMARY KEY (timeframe, symbol, bucket)
+        )
+        ''',
+    ]),
+    (4, "live performance analytics", [
+        # Snapshot rows (portfolio / per symbol / per strategy) written by
+        # backend/analytics/performance.py; the dashboard reads the whole table
+        '''
+        CREATE TABLE IF NOT EXISTS performance_summary (
+            scope TEXT NOT NULL,
+            name TEXT NOT NULL,
+            trades INT, wins INT, win_rate FLOAT,
+            net_pnl FLOAT, fees FLOAT,
+            equity FLOAT, peak_equity FLOAT, max_drawdown FLOAT,
+            rolling_sharpe FLOAT,
+            since TIMESTAMPTZ, updated_at TIMESTAMPTZ,
+            PRIMARY KEY (scope, name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS equity_curve (
+            timestamp TIMESTAMPTZ NOT NULL,
+            symbol TEXT,
+            net_pnl FLOAT,
+            equity FLOAT,
+            drawdown FLOAT
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_equity_curve_ts ON equity_curve (timestamp DESC)',
+    ]),
+    (5, "restorable performance snapshots", [
+        # JSON list of the rolling-Sharpe window's trade returns, so a restarted
+        # bot continues the snapshot instead of starting from zero
+        'ALTER TABLE performance_summary ADD COLUMN IF NOT EXISTS returns TEXT',
+    ]),
+    (6, "drop duplicate market_data index", [
+        # Migration 2 used to create this copy of the primary key; it only doubled
+        # index writes on the busiest table
+        'DROP INDEX IF EXISTS idx_market_data_symbol_ts',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def ensure_schema(engine):
+    """Apply pending migrations; returns the schema version now in place."""
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {'id': SCHEMA_LOCK_ID})
+        conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMPTZ DEFAULT now()
+            )
+        '''))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_version"))}
+
+        for version, description, statements in MIGRATIONS:
+            if version in applied:
+                continue
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(text("INSERT INTO schema_version (version, description) VALUES (:v, :d)"),
+                         {'v': version, 'd': description})
+            print(f"[DB] ✅ Applied schema migration {version}: {description}")
+
+    return LATEST_VERSION
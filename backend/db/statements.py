@@ -0,0 +1,36 @@
+# backend/db/statements.py
+# Hot-path SQL, built once at import. Reusing the same text() objects lets
+# SQLAlchemy serve them from its compiled-statement cache on every call
+# instead of re-parsing the SQL string per candle/signal/trade.
+
+from sqlalchemy import text
+
+INSERT_MARKET_DATA_SQL = text('''
+    INSERT INTO market_data (symbol, timestamp, open, high, low, close, volume)
+    VALUES (:symbol, :timestamp, :open, :high, :low, :close, :volume)
+    ON CONFLICT (symbol, timestamp) DO NOTHING
+''')
+
+SELECT_RECENT_CANDLES_SQL = text('''
+    SELECT * FROM market_data
+    WHERE symbol = :symbol
+    ORDER BY timestamp DESC
+    LIMIT :limit
+''')
+
+INSERT_SIGNAL_SQL = text('''
+    INSERT INTO strategy_signals (timestamp, symbol, strategy, action, price, reason, executed)
+    VALUES (:timestamp, :symbol, :strategy, :action, :price, :reason, :executed)
+''')
+
+INSERT_TRADE_SQL = text('''
+    INSERT INTO trades (
+        timestamp, symbol, action, price, strategy, reason,
+        entry_time, entry_price, exit_price,
+        gross_pnl, fees, net_pnl
+    ) VALUES (
+        :timestamp, :symbol, :action, :price, :strategy, :reason,
+        :entry_time, :entry_price, :exit_price,
+        :gross_pnl, :fees, :net_pnl
+    )
+''')
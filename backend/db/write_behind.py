@@ -0,0 +1,208 @@
+# backend/db/write_behind.py
+"""
+Write-behind queue for rows the trading path produces (signals, trades).
+
+`submit()` never touches the database: it drops the record on a bounded
+in-memory queue and returns. A background thread drains the queue in
+batches (by size or age) and writes each batch as one executemany in one
+transaction. A batch that fails is retried row by row: rows the database
+rejects on their own (constraint or data errors) go to a dead-letter file
+next to the spill file, and once the database itself is unavailable the
+remaining rows are appended to a local JSONL spill file. Spilled rows are
+replayed the same way after the next successful write and on startup, and
+records that don't fit the full queue are spilled too. `stop()` flushes
+everything queued, and spills what is left if that takes longer than its
+timeout.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import exc
+
+
+def _unavailable(e):
+    """True when the database (not the row) is the problem: retry the row later."""
+    return (isinstance(e, (exc.OperationalError, exc.InterfaceError, exc.TimeoutError))
+            or getattr(e, 'connection_invalidated', False))
+
+
+class WriteBehindWriter:
+    def __init__(self, engine, statement, name, batch_size=200, flush_interval=1.0,
+                 max_queue=10_000, spill_path=None, block_timeout=0.0, dead_letter_path=None):
+        self.engine = engine
+        self.statement = statement      # text() INSERT with named parameters
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+        if dead_letter_path is None and spill_path:
+            dead_letter_path = os.path.splitext(spill_path)[0] + '.dead.jsonl'
+        self.dead_letter_path = dead_letter_path
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stats = {'submitted': 0, 'written': 0, 'batches': 0, 'spilled': 0, 'replayed': 0,
+                      'failed_batches': 0, 'dead_lettered': 0}
+        self._stats_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # === Producer side (trading path) ===
+    def submit(self, record):
+        self._count('submitted')
+        try:
+            if self.block_timeout:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self._spill([record])
+
+    # === Lifecycle ===
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # The database is too slow to drain in time; keep the rest for the next start
+                left = self._drain()
+                print(f"[DB Error] ❌ {self.name}: flush did not finish in {timeout:g}s, "
+                      f"spilling {len(left)} queued record(s)")
+                self._spill(left)
+            self._thread = None
+
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self.stats[name] += n
+
+    # === Consumer side ===
+    def _next_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self, limit=None):
+        records = []
+        try:
+            while limit is None or len(records) < limit:
+                records.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return records
+
+    def _write(self, batch):
+        with self.engine.begin() as conn:
+            conn.execute(self.statement, batch)
+
+    def _write_batch(self, batch):
+        """Write `batch`, falling back to one row at a time if it fails; returns (written, rows to retry later)."""
+        try:
+            self._write(batch)
+            return len(batch), []
+        except Exception as e:
+            self._count('failed_batches')
+            if _unavailable(e):
+                print(f"[DB Error] ❌ {self.name}: batch of {len(batch)} failed: {e}")
+                return 0, batch
+            print(f"[DB Error] ❌ {self.name}: batch of {len(batch)} failed, retrying row by row: {e}")
+
+        written = 0
+        for i, record in enumerate(batch):
+            try:
+                self._write([record])
+                written += 1
+            except Exception as e:
+                if _unavailable(e):
+                    return written, batch[i:]
+                self._dead_letter(record, e)
+        return written, []
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        written, retry = self._write_batch(batch)
+        self._count('written', written)
+        if retry:
+            self._spill(retry)
+            return
+        self._count('batches')
+        self._replay_spill()
+
+    def _run(self):
+        self._replay_spill()
+        while not self._stop.is_set():
+            self._flush(self._next_batch())
+
+        # Drain whatever is left on shutdown
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                break
+            self._flush(batch)
+
+    # === Spill File ===
+    def _spill(self, records):
+        if not self.spill_path:
+            print(f"[DB Error] ❌ {self.name}: dropped {len(records)} record(s), no spill file configured")
+            return
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            with open(self.spill_path, 'a') as f:
+                for record in records:
+                    f.write(json.dumps(record, default=str) + '\n')
+        self._count('spilled', len(records))
+
+    def _dead_letter(self, record, error):
+        # Rejected on its own: retrying would fail forever and hold up the rows behind it
+        self._count('dead_lettered')
+        print(f"[DB Error] ❌ {self.name}: record rejected, moved to dead letters: {error}")
+        if not self.dead_letter_path:
+            return
+        entry = {'failed_at': datetime.now(timezone.utc).isoformat(), 'error': str(error), 'record': record}
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or '.', exist_ok=True)
+            with open(self.dead_letter_path, 'a') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+
+    def _replay_spill(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        with self._spill_lock:
+            pending = self.spill_path + '.replay'
+            os.replace(self.spill_path, pending)
+        with open(pending) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        os.remove(pending)
+
+        done = 0
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            written, retry = self._write_batch(batch)
+            done += written
+            if retry:
+                # Database unavailable: put the unwritten rows back for the next attempt
+                print(f"[DB Error] ❌ {self.name}: spill replay stopped after {done} record(s)")
+                self._spill(retry + records[start + len(batch):])
+                break
+        self._count('replayed', done)
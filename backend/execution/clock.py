@@ -0,0 +1,24 @@
+# backend/execution/clock.py
+# Time sources for the execution path. Live code calls system_clock(); the
+# portfolio backtest and replay harness pass a SimulatedClock that they move
+# to each candle's close time, so daily risk limits follow market time.
+
+from datetime import datetime, timezone
+
+
+def system_clock():
+    return datetime.now(timezone.utc)
+
+
+class SimulatedClock:
+    def __init__(self, start=None):
+        self.current = start or datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    def set(self, when):
+        self.current = when
+
+    def set_ms(self, ms):
+        self.current = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+    def __call__(self):
+        return self.current
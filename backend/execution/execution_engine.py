@@ -1,5 +1,7 @@
-from datetime import datetime, timezone
-from sqlalchemy import text
+from collections import defaultdict
+import logging
+import threading
+import time
 import os, sys
 
 # Path fix
@@ -7,6 +9,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 # === Local Imports ===
 from backend.risk.risk_manager import check_risk_limits, register_trade
+from backend.execution.clock import system_clock
+from backend.db.statements import INSERT_TRADE_SQL
+from backend.monitoring.logs import get_logger, log_event
+
+log = get_logger("execution")
 
 def safe_float(x):
     try:
@@ -19,40 +26,32 @@ class ExecutionEngine:
     FEE_RATE = 0.00075          # Binance fee
     POSITION_RISK = 0.10        # 10% capital per trade
 
-    def __init__(self, starting_balance=50000, engine=None):
+    def __init__(self, starting_balance=50000, engine=None, writer=None, clock=None, verbose=True, isolated=False,
+                 latency=None, on_trade_closed=None):
         self.balance = starting_balance
-        self.positions = {}     # symbol: {'price': float, 'time': datetime}
+        self.positions = {}     # symbol: {'price': float, 'time': datetime, 'strategies': [entry voters]}
         self.pnl_log = []       # closed trade records
-        self.engine = engine
-        self._create_trades_table()
-
-    def _create_trades_table(self):
-        if not self.engine:
-            print("[DB] ❌ No engine")
-            return
-
-        with self.engine.begin() as conn:
-            conn.execute(text('''
-                CREATE TABLE IF NOT EXISTS trades (
-                    id SERIAL PRIMARY KEY,
-                    timestamp TIMESTAMPTZ,
-                    symbol TEXT,
-                    action TEXT,
-                    price FLOAT,
-                    strategy TEXT,
-                    reason TEXT,
-                    entry_time TIMESTAMPTZ,
-                    entry_price FLOAT,
-                    exit_price FLOAT,
-                    gross_pnl FLOAT,
-                    fees FLOAT,
-                    net_pnl FLOAT
-                )
-            '''))
+        self.engine = engine    # None = no trade rows written (backtests)
+        self.writer = writer    # optional WriteBehindWriter for INSERT_TRADE_SQL
+        self.clock = clock or system_clock      # SimulatedClock for backtests/replays
+        self.verbose = verbose
+        # isolated: keep the daily risk log on this engine instead of the process-wide one
+        self.trade_logs = defaultdict(list) if isolated else None
+        self.latency = latency  # optional LatencyRecorder: "risk" and "execution" stages
+        self.on_trade_closed = on_trade_closed  # optional callback(pnl record), e.g. PerformanceTracker
+        self._lock = threading.Lock()   # symbols are evaluated on parallel threads
 
     def execute_paper_trade(self, signal, price, symbol):
+        start = time.perf_counter()
+        with self._lock:
+            executed = self._execute_paper_trade(signal, price, symbol)
+        if self.latency:
+            self.latency.record(symbol, "execution", time.perf_counter() - start)
+        return executed
+
+    def _execute_paper_trade(self, signal, price, symbol):
         symbol = symbol.upper()
-        timestamp = datetime.now(timezone.utc)
+        timestamp = self.clock()
         strategy = signal['strategy']
         action = signal['action'].upper()
 
@@ -64,9 +63,13 @@ class ExecutionEngine:
 
         # === RISK FILTER ===
         signal["symbol"] = symbol
-        risk_ok, reason = check_risk_limits(signal, price, current_position, self.balance)
+        start = time.perf_counter()
+        risk_ok, reason = check_risk_limits(signal, price, current_position, self.balance,
+                                            now=timestamp, logs=self.trade_logs)
+        if self.latency:
+            self.latency.record(symbol, "risk", time.perf_counter() - start)
         if not risk_ok:
-            print(f"[Risk] 🚫 {symbol} blocked: {reason}")
+            self._log(logging.INFO, "risk_blocked", symbol=symbol, action=action, reason=reason)
             return False
 
         if action == "BUY":
@@ -74,13 +77,14 @@ class ExecutionEngine:
                 # Open new position
                 self.positions[symbol] = {
                     'price': price,
-                    'time': timestamp
+                    'time': timestamp,
+                    'strategies': signal.get('strategies', [strategy])
                 }
                 self._log_trade(timestamp, "BUY", price, strategy, reason, symbol)
-                print(f"[BUY] {symbol} at ${price:.2f} | Strategy: {strategy}")
+                self._log(logging.INFO, "trade_open", symbol=symbol, price=round(price, 8), strategy=strategy)
                 return True
             else:
-                print(f"[Skip] {symbol} already in BUY position.")
+                self._log(logging.DEBUG, "skip_already_long", symbol=symbol)
                 return False
 
         elif action == "SELL":
@@ -97,7 +101,7 @@ class ExecutionEngine:
                 net_pnl = gross_pnl - entry_fee - exit_fee
 
                 self.balance += net_pnl
-                self.pnl_log.append({
+                closed = {
                     "symbol": symbol,
                     "entry_time": entry_time,
                     "exit_time": timestamp,
@@ -105,10 +109,14 @@ class ExecutionEngine:
                     "exit_price": price,
                     "gross_pnl": gross_pnl,
                     "fees": entry_fee + exit_fee,
-                    "pnl": net_pnl
-                })
+                    "pnl": net_pnl,
+                    "strategies": position['strategies']
+                }
+                self.pnl_log.append(closed)
+                if self.on_trade_closed:
+                    self.on_trade_closed(closed)
 
-                register_trade(signal, net_pnl)
+                register_trade(signal, net_pnl, now=timestamp, logs=self.trade_logs)
 
                 self._log_trade(
                     timestamp, "SELL", price, strategy,
@@ -118,50 +126,50 @@ class ExecutionEngine:
                 )
 
                 del self.positions[symbol]
-                print(f"[SELL] {symbol} at ${price:.2f} | Net PnL: ${net_pnl:.2f} | Strategy: {strategy}")
+                self._log(logging.INFO, "trade_close", symbol=symbol, price=round(price, 8),
+                          net_pnl=round(net_pnl, 2), strategy=strategy)
                 return True
             else:
-                print(f"[Skip] {symbol} has no open position to SELL.")
+                self._log(logging.DEBUG, "skip_no_position", symbol=symbol)
                 return False
 
         else:
-            print(f"[Error] Invalid action: {action}")
+            self._log(logging.WARNING, "invalid_action", symbol=symbol, action=action)
             return False
 
+    def _log(self, level, event, **fields):
+        if self.verbose:
+            log_event(log, level, event, **fields)
+
     def _log_trade(self, timestamp, action, price, strategy, reason, symbol,
                    entry_time=None, entry_price=None,
                    exit_price=None, gross_pnl=None, fees=None, net_pnl=None):
         if not self.engine:
             return
 
+        record = {
+            'timestamp': timestamp,
+            'symbol': symbol,
+            'action': action,
+            'price': safe_float(price),
+            'strategy': strategy,
+            'reason': reason,
+            'entry_time': entry_time,
+            'entry_price': safe_float(entry_price),
+            'exit_price': safe_float(exit_price),
+            'gross_pnl': safe_float(gross_pnl),
+            'fees': safe_float(fees),
+            'net_pnl': safe_float(net_pnl)
+        }
+        if self.writer:
+            self.writer.submit(record)
+            return
+
         try:
             with self.engine.begin() as conn:
-                conn.execute(text('''
-                    INSERT INTO trades (
-                        timestamp, symbol, action, price, strategy, reason,
-                        entry_time, entry_price, exit_price,
-                        gross_pnl, fees, net_pnl
-                    ) VALUES (
-                        :timestamp, :symbol, :action, :price, :strategy, :reason,
-                        :entry_time, :entry_price, :exit_price,
-                        :gross_pnl, :fees, :net_pnl
-                    )
-                '''), {
-                    'timestamp': timestamp,
-                    'symbol': symbol,
-                    'action': action,
-                    'price': safe_float(price),
-                    'strategy': strategy,
-                    'reason': reason,
-                    'entry_time': entry_time,
-                    'entry_price': safe_float(entry_price),
-                    'exit_price': safe_float(exit_price),
-                    'gross_pnl': safe_float(gross_pnl),
-                    'fees': safe_float(fees),
-                    'net_pnl': safe_float(net_pnl)
-                })
+                conn.execute(INSERT_TRADE_SQL, record)
         except Exception as e:
-            print(f"[DB Error] ❌ Failed to log trade: {e}")
+            log_event(log, logging.ERROR, "trade_db_error", symbol=symbol, error=e)
 
     def get_balance(self):
         return self.balance
@@ -0,0 +1,181 @@
+# backend/execution/strategy_voting.py
+"""
+Cumulative strategy vote shared by the live bot and the portfolio backtest.
+
+Every strategy casts BUY, SELL or nothing for the latest candle; two or
+more BUYs make a BUY, otherwise two or more SELLs make a SELL. The row form
+(evaluate_all_strategies) runs on the live path, either one strategy after
+another or concurrently through a StrategyExecutor with per-strategy
+deadlines; the array form (strategy_vote_arrays + vote_array) applies the
+same rules to whole columns so a backtest can find every voting bar in one
+pass.
+"""
+
+import logging
+import os, sys, time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from strategies.rsi_strategy import evaluate_rsi, evaluate_rsi_array
+from strategies.ema_crossover import evaluate_ema_crossover, evaluate_ema_crossover_array
+from strategies.macd_strategy import evaluate_macd, evaluate_macd_array
+from strategies.bb_strategy import evaluate_bollinger, evaluate_bollinger_array
+from backend.ml.ml_strategy import evaluate_ml_strategy, BUY_THRESHOLD as ML_BUY_THRESHOLD
+from backend.monitoring.logs import get_logger, log_event
+
+VOTES_NEEDED = 2
+
+# Concurrent evaluation: a strategy still running at its deadline abstains
+STRATEGY_DEADLINE = 0.050                   # seconds, measured from the start of the vote
+STRATEGY_DEADLINES = {"ML Strategy": 0.080}  # waits for the cross-symbol BatchPredictor window
+VOTE_BUDGET = 0.100                         # no deadline may exceed this
+
+STRATEGY_FUNCTIONS = [
+    # evaluate_rsi's prev_row is a row, not the frame (the frame raised on every
+    # 40-60 RSI); its crossing checks can't change the vote anyway
+    ("RSI", lambda r, df: evaluate_rsi(r)),
+    ("EMA Crossover", lambda r, df: evaluate_ema_crossover(r)),
+    ("MACD", lambda r, df: evaluate_macd(r)),
+    ("Bollinger Bands", lambda r, df: evaluate_bollinger(r)),
+    ("ML Strategy", lambda r, df: evaluate_ml_strategy(r))
+]
+# Latency stage per strategy, e.g. "strategy.ema_crossover"
+STRATEGY_STAGES = {name: "strategy." + name.lower().replace(" ", "_") for name, _ in STRATEGY_FUNCTIONS}
+
+log = get_logger("strategy")
+
+
+# === Row form (live) ===
+def run_strategy(name, func, row, full_df, verbose=True, latency=None, symbol=None):
+    """One strategy's signal dict, or None when it has no signal or fails."""
+    try:
+        start = time.perf_counter()
+        signal = func(row, full_df)
+        if latency:
+            latency.record(symbol, STRATEGY_STAGES[name], time.perf_counter() - start)
+        if verbose:
+            log_event(log, logging.DEBUG, "strategy_signal", symbol=symbol, strategy=name,
+                      action=signal["action"] if signal else None)
+        return signal
+    except Exception as e:
+        log_event(log, logging.WARNING, "strategy_error", symbol=symbol, strategy=name, error=e)
+        return None
+
+
+class StrategyExecutor:
+    """
+    Runs the strategies of each vote concurrently on one shared pool. Every
+    strategy gets a deadline from the start of the vote (STRATEGY_DEADLINES,
+    else STRATEGY_DEADLINE, capped at VOTE_BUDGET), so a vote never waits
+    longer than its slowest deadline. A strategy that misses it abstains, is
+    counted as "<stage>.timeout" on the LatencyRecorder, and its late result
+    is dropped; one that has not started yet is cancelled. Size the pool for
+    a full bar (symbols x strategies) so no strategy queues behind another.
+    """
+
+    def __init__(self, workers, deadlines=STRATEGY_DEADLINES, default_deadline=STRATEGY_DEADLINE,
+                 budget=VOTE_BUDGET, latency=None):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strategy")
+        self.deadlines = {name: min(deadlines.get(name, default_deadline), budget)
+                          for name, _ in STRATEGY_FUNCTIONS}
+        self.latency = latency
+
+    def run(self, row, full_df, verbose=True, symbol=None):
+        """[(name, signal or None)] for the strategies that finished in time."""
+        start = time.perf_counter()
+        futures = [(name, self.pool.submit(run_strategy, name, func, row, full_df, verbose, self.latency, symbol))
+                   for name, func in STRATEGY_FUNCTIONS]
+        results = []
+        for name, future in futures:
+            remaining = start + self.deadlines[name] - time.perf_counter()
+            try:
+                results.append((name, future.result(timeout=max(0.0, remaining))))
+            except TimeoutError:
+                future.cancel()
+                if self.latency:
+                    self.latency.count(symbol, STRATEGY_STAGES[name] + ".timeout")
+                log_event(log, logging.WARNING, "strategy_timeout", symbol=symbol, strategy=name,
+                          deadline_ms=round(self.deadlines[name] * 1000))
+        return results
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def evaluate_all_strategies(row, full_df, verbose=True, latency=None, symbol=None, executor=None):
+    """
+    latency: optional LatencyRecorder timing each strategy for `symbol`.
+    executor: optional StrategyExecutor; without one the strategies run in
+    turn on the calling thread.
+    """
+    if executor:
+        results = executor.run(row, full_df, verbose, symbol)
+    else:
+        results = [(name, run_strategy(name, func, row, full_df, verbose, latency, symbol))
+                   for name, func in STRATEGY_FUNCTIONS]
+
+    votes = {"BUY": 0, "SELL": 0}
+    signals = []
+    for name, signal in results:
+        if signal and str(signal.get("action", "")).upper() in votes:
+            action = signal["action"].upper()
+            votes[action] += 1
+            signals.append({
+                "strategy": name,
+                "action": action,
+                "reason": signal.get("reason", "")
+            })
+
+    if votes["BUY"] >= VOTES_NEEDED:
+        action = "BUY"
+    elif votes["SELL"] >= VOTES_NEEDED:
+        action = "SELL"
+    else:
+        return None
+    voters = [s['strategy'] for s in signals if s['action'] == action]
+    return {
+        "action": action,
+        "strategy": "cumulative_vote",
+        "reason": str(voters),
+        "strategies": voters     # per-strategy attribution in backend/analytics/performance.py
+    }
+
+
+# === Array form (backtests) ===
+def strategy_vote_arrays(df, ml_predictions=None):
+    """{strategy name: signal vector (1 = BUY, -1 = SELL, 0 = none)} over a feature frame."""
+    close = df['close'].to_numpy(dtype='float64')
+    arrays = {
+        "RSI": evaluate_rsi_array(df['rsi'].to_numpy()),
+        "EMA Crossover": evaluate_ema_crossover_array(df['ema_fast'].to_numpy(), df['ema_slow'].to_numpy()),
+        "MACD": evaluate_macd_array(df['macd'].to_numpy(), df['macd_signal'].to_numpy()),
+        # Live calls evaluate_bollinger(row) without prev_row
+        "Bollinger Bands": evaluate_bollinger_array(close, df['bb_upper'].to_numpy(), df['bb_lower'].to_numpy()),
+        "ML Strategy": np.zeros(len(df), dtype='int8'),
+    }
+    if ml_predictions is not None:
+        # NaN predictions (indicators not ready) compare false: no vote, as in the row form
+        arrays["ML Strategy"] = (np.asarray(ml_predictions) >= ML_BUY_THRESHOLD).astype('int8')
+    return arrays
+
+
+def vote_array(arrays):
+    """Per-bar cumulative vote: 1 = BUY, -1 = SELL, 0 = none (BUY wins a tie, as in the row form)."""
+    stacked = np.vstack(list(arrays.values()))
+    buys = (stacked == 1).sum(axis=0)
+    sells = (stacked == -1).sum(axis=0)
+    return np.where(buys >= VOTES_NEEDED, 1, np.where(sells >= VOTES_NEEDED, -1, 0)).astype('int8')
+
+
+def vote_signal(arrays, i, vote):
+    """The signal dict evaluate_all_strategies would return for bar i with the given vote."""
+    action = "BUY" if vote == 1 else "SELL"
+    voters = [name for name, signals in arrays.items() if signals[i] == vote]
+    return {
+        "action": action,
+        "strategy": "cumulative_vote",
+        "reason": str(voters),
+        "strategies": voters
+    }
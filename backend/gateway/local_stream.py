@@ -0,0 +1,89 @@
+# backend/gateway/local_stream.py
+"""
+Local stand-in for Binance's combined kline stream, for running the gateway
+(and the whole bot) offline.
+
+Serves /stream?streams=<symbol>@kline_<interval>/... on localhost and sends
+each client the kline messages for its streams, wrapped like Binance does
+({'stream': ..., 'data': msg}), at max speed or `speed`x real time.
+Messages are any kline payload iterable: a recording (read_messages) or
+stored candles (store_messages) from backend/data/kline_replay.py.
+
+    python backend/gateway/local_stream.py --file klines.jsonl --speed 60
+    MARKET_STREAM_URL=ws://127.0.0.1:8765 python scalping_bot_framework.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from backend.data.kline_replay import read_messages
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class LocalKlineStream:
+    def __init__(self, messages, speed=None, host=HOST, port=PORT):
+        self.messages = list(messages)
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self.sent = 0
+        self._server = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]    # port=0 picks a free one
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, ws):
+        query = parse_qs(urlparse(ws.request.path).query)
+        streams = set(query.get('streams', [''])[0].split('/'))
+        began, first_ms = time.perf_counter(), None
+        for msg in self.messages:
+            stream = f"{msg['s'].lower()}@kline_{msg['k']['i']}"
+            if stream not in streams:
+                continue
+            if self.speed:
+                first_ms = msg['E'] if first_ms is None else first_ms
+                delay = began + (msg['E'] - first_ms) / 1000 / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await ws.send(json.dumps({'stream': stream, 'data': msg}))
+            self.sent += 1
+        await ws.wait_closed()      # stay connected, like an idle live stream
+
+
+# === Main ===
+async def serve_forever(messages, speed, port):
+    stream = await LocalKlineStream(messages, speed, port=port).start()
+    print(f"[Local Stream] ✅ Serving {len(stream.messages)} messages on {stream.url}")
+    await asyncio.Future()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file', required=True, help="JSONL of recorded kline messages (see replay_bot.py --save)")
+    parser.add_argument('--speed', type=float, default=None, help="N x real time (default: max speed)")
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_forever(read_messages(args.file), args.speed, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,175 @@
+# backend/gateway/market_gateway.py
+"""
+Asyncio market data gateway: Binance combined kline streams -> per-symbol
+handlers.
+
+All subscribed symbols share a few combined-stream connections
+(/stream?streams=btcusdt@kline_1m/ethusdt@kline_1m/...), up to
+MAX_STREAMS_PER_CONNECTION each, read by one event loop. Messages are decoded
+with orjson when installed, and only closed candles are put on the
+symbol's bounded queue; a full queue drops its oldest candle (the gap filler
+refetches it) instead of stalling the other symbols. One consumer task per
+symbol runs the handler on a thread pool, so its blocking DB I/O never holds
+up the loop and each symbol's candles are handled in order.
+
+Per-symbol metrics: received / handled / dropped, deepest queue, and lag
+(handler start minus the message's event time). A message that can't be
+decoded or dispatched is logged (rate-limited), counted in `parse_errors` and
+skipped; it never drops the connection.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import websockets
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from backend.monitoring.logs import get_logger, log_event
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+STREAM_URL = "wss://stream.binance.com:9443"
+MAX_STREAMS_PER_CONNECTION = 200    # Binance allows 1024 per connection
+QUEUE_SIZE = 100                    # closed candles waiting per symbol
+HANDLER_THREADS = 16
+RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+DRAIN_TIMEOUT = 10.0                # seconds to finish queued candles on shutdown
+
+log = get_logger("gateway")
+
+
+class MarketGateway:
+    def __init__(self, interval="1m", url=STREAM_URL, queue_size=QUEUE_SIZE, handler_threads=HANDLER_THREADS,
+                 streams_per_connection=MAX_STREAMS_PER_CONNECTION):
+        self.interval = interval
+        self.url = url
+        self.queue_size = queue_size
+        self.streams_per_connection = streams_per_connection
+        self.handlers = {}
+        self.queues = {}
+        self.executor = ThreadPoolExecutor(max_workers=handler_threads, thread_name_prefix="gateway")
+        self.metrics = {}
+        self.reconnects = 0
+        self.parse_errors = 0       # messages skipped because they could not be decoded or dispatched
+        self._loop = None
+        self._stop = None
+
+    def subscribe(self, symbol, callback):
+        """callback(msg) gets each closed kline payload for the symbol (same shape as the TWM callback)."""
+        symbol = symbol.lower()
+        self.handlers[symbol] = callback
+        self.metrics[symbol] = {
+            'received': 0, 'handled': 0, 'dropped': 0, 'errors': 0,
+            'max_depth': 0, 'last_lag_ms': 0.0, 'max_lag_ms': 0.0
+        }
+
+    def stream_urls(self):
+        streams = [f"{symbol}@kline_{self.interval}" for symbol in self.handlers]
+        step = self.streams_per_connection
+        return [f"{self.url}/stream?streams=" + "/".join(streams[i:i + step]) for i in range(0, len(streams), step)]
+
+    # === Lifecycle ===
+    async def run(self):
+        """Read and dispatch until stop(); then finish what is queued and return."""
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self.queues = {symbol: asyncio.Queue(maxsize=self.queue_size) for symbol in self.handlers}
+        consumers = [asyncio.create_task(self._consume(symbol, q)) for symbol, q in self.queues.items()]
+        readers = [asyncio.create_task(self._read(url)) for url in self.stream_urls()]
+        print(f"[Gateway] 🔄 {len(self.handlers)} symbols on {len(readers)} combined stream(s)")
+
+        await self._stop.wait()
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self.queues.values())), DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"[Gateway] ⚠️ {sum(q.qsize() for q in self.queues.values())} candles left unhandled at shutdown")
+        for task in consumers:
+            task.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+        print("[Gateway] 🛑 Stopped")
+
+    def stop(self):
+        """Thread- and signal-safe."""
+        if self._loop and self._stop:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    # === Read ===
+    async def _read(self, url):
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(url, ping_interval=20, max_queue=None) as ws:
+                    attempt = 0
+                    async for raw in ws:
+                        try:
+                            self._dispatch(raw)
+                        except Exception as e:
+                            self.parse_errors += 1
+                            log_event(log, logging.WARNING, "bad_message", error=repr(e), message=str(raw)[:200])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                self.reconnects += 1
+                print(f"[Gateway] ⚠️ Stream dropped ({e}), reconnecting in {delay}s")
+                await asyncio.sleep(delay)
+
+    def _dispatch(self, raw):
+        msg = loads(raw)
+        msg = msg.get('data', msg)      # combined streams wrap the payload
+        if msg.get('e') != 'kline' or not msg['k']['x']:
+            return
+        symbol = msg['s'].lower()
+        q = self.queues.get(symbol)
+        if q is None:
+            return
+        m = self.metrics[symbol]
+        m['received'] += 1
+        if q.full():
+            q.get_nowait()
+            q.task_done()
+            m['dropped'] += 1
+        q.put_nowait(msg)
+        m['max_depth'] = max(m['max_depth'], q.qsize())
+
+    # === Handle ===
+    async def _consume(self, symbol, q):
+        callback = self.handlers[symbol]
+        m = self.metrics[symbol]
+        while True:
+            msg = await q.get()
+            try:
+                lag = time.time() * 1000 - msg.get('E', msg['k']['T'])
+                m['last_lag_ms'] = lag
+                m['max_lag_ms'] = max(m['max_lag_ms'], lag)
+                await self._loop.run_in_executor(self.executor, callback, msg)
+                m['handled'] += 1
+            except Exception as e:
+                m['errors'] += 1
+                print(f"[Gateway] ❌ {symbol.upper()} handler failed: {e}")
+            finally:
+                q.task_done()
+
+    def summary(self):
+        """Totals across symbols, for the periodic status line."""
+        total = {key: sum(m[key] for m in self.metrics.values()) for key in ('received', 'handled', 'dropped', 'errors')}
+        total['max_depth'] = max((m['max_depth'] for m in self.metrics.values()), default=0)
+        total['max_lag_ms'] = max((m['max_lag_ms'] for m in self.metrics.values()), default=0.0)
+        total['queued'] = sum(q.qsize() for q in self.queues.values())
+        total['reconnects'] = self.reconnects
+        total['parse_errors'] = self.parse_errors
+        return total
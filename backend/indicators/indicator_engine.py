@@ -0,0 +1,226 @@
+# backend/indicators/indicator_engine.py
+"""
+Streaming technical indicators with O(1) updates per closed candle.
+
+Every indicator reproduces TA-Lib's seeding rules (SMA-seeded EMA, Wilder
+RSI, MACD with the fast EMA aligned to the slow one, population-stddev
+Bollinger Bands), so a stream that is seeded from history and then updated
+candle by candle gives the same values as TA-Lib over the whole series.
+
+The live bot seeds one IndicatorEngine per symbol and updates it once per
+closed candle. Batch callers (backtester, trainer, sweeps, walk-forward)
+use `add_indicators`, which computes whole columns with TA-Lib's C loops
+instead of stepping the engine row by row; tests/test_indicators.py pins
+both paths to each other and to TA-Lib, so features are identical
+everywhere.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+FEATURE_COLUMNS = ['rsi', 'ema_fast', 'ema_slow', 'macd', 'macd_signal', 'bb_upper', 'bb_lower']
+
+NAN = float('nan')
+
+
+class EMA:
+    def __init__(self, period):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.value = None
+        self._seed = []
+
+    def update(self, x):
+        if self.value is None:
+            # TA-Lib seeds the EMA with the SMA of the first `period` values
+            self._seed.append(x)
+            if len(self._seed) < self.period:
+                return NAN
+            self.value = sum(self._seed) / self.period
+            self._seed = None
+            return self.value
+        self.value = ((x - self.value) * self.k) + self.value
+        return self.value
+
+
+class RSI:
+    """Wilder RSI. The first value appears after `period` price changes."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._count = 0
+
+    def update(self, x):
+        if self.prev_close is None:
+            self.prev_close = x
+            return NAN
+
+        change = x - self.prev_close
+        self.prev_close = x
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+
+        if self._count < self.period:
+            # Seed with simple averages of the first `period` changes
+            self.avg_gain += gain
+            self.avg_loss += loss
+            self._count += 1
+            if self._count < self.period:
+                return NAN
+            self.avg_gain /= self.period
+            self.avg_loss /= self.period
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        total = self.avg_gain + self.avg_loss
+        if -1e-14 < total < 1e-14:
+            return 0.0
+        return 100.0 * (self.avg_gain / total)
+
+
+class MACD:
+    """MACD line and signal line. Both are NaN until the signal EMA is seeded, as in TA-Lib."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        if fast > slow:
+            fast, slow = slow, fast
+        self.fast_period = fast
+        self.slow_period = slow
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self._warmup = []
+
+    def update(self, x):
+        if self._warmup is not None:
+            # TA-Lib starts both EMAs on the same bar: the slow EMA is seeded
+            # over the first `slow` closes, the fast one over the last `fast` of them.
+            self._warmup.append(x)
+            if len(self._warmup) < self.slow_period:
+                return NAN, NAN
+            for v in self._warmup[-self.fast_period:]:
+                self.fast.update(v)
+            for v in self._warmup:
+                self.slow.update(v)
+            self._warmup = None
+        else:
+            self.fast.update(x)
+            self.slow.update(x)
+
+        macd = self.fast.value - self.slow.value
+        signal = self.signal.update(macd)
+        if math.isnan(signal):
+            return NAN, NAN
+        return macd, signal
+
+
+class BollingerBands:
+    """SMA +/- `nbdev` population standard deviations over a rolling window."""
+
+    RESYNC_EVERY = 1000     # recompute running sums from the window to bound float drift
+
+    def __init__(self, period=20, nbdev=2.0):
+        self.period = period
+        self.nbdev = nbdev
+        self.window = deque(maxlen=period)
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._updates = 0
+
+    def update(self, x):
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        self.window.append(x)
+        self._sum += x
+        self._sumsq += x * x
+
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self._sum = math.fsum(self.window)
+            self._sumsq = math.fsum(v * v for v in self.window)
+
+        if len(self.window) < self.period:
+            return NAN, NAN, NAN
+
+        mean = self._sum / self.period
+        variance = self._sumsq / self.period - mean * mean
+        std = math.sqrt(variance) if variance > 0 else 0.0
+        return mean + self.nbdev * std, mean, mean - self.nbdev * std
+
+
+class IndicatorEngine:
+    """All features used by the strategies, updated once per closed candle."""
+
+    def __init__(self, rsi_period=14, ema_fast=9, ema_slow=21,
+                 macd_fast=12, macd_slow=26, macd_signal=9,
+                 bb_period=20, bb_nbdev=2.0):
+        self.rsi = RSI(rsi_period)
+        self.ema_fast = EMA(ema_fast)
+        self.ema_slow = EMA(ema_slow)
+        self.macd = MACD(macd_fast, macd_slow, macd_signal)
+        self.bb = BollingerBands(bb_period, bb_nbdev)
+
+    def update(self, close):
+        close = float(close)
+        macd, macd_signal = self.macd.update(close)
+        bb_upper, _, bb_lower = self.bb.update(close)
+        return {
+            'rsi': self.rsi.update(close),
+            'ema_fast': self.ema_fast.update(close),
+            'ema_slow': self.ema_slow.update(close),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'bb_upper': bb_upper,
+            'bb_lower': bb_lower,
+        }
+
+    def seed(self, closes):
+        """Feed a history of closes (oldest first); returns every feature as an array."""
+        closes = [float(c) for c in closes]
+        macd = [self.macd.update(c) for c in closes]
+        bb = [self.bb.update(c) for c in closes]
+        return {
+            'rsi': np.array([self.rsi.update(c) for c in closes], dtype='float64'),
+            'ema_fast': np.array([self.ema_fast.update(c) for c in closes], dtype='float64'),
+            'ema_slow': np.array([self.ema_slow.update(c) for c in closes], dtype='float64'),
+            'macd': np.array([m[0] for m in macd], dtype='float64'),
+            'macd_signal': np.array([m[1] for m in macd], dtype='float64'),
+            'bb_upper': np.array([b[0] for b in bb], dtype='float64'),
+            'bb_lower': np.array([b[2] for b in bb], dtype='float64'),
+        }
+
+
+def batch_indicators(closes, rsi_period=14, ema_fast=9, ema_slow=21,
+                     macd_fast=12, macd_slow=26, macd_signal=9,
+                     bb_period=20, bb_nbdev=2.0):
+    """Every feature over a whole history of closes at once; the same values IndicatorEngine.seed returns."""
+    import talib
+
+    closes = np.asarray(closes, dtype='float64')
+    macd, signal, _ = talib.MACD(closes, fastperiod=macd_fast, slowperiod=macd_slow, signalperiod=macd_signal)
+    upper, _, lower = talib.BBANDS(closes, timeperiod=bb_period, nbdevup=bb_nbdev, nbdevdn=bb_nbdev)
+    return {
+        'rsi': talib.RSI(closes, timeperiod=rsi_period),
+        'ema_fast': talib.EMA(closes, timeperiod=ema_fast),
+        'ema_slow': talib.EMA(closes, timeperiod=ema_slow),
+        'macd': macd,
+        'macd_signal': signal,
+        'bb_upper': upper,
+        'bb_lower': lower,
+    }
+
+
+def add_indicators(df, **params):
+    """Add every feature column to `df` (sorted oldest first). Leading rows stay NaN."""
+    features = batch_indicators(df['close'].to_numpy(), **params)
+    for name in FEATURE_COLUMNS:
+        df[name] = features[name]
+    return df
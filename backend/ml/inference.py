@@ -0,0 +1,91 @@
+# backend/ml/inference.py
+"""
+Cross-symbol batched inference.
+
+When a minute closes, every symbol asks for a prediction at almost the same
+moment. Instead of each one paying scaler + LightGBM call overhead on a
+single row, callers hand their feature vector to BatchPredictor, which
+gathers everything that arrives within a short window (or until `expected`
+vectors are in), runs one vectorized prediction on the stacked matrix and
+hands each caller its own result.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchPredictor:
+    def __init__(self, predict_fn, window=0.010, max_batch=256, expected=None):
+        self.predict_fn = predict_fn    # (n, features) float array -> (n,) predictions
+        self.window = window            # seconds to wait for more requests after the first
+        self.max_batch = max_batch
+        self.expected = expected        # flush as soon as this many are queued (e.g. len(SYMBOLS))
+        self.queue = queue.Queue()
+        self.stats = {'requests': 0, 'batches': 0, 'largest_batch': 0}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batch-predictor", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None:
+                self.queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def submit(self, vector):
+        """Queue one feature vector; returns a Future resolving to its prediction."""
+        self.start()
+        future = Future()
+        self.queue.put((np.asarray(vector, dtype='float64'), future))
+        return future
+
+    def predict(self, vector, timeout=1.0):
+        return self.submit(vector).result(timeout)
+
+    def _collect(self):
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        limit = min(self.max_batch, self.expected or self.max_batch)
+        deadline = time.monotonic() + self.window
+        while len(batch) < limit:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)    # stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            X = np.vstack([vector for vector, _ in batch])
+            try:
+                predictions = self.predict_fn(X)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), prediction in zip(batch, predictions):
+                future.set_result(float(prediction))
+
+            self.stats['requests'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
@@ -0,0 +1,184 @@
+# backend/ml/model_registry.py
+"""
+Hot-reloadable LightGBM model + scaler pair.
+
+The trainer publishes artifacts with `publish_artifacts()`: the model and
+scaler are written under versioned names (temp file + fsync + os.replace),
+and `models/VERSION` is replaced last to point at the new pair. The running
+bot's ModelRegistry polls that one small file; when the version changes it
+loads the pair in the background and swaps a single reference, so in-flight
+predictions finish on the old model and inference never pauses. A half
+written pair is never visible because VERSION only moves once both files
+are complete.
+
+Each loaded pair is compiled into a CompiledModel: scaler mean/scale are
+kept as NumPy arrays and predictions go straight to the booster on a
+contiguous float32 matrix (no DataFrame, no sklearn validation).
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+MODELS_DIR = "models"
+MODEL_FILE = "lightgbm_model.pkl"
+SCALER_FILE = "scaler.pkl"
+VERSION_FILE = "VERSION"
+KEEP_VERSIONS = 3           # versioned artifact pairs kept on disk
+POLL_INTERVAL = 30.0        # seconds between VERSION checks
+
+
+class CompiledModel:
+    """One immutable model+scaler pair with a raw-NumPy prediction path."""
+
+    def __init__(self, model, scaler, version):
+        self.model = model
+        self.scaler = scaler
+        self.version = version
+        self.booster = getattr(model, 'booster_', model)     # LGBMRegressor or a bare Booster
+        self.num_iteration = getattr(model, 'best_iteration_', None) or None
+        self.mean = np.asarray(scaler.mean_, dtype='float64')
+        self.scale = np.asarray(scaler.scale_, dtype='float64')
+        self.n_features = len(self.mean)
+        if self.booster.num_feature() != self.n_features:
+            raise ValueError(f"model expects {self.booster.num_feature()} features, scaler has {self.n_features}")
+
+    def predict(self, X):
+        """(n, features) or (features,) raw feature values -> (n,) predictions."""
+        X = np.asarray(X, dtype='float64').reshape(-1, self.n_features)
+        X_scaled = np.ascontiguousarray((X - self.mean) / self.scale, dtype=np.float32)
+        return self.booster.predict(X_scaled, num_iteration=self.num_iteration)
+
+
+class ModelRegistry:
+    def __init__(self, models_dir=MODELS_DIR, poll_interval=POLL_INTERVAL):
+        self.models_dir = models_dir
+        self.poll_interval = poll_interval
+        self.current = None         # CompiledModel; replaced as a whole, never mutated
+        self.stats = {'loads': 0, 'failed_loads': 0}
+        self._failed_version = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # === Prediction ===
+    def predict(self, X):
+        compiled = self.current     # one read: a concurrent swap cannot split a batch
+        if compiled is None:
+            raise RuntimeError("no model loaded")
+        return compiled.predict(X)
+
+    def version(self):
+        return self.current.version if self.current else None
+
+    # === Loading ===
+    def _read_pointer(self):
+        """Contents of VERSION, or the unversioned legacy pair if none was published yet."""
+        path = os.path.join(self.models_dir, VERSION_FILE)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'version': 'legacy', 'model': MODEL_FILE, 'scaler': SCALER_FILE}
+
+    def check(self):
+        """Load the published pair if it differs from the one serving; True if swapped."""
+        with self._load_lock:
+            try:
+                pointer = self._read_pointer()
+            except (OSError, ValueError) as e:
+                print(f"[ML Registry Error] ❌ Unreadable {VERSION_FILE}: {e}")
+                return False
+            version = pointer['version']
+            if version == self.version() or version == self._failed_version:
+                return False
+
+            try:
+                model = joblib.load(os.path.join(self.models_dir, pointer['model']))
+                scaler = joblib.load(os.path.join(self.models_dir, pointer['scaler']))
+                compiled = CompiledModel(model, scaler, version)
+            except Exception as e:
+                self._failed_version = version
+                self.stats['failed_loads'] += 1
+                print(f"[ML Registry Error] ❌ Could not load model version {version}, keeping {self.version()}: {e}")
+                return False
+
+            previous = self.version()
+            self.current = compiled
+            self.stats['loads'] += 1
+            print(f"[ML Registry] ✅ Serving model version {version}" + (f" (was {previous})" if previous else ""))
+            return True
+
+    # === Watcher ===
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+
+# === Publishing (trainer side) ===
+def _atomic_dump(obj, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        joblib.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _atomic_write_text(text, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def publish_artifacts(model, scaler, models_dir=MODELS_DIR, metadata=None):
+    """Write a new model+scaler pair and point VERSION at it; returns the version string."""
+    os.makedirs(models_dir, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    model_name = f"lightgbm_model-{version}.pkl"
+    scaler_name = f"scaler-{version}.pkl"
+
+    _atomic_dump(model, os.path.join(models_dir, model_name))
+    _atomic_dump(scaler, os.path.join(models_dir, scaler_name))
+
+    # Unversioned copies for anything that still loads the fixed paths
+    _atomic_dump(model, os.path.join(models_dir, MODEL_FILE))
+    _atomic_dump(scaler, os.path.join(models_dir, SCALER_FILE))
+
+    # VERSION last: readers only ever see a pair whose files are complete
+    pointer = {'version': version, 'model': model_name, 'scaler': scaler_name,
+               'created_at': datetime.now(timezone.utc).isoformat(), **(metadata or {})}
+    _atomic_write_text(json.dumps(pointer, indent=2), os.path.join(models_dir, VERSION_FILE))
+
+    _prune_versions(models_dir, keep=KEEP_VERSIONS)
+    return version
+
+
+def _prune_versions(models_dir, keep=KEEP_VERSIONS):
+    versions = sorted({name[len("scaler-"):-len(".pkl")] for name in os.listdir(models_dir)
+                       if name.startswith("scaler-") and name.endswith(".pkl")})
+    for version in versions[:-keep]:
+        for name in (f"lightgbm_model-{version}.pkl", f"scaler-{version}.pkl"):
+            try:
+                os.remove(os.path.join(models_dir, name))
+            except FileNotFoundError:
+                pass
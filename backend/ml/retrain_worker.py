@@ -0,0 +1,133 @@
+# backend/ml/retrain_worker.py
+"""
+Out-of-process LightGBM retraining.
+
+The DB read, indicator build and model fit run in a single spawned worker
+process (niced, so it yields CPU to the live bot), never in the scheduler
+thread next to the websocket callbacks. Jobs go through the executor's
+queue one at a time; a retrain requested while one is already queued or
+running is folded into it rather than stacked.
+
+The worker publishes artifacts with `publish_artifacts()` (atomic file
+swap + VERSION written last); `on_published(job)` runs in the bot process
+once the job finishes, e.g. to make the ModelRegistry pick the new version
+up immediately.
+"""
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+RETRAIN_NICE = 10       # added to the worker's nice value
+
+
+def _init_worker():
+    try:
+        os.nice(RETRAIN_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def run_training_job(symbols, window):
+    """Runs in the worker process."""
+    from backend.ml.lgbm_model_trainer import train_lightgbm, TRAIN_WINDOW
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    version = train_lightgbm(symbols, window or TRAIN_WINDOW)
+    return {'version': version, 'started_at': started_at, 'duration': time.perf_counter() - start}
+
+
+class RetrainWorker:
+    def __init__(self, on_published=None):
+        self.on_published = on_published    # on_published(job) after a new version is on disk
+        self.jobs = {}                      # job id -> status dict
+        self._futures = {}
+        self._active = None                 # id of the queued/running job, if any
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # === Lifecycle ===
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn'),
+                                                     initializer=_init_worker)
+
+    def stop(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    # === Jobs ===
+    def submit(self, symbols=None, window=None):
+        """Queue a retrain; returns its job id (the pending one if a retrain is already in flight)."""
+        self.start()
+        with self._lock:
+            if self._active is not None:
+                print(f"[Retrain] ⏳ Job {self._active} still {self._status(self._active)}, not queuing another")
+                return self._active
+
+            job_id = next(self._ids)
+            self.jobs[job_id] = {
+                'id': job_id, 'status': 'queued', 'symbols': list(symbols) if symbols else None, 'window': window,
+                'submitted_at': datetime.now(timezone.utc), 'started_at': None, 'finished_at': None,
+                'duration': None, 'version': None, 'error': None,
+            }
+            self._active = job_id
+            future = self._executor.submit(run_training_job, symbols, window)
+            self._futures[job_id] = future
+
+        print(f"[Retrain] 📥 Job {job_id} queued")
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def status(self, job_id=None):
+        """Copy of one job's status (the latest if no id is given)."""
+        with self._lock:
+            if job_id is None:
+                job_id = max(self.jobs, default=None)
+            if job_id is None:
+                return None
+            return dict(self.jobs[job_id], status=self._status(job_id))
+
+    def _status(self, job_id):
+        job = self.jobs[job_id]
+        if job['status'] == 'queued' and self._futures[job_id].running():
+            return 'running'
+        return job['status']
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            job = self.jobs[job_id]
+            job['finished_at'] = datetime.now(timezone.utc)
+            if future.cancelled():
+                job['status'] = 'cancelled'
+            elif future.exception() is not None:
+                job['status'] = 'failed'
+                job['error'] = repr(future.exception())
+                if isinstance(future.exception(), BrokenProcessPool):
+                    self._executor = None       # worker died (e.g. OOM); the next submit starts a fresh one
+            else:
+                result = future.result()
+                job.update(result)
+                job['status'] = 'published' if result['version'] else 'no_data'
+            del self._futures[job_id]
+            if self._active == job_id:
+                self._active = None
+            job = dict(job)
+
+        if job['status'] == 'published':
+            print(f"[Retrain] ✅ Job {job_id} published version {job['version']} in {job['duration']:.1f}s")
+            if self.on_published:
+                self.on_published(job)
+        elif job['status'] == 'failed':
+            print(f"[Retrain Error] ❌ Job {job_id} failed: {job['error']}")
+        else:
+            print(f"[Retrain] ⚠️ Job {job_id} finished without a new model ({job['status']})")
@@ -0,0 +1,247 @@
+# backend/ml/walk_forward.py
+"""
+Walk-forward training and out-of-sample evaluation of the LightGBM model.
+
+Per symbol, the feature matrix is built once over the whole history with
+the batch (TA-Lib) indicators (the same build_features/fit_model the
+live trainer uses) from the local OHLCV store, and cached on disk under a key
+made of the symbol, the data range actually stored, and the feature
+config, so repeated experiments skip the indicator pass.
+
+Rolling folds (train on `train_rows`, test on the next `test_rows`, step
+forward) are fitted in parallel on a process pool; workers receive the
+matrices once through the pool initializer and each fold only carries
+row offsets. Every fold reports out-of-sample hit rates, and its test-window
+predictions are turned into BUY/SELL signals and run through
+backtester.simulate_positions for simulated PnL.
+Outputs:
+- Per-symbol summary printed, per-fold table written to walk_forward_results.csv
+
+    python backend/ml/walk_forward.py --symbols btcusdt ethusdt --train 5000 --test 1440 --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+import backtester
+from backend.ml.lgbm_model_trainer import FEATURES, TRAIN_WINDOW, build_features, fit_model, store
+from backend.db.database import get_engine
+from backend.ml.model_registry import CompiledModel
+from config import SYMBOLS
+
+# === CONFIG ===
+CACHE_DIR = os.path.join("cache", "features")
+FEATURE_CACHE_VERSION = 1       # bump when build_features changes meaning
+FEATURE_CONFIG = {
+    'features': FEATURES,
+    'indicators': {},           # IndicatorEngine overrides, e.g. {'ema_fast': 12}
+    'target': 'next_close_return_pct',
+}
+TRAIN_ROWS = TRAIN_WINDOW
+TEST_ROWS = 1440                # one day of 1m candles
+EMBARGO_ROWS = 1                # a train row's target is the next close; keep it out of the test window
+BUY_THRESHOLD = 0.5             # same cut-off as evaluate_ml_strategy (predicted % return)
+SELL_THRESHOLD = 0.0
+
+
+# === Feature Matrices ===
+def feature_matrix(df, config=None):
+    """Candles (oldest first) -> {'times', 'X', 'y', 'close'} arrays for one symbol."""
+    config = config or FEATURE_CONFIG
+    features = build_features(df.reset_index(drop=True), **config['indicators'])
+    times = pd.to_datetime(features['timestamp'], utc=True)
+    return {
+        'times': np.asarray((times - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1), dtype='int64'),
+        'X': np.ascontiguousarray(features[config['features']].to_numpy(dtype='float64')),
+        'y': features['target'].to_numpy(dtype='float64'),
+        'close': features['close'].to_numpy(dtype='float64'),
+    }
+
+
+def cache_key(symbol, data_range, config):
+    first, last, rows = data_range
+    payload = json.dumps({
+        'symbol': symbol, 'first': str(first), 'last': str(last), 'rows': rows,
+        'config': config, 'version': FEATURE_CACHE_VERSION,
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+def load_features(symbol, start=None, end=None, config=None, cache_dir=CACHE_DIR, refresh=False):
+    """Feature matrix for `symbol` between start and end, from the disk cache when the stored range is unchanged."""
+    config = config or FEATURE_CONFIG
+    symbol = symbol.lower()
+    store.try_sync(get_engine, [symbol])
+    block = store.read_block(symbol, start, end)
+    if not block.shape[1]:
+        return None
+
+    data_range = (int(block[0, 0]), int(block[0, -1]), block.shape[1])
+    path = os.path.join(cache_dir, f"{symbol}-{cache_key(symbol, data_range, config)}.npz")
+    if not refresh and os.path.exists(path):
+        with np.load(path) as cached:
+            return {k: cached[k] for k in cached.files}
+
+    matrix = feature_matrix(store.to_frame(block).reset_index(), config)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, **matrix)
+    os.replace(tmp, path)
+    return matrix
+
+
+# === Folds ===
+def rolling_folds(n_rows, train_rows=TRAIN_ROWS, test_rows=TEST_ROWS, step=None, embargo=EMBARGO_ROWS):
+    """[(train_start, train_end, test_start, test_end), ...] half-open row ranges, rolling forward by `step`."""
+    step = step or test_rows
+    folds = []
+    train_start = 0
+    while train_start + train_rows + embargo + test_rows <= n_rows:
+        train_end = train_start + train_rows
+        test_start = train_end + embargo
+        folds.append((train_start, train_end, test_start, test_start + test_rows))
+        train_start += step
+    return folds
+
+
+def prediction_signals(predictions, buy_threshold=BUY_THRESHOLD, sell_threshold=SELL_THRESHOLD):
+    """Predicted % returns -> backtester signal vector (1 = BUY, -1 = SELL, 0 = none)."""
+    return np.where(predictions >= buy_threshold, 1, np.where(predictions <= sell_threshold, -1, 0)).astype('int8')
+
+
+# === Worker State ===
+_matrices = {}
+
+
+def _attach(matrices):
+    global _matrices
+    _matrices = matrices
+
+
+def run_fold(task):
+    symbol, fold_id, (train_start, train_end, test_start, test_end), risk, thresholds = task
+    m = _matrices[symbol]
+    start = time.perf_counter()
+
+    model, scaler = fit_model(m['X'][train_start:train_end], m['y'][train_start:train_end], n_jobs=1, verbose=-1)
+    predictions = CompiledModel(model, scaler, version=None).predict(m['X'][test_start:test_end])
+
+    actual = m['y'][test_start:test_end]
+    buys = predictions >= thresholds[0]
+    signals = prediction_signals(predictions, *thresholds)
+    times = pd.to_datetime(m['times'][test_start:test_end], unit='ms', utc=True)
+    trades, equity = backtester.simulate_positions(signals, m['close'][test_start:test_end], times, risk)
+    metrics = backtester.compute_metrics(trades, equity) if len(equity) > 1 else \
+        {'trades': 0, 'total_pnl': 0.0, 'sharpe': float('nan'), 'max_drawdown': 0.0}
+
+    return {
+        'symbol': symbol,
+        'fold': fold_id,
+        'train_from': pd.to_datetime(m['times'][train_start], unit='ms', utc=True),
+        'test_from': times[0],
+        'test_to': times[-1],
+        'hit_rate': float(np.mean(np.sign(predictions) == np.sign(actual))),
+        'buy_signals': int(buys.sum()),
+        'buy_hit_rate': float(np.mean(actual[buys] > 0)) if buys.any() else float('nan'),
+        **metrics,
+        'fit_seconds': time.perf_counter() - start,
+        'predictions': predictions,
+    }
+
+
+# === Pipeline ===
+def walk_forward(matrices, train_rows=TRAIN_ROWS, test_rows=TEST_ROWS, step=None, risk=None, workers=None,
+                 buy_threshold=BUY_THRESHOLD, sell_threshold=SELL_THRESHOLD):
+    """Fit and score every fold of every symbol in `matrices`; returns (per-fold frame, per-symbol summary)."""
+    thresholds = (buy_threshold, sell_threshold)
+    tasks = []
+    for symbol, m in matrices.items():
+        for fold_id, fold in enumerate(rolling_folds(len(m['y']), train_rows, test_rows, step)):
+            tasks.append((symbol, fold_id, fold, risk, thresholds))
+    if not tasks:
+        return pd.DataFrame(), pd.DataFrame()
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_attach,
+                             initargs=(matrices,)) as pool:
+        results = list(pool.map(run_fold, tasks))
+
+    folds = pd.DataFrame([{k: v for k, v in r.items() if k != 'predictions'} for r in results])
+    summary = []
+    for symbol in matrices:
+        symbol_folds = [(task[2], r) for task, r in zip(tasks, results) if r['symbol'] == symbol]
+        if symbol_folds:
+            summary.append(_stitched_summary(symbol, matrices[symbol], symbol_folds, risk, thresholds))
+    return folds, pd.DataFrame(summary)
+
+
+def _stitched_summary(symbol, m, symbol_folds, risk, thresholds):
+    # Concatenate the out-of-sample windows (later folds win on overlap) and simulate them as one run
+    oos = np.full(len(m['y']), np.nan)
+    for (_, _, test_start, test_end), r in symbol_folds:
+        oos[test_start:test_end] = r['predictions']
+    idx = np.flatnonzero(~np.isnan(oos))
+    predictions, actual = oos[idx], m['y'][idx]
+    buys = predictions >= thresholds[0]
+
+    times = pd.to_datetime(m['times'][idx], unit='ms', utc=True)
+    trades, equity = backtester.simulate_positions(prediction_signals(predictions, *thresholds),
+                                                   m['close'][idx], times, risk)
+    return {
+        'symbol': symbol,
+        'folds': len(symbol_folds),
+        'oos_rows': len(idx),
+        'hit_rate': float(np.mean(np.sign(predictions) == np.sign(actual))),
+        'buy_signals': int(buys.sum()),
+        'buy_hit_rate': float(np.mean(actual[buys] > 0)) if buys.any() else float('nan'),
+        **backtester.compute_metrics(trades, equity),
+    }
+
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--start', type=pd.Timestamp, default=None)
+    parser.add_argument('--end', type=pd.Timestamp, default=None)
+    parser.add_argument('--train', type=int, default=TRAIN_ROWS)
+    parser.add_argument('--test', type=int, default=TEST_ROWS)
+    parser.add_argument('--step', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--buy-threshold', type=float, default=BUY_THRESHOLD)
+    parser.add_argument('--sell-threshold', type=float, default=SELL_THRESHOLD)
+    parser.add_argument('--no-risk', action='store_true', help="exit on model SELLs only, without the risk-manager gate")
+    parser.add_argument('--refresh-cache', action='store_true')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matrices = {}
+    for symbol in args.symbols:
+        m = load_features(symbol, args.start, args.end, refresh=args.refresh_cache)
+        if m is None:
+            print(f"[Walk-Forward] ⚠️ {symbol.upper()}: no stored candles, skipped.")
+            continue
+        matrices[symbol.lower()] = m
+    print(f"[Walk-Forward] Feature matrices ready in {time.perf_counter() - start:.1f}s "
+          f"({sum(len(m['y']) for m in matrices.values())} rows)")
+
+    start = time.perf_counter()
+    risk = None if args.no_risk else backtester.RISK_PARAMS
+    folds, summary = walk_forward(matrices, args.train, args.test, args.step, risk, args.workers,
+                                  args.buy_threshold, args.sell_threshold)
+    print(f"[Walk-Forward] {len(folds)} folds in {time.perf_counter() - start:.1f}s\n")
+
+    if summary.empty:
+        print("[Walk-Forward] ❌ Not enough history for a single fold.")
+    else:
+        print(summary.to_string(index=False))
+        folds.to_csv("walk_forward_results.csv", index=False)
@@ -0,0 +1,191 @@
+# backend/monitoring/latency.py
+"""
+Stage latency histograms for the candle hot path.
+
+LatencyHistogram is HDR-style: values are kept in microseconds in
+log-linear buckets (exact below 64µs, then 64 sub-buckets per power of two,
+so any percentile is within ~1.6% of the true value) in a fixed array, so
+recording is O(1) with no allocation and memory does not grow with samples.
+LatencyRecorder keeps one histogram per (symbol, stage), plus event counters
+(e.g. strategy timeouts), and renders a short summary for log_pnl or
+Prometheus text for the /metrics endpoint.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUB_BUCKETS = 64
+MAX_EXPONENT = 36           # 2^36 µs (~19 hours); larger values land in the top bucket
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * ((MAX_EXPONENT + 1) * SUB_BUCKETS)
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(us):
+        if us < SUB_BUCKETS:
+            return us
+        shift = us.bit_length() - 7     # keep the top 7 bits: 64..127
+        return min((shift + 1) * SUB_BUCKETS + (us >> shift) - SUB_BUCKETS, (MAX_EXPONENT + 1) * SUB_BUCKETS - 1)
+
+    @staticmethod
+    def _upper_us(index):
+        # Highest value that maps to the bucket
+        if index < SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        return ((index % SUB_BUCKETS + SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, seconds):
+        us = max(0, int(seconds * 1_000_000))
+        i = self._index(us)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total_us += us
+            if us > self.max_us:
+                self.max_us = us
+
+    def merge(self, other):
+        with other._lock:
+            counts, count, total, peak = list(other.counts), other.count, other.total_us, other.max_us
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, counts)]
+            self.count += count
+            self.total_us += total
+            self.max_us = max(self.max_us, peak)
+
+    def percentile(self, q):
+        """Value (seconds) at quantile q in [0, 1]."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, int(round(q * self.count)))
+            seen = 0
+            for i, n in enumerate(self.counts):
+                seen += n
+                if seen >= rank:
+                    return min(self._upper_us(i), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def snapshot(self):
+        out = {f'p{q * 100:g}': self.percentile(q) for q in QUANTILES}
+        out.update({'count': self.count, 'sum': self.total_us / 1_000_000, 'max': self.max_us / 1_000_000})
+        return out
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.histograms = {}    # (symbol, stage): LatencyHistogram
+        self.counters = {}      # (symbol, event): count
+        self._lock = threading.Lock()
+
+    def histogram(self, symbol, stage):
+        key = (symbol.lower(), stage)
+        h = self.histograms.get(key)
+        if h is None:
+            with self._lock:
+                h = self.histograms.setdefault(key, LatencyHistogram())
+        return h
+
+    def record(self, symbol, stage, seconds):
+        self.histogram(symbol, stage).record(seconds)
+
+    def count(self, symbol, event, n=1):
+        key = (symbol.lower(), event)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    @contextmanager
+    def timer(self, symbol, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(symbol, stage, time.perf_counter() - start)
+
+    def by_stage(self):
+        """One histogram per stage, merged across symbols."""
+        merged = {}
+        for (symbol, stage), h in list(self.histograms.items()):
+            merged.setdefault(stage, LatencyHistogram()).merge(h)
+        return merged
+
+    # === Output ===
+    def summary_lines(self):
+        lines = []
+        for stage, h in sorted(self.by_stage().items()):
+            s = h.snapshot()
+            lines.append(f"[Latency] {stage:<26} n={s['count']:<7} p50 {s['p50'] * 1000:8.2f}ms | "
+                         f"p99 {s['p99'] * 1000:8.2f}ms | p99.9 {s['p99.9'] * 1000:8.2f}ms | max {s['max'] * 1000:8.2f}ms")
+        totals = {}
+        for (symbol, event), n in list(self.counters.items()):
+            totals[event] = totals.get(event, 0) + n
+        for event, n in sorted(totals.items()):
+            lines.append(f"[Latency] {event:<26} count={n}")
+        return lines
+
+    def prometheus_text(self):
+        out = [
+            "# HELP candle_stage_latency_seconds Candle hot-path stage latency",
+            "# TYPE candle_stage_latency_seconds summary",
+        ]
+        maxima = []
+        for (symbol, stage), h in sorted(self.histograms.items()):
+            labels = f'symbol="{symbol}",stage="{stage}"'
+            for q in QUANTILES:
+                out.append(f'candle_stage_latency_seconds{{{labels},quantile="{q:g}"}} {h.percentile(q):.6f}')
+            out.append(f"candle_stage_latency_seconds_sum{{{labels}}} {h.total_us / 1_000_000:.6f}")
+            out.append(f"candle_stage_latency_seconds_count{{{labels}}} {h.count}")
+            maxima.append(f"candle_stage_latency_max_seconds{{{labels}}} {h.max_us / 1_000_000:.6f}")
+        out += ["# TYPE candle_stage_latency_max_seconds gauge"] + maxima
+        out.append("# TYPE candle_events_total counter")
+        for (symbol, event), n in sorted(self.counters.items()):
+            out.append(f'candle_events_total{{symbol="{symbol}",event="{event}"}} {n}')
+        return "\n".join(out) + "\n"
+
+
+# === /metrics endpoint ===
+class MetricsServer:
+    """Serves recorder.prometheus_text() at http://host:port/metrics from a daemon thread."""
+
+    def __init__(self, recorder, port, host="127.0.0.1"):
+        self.recorder = recorder
+        self.address = (host, port)
+        self._server = None
+
+    def start(self):
+        recorder = self.recorder
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = recorder.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass    # no per-scrape output
+
+        self._server = ThreadingHTTPServer(self.address, Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        print(f"[Metrics] ✅ Serving latency metrics on http://{self.address[0]}:{self._server.server_port}/metrics")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,100 @@
+# backend/monitoring/logs.py
+"""
+Leveled, rate-limited structured logging for the candle hot path.
+
+    log = get_logger("strategy")
+    log_event(log, logging.DEBUG, "strategy_signal", symbol="BTCUSDT", strategy="RSI", action="BUY")
+
+prints `2026-01-01T00:00:00.123Z DEBUG strategy strategy_signal symbol=BTCUSDT strategy=RSI action=BUY`
+(one JSON object per line with LOG_FORMAT=json). Level comes from LOG_LEVEL
+(default INFO); log_event returns before formatting anything when the level
+is off, so per-candle DEBUG events cost one check. Each (logger, event,
+symbol) key may emit RATE_LIMIT records per RATE_WINDOW seconds; the next
+record after the window reports how many were suppressed.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")    # text | json
+RATE_LIMIT = 20         # records per key per window
+RATE_WINDOW = 60.0      # seconds
+
+ROOT = "bot"
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, limit=RATE_LIMIT, window=RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._keys = {}     # key: [window start, emitted, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        fields = getattr(record, 'fields', {})
+        key = (record.name, record.msg, fields.get('symbol'))
+        now = time.monotonic()
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._keys[key] = [now, 1, 0]
+                if suppressed:
+                    record.fields = {**fields, 'suppressed': suppressed}
+                return True
+            if state[1] < self.limit:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+
+def _timestamp(record):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+
+
+class KeyValueFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, 'fields', {})
+        parts = [_timestamp(record), record.levelname, record.name[len(ROOT) + 1:], record.getMessage()]
+        parts += [f"{k}={v}" for k, v in fields.items()]
+        return " ".join(parts)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps({'ts': _timestamp(record), 'level': record.levelname, 'logger': record.name[len(ROOT) + 1:],
+                           'event': record.getMessage(), **getattr(record, 'fields', {})}, default=str)
+
+
+def _configure():
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else KeyValueFormatter())
+        handler.addFilter(RateLimitFilter())
+        root = logging.getLogger(ROOT)
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name):
+    _configure()
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def log_event(logger, level, event, **fields):
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
@@ -8,6 +8,7 @@ MAX_TRADES_PER_DAY = 30           # Max 30 trades per symbol per day
 MAX_DRAWDOWN_PCT = 0.30           # Max 30% daily drawdown
 STOP_LOSS_PCT = 0.05              # 5% SL
 TAKE_PROFIT_PCT = 0.04            # 4% TP
+MIN_EXIT_GAIN_PCT = 0.0025        # SELLs between -SL and this gain are held
 FIXED_RISK_PCT = 0.01             # 1% of balance per trade
 DAILY_LOSS_LIMIT = 0.3            # Max 30% capital loss per day
 
@@ -15,16 +16,18 @@ DAILY_LOSS_LIMIT = 0.3            # Max 30% capital loss per day
 trade_logs = defaultdict(list)
 
 
-def check_risk_limits(signal, price, current_position, balance):
-    now = datetime.now(timezone.utc)
+def check_risk_limits(signal, price, current_position, balance, now=None, logs=None):
+    # `now` / `logs` let backtests run on simulated time with their own trade log
+    now = now or datetime.now(timezone.utc)
+    logs = trade_logs if logs is None else logs
     today = now.date()
     symbol = signal.get("symbol", "").upper()
 
     # Clean old logs for today
-    trade_logs[symbol] = [t for t in trade_logs[symbol] if t["timestamp"].date() == today]
+    logs[symbol] = [t for t in logs[symbol] if t["timestamp"].date() == today]
 
     # === Max Trades Per Day ===
-    if len(trade_logs[symbol]) >= MAX_TRADES_PER_DAY:
+    if len(logs[symbol]) >= MAX_TRADES_PER_DAY:
         return False, f"Max trades ({MAX_TRADES_PER_DAY}) reached for {symbol} today"
 
     # === Position Sizing ===
@@ -44,22 +47,23 @@ def check_risk_limits(signal, price, current_position, balance):
             if change_pct >= TAKE_PROFIT_PCT:
                 return True, f"Forced SELL by Take Profit ({change_pct:.2%})"
 
-            if change_pct < 0.0025:  # 0.45%
-                return False, f"Gain {change_pct:.2%} below threshold (0.45%)"
+            if change_pct < MIN_EXIT_GAIN_PCT:
+                return False, f"Gain {change_pct:.2%} below threshold ({MIN_EXIT_GAIN_PCT:.2%})"
 
     # === Daily Drawdown ===
-    net_pnl_today = sum(t["net_pnl"] for t in trade_logs[symbol])
+    net_pnl_today = sum(t["net_pnl"] for t in logs[symbol])
     if net_pnl_today < -balance * MAX_DRAWDOWN_PCT:
         return False, f"Daily drawdown exceeded for {symbol} ({net_pnl_today:.2f})"
 
     return True, "Pass"
 
 
-def register_trade(signal, net_pnl):
-    now = datetime.now(timezone.utc)
+def register_trade(signal, net_pnl, now=None, logs=None):
+    now = now or datetime.now(timezone.utc)
+    logs = trade_logs if logs is None else logs
     symbol = signal.get("symbol", "").upper()
 
-    trade_logs[symbol].append({
+    logs[symbol].append({
         "timestamp": now,
         "action": signal.get("action", "N/A"),
         "strategy": signal.get("strategy", "N/A"),
@@ -1,52 +1,70 @@
 # backfill.py
 """
-Fetch 7 days of 1-minute historical candles for BTCUSDT
+Fetch 1-minute historical candles for every symbol in config.SYMBOLS
 and insert into the `market_data` table in PostgreSQL.
+
+Symbols are fetched concurrently by a bounded worker pool. Requests are
+paced by a token bucket in Binance request weight instead of fixed sleeps,
+and each symbol resumes from its latest stored candle, so reruns only fetch
+what is missing (DAYS_BACK applies to symbols with no data yet).
+
+    python backfill.py                       # all SYMBOLS, resume
+    python backfill.py --symbols btcusdt --days 30
+    python backfill.py --fixture klines.json # offline, no Binance
+
+Rows are streamed into a temporary staging table with COPY and merged into
+`market_data` with a single INSERT ... SELECT ... ON CONFLICT DO NOTHING,
+using the schema defined in backend/db/schema.py.
 """
 
+import argparse
+import io
+import os
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 import pandas as pd
-from binance.client import Client
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from config import SYMBOLS, INTERVAL
+from backend.data.rate_limiter import WeightRateLimiter
+from backend.data.kline_fixture import FixtureKlineClient
+from backend.db.schema import ensure_schema
+from backend.db.database import get_engine
 
 # === CONFIG ===
-DB_PARAMS = {
-    'dbname': 'postgres',
-    'user': 'postgres.ahrkjfvcriprqucdfcvs',
-    'password': 'Hajara-2006#',
-    'host': 'aws-0-eu-west-2.pooler.supabase.com',
-    'port': '5432'
-}
-DB_URI = f"postgresql+psycopg2://{DB_PARAMS['user']}:{DB_PARAMS['password']}@{DB_PARAMS['host']}:{DB_PARAMS['port']}/{DB_PARAMS['dbname']}"
-engine = create_engine(DB_URI)
+engine = get_engine()
 
 BINANCE_API_KEY = ''  # Optional for public data
 BINANCE_SECRET = ''
 
-SYMBOL = 'BTCUSDT'
-INTERVAL = Client.KLINE_INTERVAL_1MINUTE
-DAYS_BACK = 7
+DAYS_BACK = 7               # history for symbols with no stored candles
+COPY_CHUNK_ROWS = 50_000    # rows per COPY buffer
+STORE_BATCH_ROWS = 10_000   # fetched rows accumulated per COPY/merge
+MAX_WORKERS = 4
+
+# === Binance Limits ===
+KLINES_PER_REQUEST = 1000
+KLINES_WEIGHT = 2               # GET /api/v3/klines weight for limit <= 1000
+WEIGHT_LIMIT_PER_MINUTE = 1200  # Binance allows 6000/IP; leave room for the live bot
+INTERVAL_MS = {'1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '1h': 3_600_000}
 
 # === Initialize Binance Client ===
-client = Client(BINANCE_API_KEY, BINANCE_SECRET)
+def create_client():
+    from binance.client import Client
+    return Client(BINANCE_API_KEY, BINANCE_SECRET)
 
 # === Fetch Historical Data ===
-def fetch_data(symbol, interval, start_time, end_time):
-    print(f"Fetching data from {start_time} to {end_time}")
-    klines = client.get_historical_klines(
-        symbol,
-        interval,
-        start_time.strftime("%d %b %Y %H:%M:%S"),
-        end_time.strftime("%d %b %Y %H:%M:%S")
-    )
-
+def klines_to_frame(klines):
     df = pd.DataFrame(klines, columns=[
         'open_time', 'open', 'high', 'low', 'close', 'volume',
         'close_time', 'quote_asset_volume', 'number_of_trades',
         'taker_buy_base_vol', 'taker_buy_quote_vol', 'ignore'
     ])
-    df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms')
+    df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms', utc=True)
     df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
     df = df.astype({
         'open': 'float', 'high': 'float', 'low': 'float',
@@ -54,41 +72,172 @@ def fetch_data(symbol, interval, start_time, end_time):
     })
     return df
 
-# === Store to PostgreSQL using SQLAlchemy ===
-def store_to_db(df):
-    with engine.begin() as conn:
-        conn.execute(text('''
-            CREATE TABLE IF NOT EXISTS market_data (
-                timestamp TIMESTAMPTZ PRIMARY KEY,
-                open FLOAT, high FLOAT, low FLOAT, close FLOAT, volume FLOAT
+
+def _used_weight(client):
+    # The client keeps only its last response, so each worker thread needs its own client
+    response = getattr(client, 'response', None)
+    if response is None:
+        return None
+    value = response.headers.get('x-mbx-used-weight-1m')
+    return int(value) if value is not None else None
+
+
+def fetch_data(client, limiter, symbol, start_ms, end_ms, interval=INTERVAL):
+    """Yield pages of up to KLINES_PER_REQUEST candles covering [start_ms, end_ms]."""
+    step = INTERVAL_MS[interval]
+    while start_ms <= end_ms:
+        limiter.acquire(KLINES_WEIGHT)
+        klines = client.get_klines(symbol=symbol.upper(), interval=interval,
+                                   startTime=start_ms, endTime=end_ms, limit=KLINES_PER_REQUEST)
+        limiter.observe_used_weight(_used_weight(client))
+        if not klines:
+            return
+        yield klines_to_frame(klines)
+        start_ms = int(klines[-1][0]) + step
+
+# === Bulk Store to PostgreSQL (COPY -> staging -> merge) ===
+COLUMNS = ['symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def store_to_db(df, symbol):
+    if df.empty:
+        return 0
+
+    start = time.perf_counter()
+    rows = df[COLUMNS[1:]].copy()
+    rows.insert(0, 'symbol', symbol.lower())    # live bot stores lowercase symbols
+    rows['timestamp'] = pd.to_datetime(rows['timestamp'], utc=True)
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute('''
+            CREATE TEMP TABLE market_data_staging
+            (LIKE market_data INCLUDING DEFAULTS) ON COMMIT DROP
+        ''')
+
+        for i in range(0, len(rows), COPY_CHUNK_ROWS):
+            buf = io.StringIO()
+            rows.iloc[i:i + COPY_CHUNK_ROWS].to_csv(buf, index=False, header=False)
+            buf.seek(0)
+            cur.copy_expert(
+                f"COPY market_data_staging ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf
             )
-        '''))
 
-        insert_query = '''
-            INSERT INTO market_data (timestamp, open, high, low, close, volume)
-            VALUES (:timestamp, :open, :high, :low, :close, :volume)
-            ON CONFLICT (timestamp) DO NOTHING
-        '''
+        cur.execute(f'''
+            INSERT INTO market_data ({', '.join(COLUMNS)})
+            SELECT {', '.join(COLUMNS)} FROM market_data_staging
+            ON CONFLICT (symbol, timestamp) DO NOTHING
+        ''')
+        inserted = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
-        records = df.to_dict(orient='records')
-        for row in records:
-            row['timestamp'] = pd.to_datetime(row['timestamp'])  # ensure correct type
-            conn.execute(text(insert_query), row)
+    elapsed = time.perf_counter() - start
+    print(f"[Backfill] {symbol.upper()} copied {len(rows)} rows ({inserted} new) "
+          f"in {elapsed:.2f}s | {len(rows) / elapsed:,.0f} rows/s")
+    return inserted
+
+# === Resume Points ===
+def get_resume_points(symbols, days_back=DAYS_BACK, interval=INTERVAL):
+    """Open time (ms) of the first candle to fetch per symbol."""
+    with engine.connect() as conn:
+        rows = conn.execute(text('''
+            SELECT symbol, MAX(timestamp) FROM market_data
+            WHERE symbol = ANY(:symbols)
+            GROUP BY symbol
+        '''), {'symbols': [s.lower() for s in symbols]}).fetchall()
+    latest = {symbol: ts for symbol, ts in rows}
+
+    default_start = datetime.now(timezone.utc) - timedelta(days=days_back)
+    points = {}
+    for symbol in symbols:
+        ts = latest.get(symbol.lower())
+        if ts is None:
+            points[symbol] = int(default_start.timestamp() * 1000)
+        else:
+            points[symbol] = int(ts.timestamp() * 1000) + INTERVAL_MS[interval]
+    return points
+
+def last_closed_open_ms(now_ms, interval=INTERVAL):
+    """Open time of the newest closed candle; the one containing now_ms is still forming."""
+    step = INTERVAL_MS[interval]
+    return now_ms // step * step - step
+
+# === Backfill ===
+def backfill_symbol(client, limiter, symbol, start_ms, end_ms, interval=INTERVAL):
+    fetched = 0
+    inserted = 0
+    pending = []
+    pending_rows = 0
+    for page in fetch_data(client, limiter, symbol, start_ms, end_ms, interval):
+        pending.append(page)
+        pending_rows += len(page)
+        fetched += len(page)
+        if pending_rows >= STORE_BATCH_ROWS:
+            inserted += store_to_db(pd.concat(pending, ignore_index=True), symbol)
+            pending, pending_rows = [], 0
+    if pending:
+        inserted += store_to_db(pd.concat(pending, ignore_index=True), symbol)
+    return fetched, inserted
 
-# === Main ===
-if __name__ == '__main__':
-    end_time = datetime.now(timezone.utc)
-    start_time = end_time - timedelta(days=DAYS_BACK)
 
-    all_data = pd.DataFrame()
-    print("[Backfill] Starting 7-day historical download...")
+def run_backfill(symbols, client_factory, days_back=DAYS_BACK, workers=MAX_WORKERS, interval=INTERVAL):
+    """Backfill `symbols` concurrently; `client_factory()` builds one client per worker thread."""
+    limiter = WeightRateLimiter(WEIGHT_LIMIT_PER_MINUTE)
+    local = threading.local()
 
-    for i in range(DAYS_BACK):
-        batch_start = start_time + timedelta(days=i)
-        batch_end = batch_start + timedelta(days=1)
-        df = fetch_data(SYMBOL, INTERVAL, batch_start, batch_end)
-        store_to_db(df)
-        all_data = pd.concat([all_data, df])
-        time.sleep(1.2)  # avoid Binance rate limits
+    def backfill_task(symbol):
+        if not hasattr(local, 'client'):
+            local.client = client_factory()
+        return backfill_symbol(local.client, limiter, symbol, start_points[symbol], end_ms, interval)
+
+    # Stop at the last closed candle: rows are never updated (ON CONFLICT DO NOTHING)
+    # and the next run resumes after MAX(timestamp), so a partial candle would stay
+    end_ms = last_closed_open_ms(int(datetime.now(timezone.utc).timestamp() * 1000), interval)
+    start_points = get_resume_points(symbols, days_back, interval)
+
+    start = time.perf_counter()
+    totals = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(backfill_task, symbol): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                fetched, inserted = future.result()
+                totals[symbol] = (fetched, inserted)
+                print(f"[Backfill] ✅ {symbol.upper()} fetched {fetched} | inserted {inserted}")
+            except Exception as e:
+                print(f"[Backfill Error] ❌ {symbol.upper()}: {e}")
+
+    elapsed = time.perf_counter() - start
+    fetched = sum(t[0] for t in totals.values())
+    inserted = sum(t[1] for t in totals.values())
+    print(f"[Backfill Complete] Inserted {inserted} of {fetched} rows into market_data "
+          f"in {elapsed:.1f}s ({fetched / elapsed if elapsed else 0:,.0f} rows/s, "
+          f"rate-limit wait {limiter.waited_seconds:.1f}s).")
+    return totals
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--days', type=int, default=DAYS_BACK)
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--fixture', help="serve klines from a recorded JSON fixture instead of Binance")
+    args = parser.parse_args()
 
-    print(f"[Backfill Complete] Inserted {len(all_data)} rows into market_data.")
+    ensure_schema(engine)
+    if args.fixture:
+        fixture = FixtureKlineClient.from_file(args.fixture)   # no response headers, safe to share
+        client_factory = lambda: fixture
+    else:
+        client_factory = create_client
+    print(f"[Backfill] Starting download for {', '.join(s.upper() for s in args.symbols)}...")
+    run_backfill(args.symbols, client_factory, days_back=args.days, workers=args.workers)
@@ -0,0 +1,182 @@
+# backtest_sweep.py
+"""
+Grid-search strategy, indicator and risk parameters with the vectorized
+backtester, fanned out over a process pool.
+
+The OHLCV history is loaded once and placed in a shared-memory block; every
+worker maps it as a NumPy view instead of receiving a pickled copy.
+Indicator frames are cached per worker by indicator parameters, so combos
+that only differ in thresholds or risk settings skip the recomputation.
+Each symbol is swept separately (indicators and PnL only make sense on
+one symbol's candles).
+Outputs:
+- Ranked table (by Sharpe) per symbol printed, all written to sweep_results.csv
+
+    python backtest_sweep.py --symbols btcusdt ethusdt --strategy rsi --workers 16
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+import backtester
+from config import SYMBOLS
+
+# === Parameter Grids ===
+# Keys map to: add_indicators(**INDICATOR_KEYS), compute_signals(**SIGNAL_KEYS)
+# and the risk gate in simulate_positions(risk=RISK_KEYS). Each strategy only
+# sweeps the keys its signals read, so no two combos repeat the same backtest.
+STRATEGY_GRIDS = {
+    'rsi': {
+        'rsi_buy_below': [30, 35, 40],
+        'rsi_sell_above': [60, 65, 70],
+    },
+    'ema': {
+        'ema_fast': [5, 9, 12],
+        'ema_slow': [21, 34],
+    },
+    'macd': {
+        'macd_fast': [8, 12],
+        'macd_slow': [21, 26],
+        'macd_signal': [5, 9],
+    },
+    # Bollinger reversion only fires with bb_use_prev=True (the live vote calls it
+    # without the previous row), so the band width is swept with it
+    'bb': {
+        'bb_use_prev': [True],
+        'bb_nbdev': [2.0, 2.5],
+    },
+}
+# 'all' takes the first strategy that fires (RSI first), and EMA Crossover has a
+# signal on every bar, so MACD and Bollinger never decide and EMA only fills in
+# RSI's gaps: sweeping their parameters mostly repeats the same backtest
+STRATEGY_GRIDS['all'] = STRATEGY_GRIDS['rsi']
+# Take profit is not swept: the risk gate only lets a SELL through, and any gain
+# above it is already above min_gain_pct, so it never changes a result
+RISK_GRID = {
+    'stop_loss_pct': [0.01, 0.03, 0.05],
+    'min_gain_pct': [0.001, 0.0025, 0.005],
+}
+INDICATOR_KEYS = ('ema_fast', 'ema_slow', 'macd_fast', 'macd_slow', 'macd_signal', 'bb_nbdev')
+SIGNAL_KEYS = ('rsi_buy_below', 'rsi_sell_above', 'bb_use_prev')
+RISK_KEYS = ('stop_loss_pct', 'take_profit_pct', 'min_gain_pct')
+
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
+# === Worker State ===
+_shm = None
+_frame = None
+_indicator_cache = {}
+
+
+def _attach(shm_name, n_rows):
+    # Map the parent's block; the parent owns (and unlinks) it
+    global _shm, _frame
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    timestamps = np.ndarray((n_rows,), dtype='int64', buffer=_shm.buf)
+    values = np.ndarray((n_rows, len(OHLCV)), dtype='float64', buffer=_shm.buf, offset=timestamps.nbytes)
+    _frame = pd.DataFrame(values, columns=OHLCV, copy=False,
+                          index=pd.to_datetime(timestamps, unit='ms', utc=True).rename('timestamp'))
+
+
+def _indicators(params):
+    key = tuple(params.get(k) for k in INDICATOR_KEYS)
+    if key not in _indicator_cache:
+        indicator_params = {k: params[k] for k in INDICATOR_KEYS if k in params}
+        df = _frame[OHLCV].copy()
+        _indicator_cache[key] = backtester.add_indicator_columns(df, **indicator_params).dropna()
+    return _indicator_cache[key]
+
+
+def run_combo(params):
+    df = _indicators(params)
+    signal_params = {k: params[k] for k in SIGNAL_KEYS if k in params}
+    risk = {**backtester.RISK_PARAMS, **{k: params[k] for k in RISK_KEYS if k in params}}
+    trades, equity = backtester.run_backtest_vectorized(df, params['strategy'], risk, **signal_params)
+    if len(equity) < 2:
+        return {**params, 'trades': 0, 'total_pnl': 0.0, 'sharpe': float('nan'), 'max_drawdown': 0.0}
+    return {**params, **backtester.compute_metrics(trades, equity)}
+
+
+# === Grid Expansion ===
+def strategy_grid(strategy):
+    return {**STRATEGY_GRIDS[strategy], **RISK_GRID}
+
+
+def expand_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _share_frame(df):
+    timestamps = (pd.to_datetime(df.index, utc=True) - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)
+    timestamps = np.asarray(timestamps, dtype='int64')
+    values = np.ascontiguousarray(df[OHLCV].to_numpy(dtype='float64'))
+
+    shm = shared_memory.SharedMemory(create=True, size=timestamps.nbytes + values.nbytes)
+    np.ndarray(timestamps.shape, dtype='int64', buffer=shm.buf)[:] = timestamps
+    np.ndarray(values.shape, dtype='float64', buffer=shm.buf, offset=timestamps.nbytes)[:] = values
+    return shm
+
+
+# === Sweep ===
+def run_sweep(df, grid=None, strategy='all', workers=None):
+    """df: one symbol's candles."""
+    if grid is None:
+        grid = strategy_grid(strategy)
+    combos = [{**p, 'strategy': strategy} for p in expand_grid(grid)]
+    # Combos sharing indicator parameters land next to each other, so each
+    # worker's cache is reused across its chunk
+    combos.sort(key=lambda p: tuple(p.get(k) for k in INDICATOR_KEYS))
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(combos) // (workers * 4))
+
+    shm = _share_frame(df)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, len(df))) as pool:
+            results = list(pool.map(run_combo, combos, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    ranked = pd.DataFrame(results).sort_values('sharpe', ascending=False, na_position='last')
+    return ranked.reset_index(drop=True)
+
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--strategy', default='all', choices=list(backtester.STRATEGIES) + ['all'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for symbol in args.symbols:
+        df = backtester.load_data(symbol)
+        print(f"[{symbol.upper()}] Loaded {len(df)} rows of historical data.")
+        if df.empty:
+            continue
+
+        start = time.perf_counter()
+        ranked = run_sweep(df, strategy=args.strategy, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"[Sweep] {symbol.upper()}: {len(ranked)} combinations in {elapsed:.1f}s "
+              f"on {args.workers or os.cpu_count()} workers\n")
+
+        print(ranked.head(args.top).to_string(index=False))
+        print()
+        results.append(ranked.assign(symbol=symbol.lower()))
+
+    if results:
+        pd.concat(results, ignore_index=True).to_csv("sweep_results.csv", index=False)
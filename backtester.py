@@ -1,6 +1,9 @@
 # backtester.py
 """
 Run backtest on historical market_data using your strategies.
+Two engines produce identical trades/equity:
+- run_backtest: row-by-row over df.iloc (reference)
+- run_backtest_vectorized: whole-column signal vectors + a loop over plain arrays
 Outputs:
 - PnL & trade log to backtest_results.csv
 - Summary metrics: Sharpe, drawdown
@@ -12,24 +15,23 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import os
 import sys
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from strategies.rsi_strategy import evaluate_rsi
-from strategies.ema_crossover import evaluate_ema_crossover
-from strategies.macd_strategy import evaluate_macd
-from strategies.bb_strategy import evaluate_bollinger
-
-# === DB CONFIG ===
-DB_PARAMS = {
-    'dbname': 'postgres',
-    'user': 'postgres.ahrkjfvcriprqucdfcvs',
-    'password': 'Hajara-2006#',
-    'host': 'aws-0-eu-west-2.pooler.supabase.com',
-    'port': '5432'
-}
-DB_URI = f"postgresql+psycopg2://{DB_PARAMS['user']}:{DB_PARAMS['password']}@{DB_PARAMS['host']}:{DB_PARAMS['port']}/{DB_PARAMS['dbname']}"
-engine = create_engine(DB_URI)
+from strategies.rsi_strategy import evaluate_rsi, evaluate_rsi_array
+from strategies.ema_crossover import evaluate_ema_crossover, evaluate_ema_crossover_array
+from strategies.macd_strategy import evaluate_macd, evaluate_macd_array
+from strategies.bb_strategy import evaluate_bollinger, evaluate_bollinger_array
+from backend.indicators.indicator_engine import add_indicators as add_indicator_columns
+from backend.db.database import get_engine
+from backend.data.ohlcv_store import OHLCVStore
+from backend.risk.risk_manager import STOP_LOSS_PCT, TAKE_PROFIT_PCT, MIN_EXIT_GAIN_PCT
+from config import SYMBOLS
+
+# === DB ===
+# The engine is created on first DB access (get_engine), so backtests over the
+# local store run without database settings
+store = OHLCVStore()    # local columnar copy of market_data, synced incrementally
 
 STRATEGIES = {
     'rsi': evaluate_rsi,
@@ -38,30 +40,60 @@ STRATEGIES = {
     'bb': evaluate_bollinger
 }
 
+# Array forms: (frame, params) -> signal vector (1 = BUY, -1 = SELL, 0 = none)
+STRATEGY_ARRAYS = {
+    'rsi': lambda df, p: evaluate_rsi_array(df['rsi'].to_numpy(), p['rsi_buy_below'], p['rsi_sell_above']),
+    'ema': lambda df, p: evaluate_ema_crossover_array(df['ema_fast'].to_numpy(), df['ema_slow'].to_numpy()),
+    'macd': lambda df, p: evaluate_macd_array(df['macd'].to_numpy(), df['macd_signal'].to_numpy()),
+    'bb': lambda df, p: evaluate_bollinger_array(df['close'].to_numpy(), df['bb_upper'].to_numpy(),
+                                                 df['bb_lower'].to_numpy(), p['bb_use_prev'])
+}
+SIGNAL_PARAMS = {
+    'rsi_buy_below': 40,
+    'rsi_sell_above': 60,
+    'bb_use_prev': False
+}
+
+# SELL gating that mirrors check_risk_limits; pass to the vectorized engine
+# as risk=RISK_PARAMS (None = plain signal-driven exits, like run_backtest)
+RISK_PARAMS = {
+    'stop_loss_pct': STOP_LOSS_PCT,
+    'take_profit_pct': TAKE_PROFIT_PCT,
+    'min_gain_pct': MIN_EXIT_GAIN_PCT
+}
+EXIT_SCAN_CHUNK = 256
+
 USE_STRATEGY = 'rsi'  # options: 'rsi', 'ema', 'macd', 'bb', 'all'
+VECTORIZED = True     # False = reference row-by-row loop
+USE_STORE = True      # False = pull the full history from Postgres every run
 TRADE_SIZE = 1
 STARTING_BALANCE = 1000
 
 # === Load historical market data ===
-def load_data():
-    with engine.connect() as conn:
-        df = pd.read_sql("SELECT * FROM market_data ORDER BY timestamp", conn)
+def load_data(symbol=None):
+    if USE_STORE:
+        return load_from_store(symbol)
+    with get_engine().connect() as conn:
+        if symbol:
+            df = pd.read_sql(text("SELECT * FROM market_data WHERE symbol = :symbol ORDER BY timestamp"),
+                             conn, params={'symbol': symbol.lower()})
+        else:
+            df = pd.read_sql("SELECT * FROM market_data ORDER BY timestamp", conn)
     df.set_index('timestamp', inplace=True)
     return df
 
+def load_from_store(symbol=None, start=None, end=None):
+    # Only candles newer than the local copy cross the network
+    symbols = [symbol.lower()] if symbol else SYMBOLS
+    store.try_sync(get_engine, symbols)
+    if symbol:
+        return store.load(symbol, start, end)
+    frames = [store.load(s, start, end).assign(symbol=s) for s in symbols]
+    return pd.concat(frames).sort_index(kind='stable')
+
 # === Feature Engineering ===
 def add_indicators(df):
-    import talib
-    df['rsi'] = talib.RSI(df['close'], timeperiod=14)
-    df['ema_fast'] = talib.EMA(df['close'], timeperiod=9)
-    df['ema_slow'] = talib.EMA(df['close'], timeperiod=21)
-    macd, macdsignal, _ = talib.MACD(df['close'], fastperiod=12, slowperiod=26, signalperiod=9)
-    df['macd'] = macd
-    df['macd_signal'] = macdsignal
-    upper, middle, lower = talib.BBANDS(df['close'], timeperiod=20)
-    df['bb_upper'] = upper
-    df['bb_lower'] = lower
-    return df.dropna()
+    return add_indicator_columns(df).dropna()
 
 # === Backtest Logic ===
 def run_backtest(df):
@@ -113,22 +145,124 @@ def run_backtest(df):
 
     return trades, equity
 
+# === Vectorized Backtest ===
+def compute_signals(df, strategy=None, **params):
+    strategy = strategy or USE_STRATEGY
+    params = {**SIGNAL_PARAMS, **params}
+    if strategy != 'all':
+        return STRATEGY_ARRAYS[strategy](df, params)
+
+    # 'all' = first strategy (in STRATEGIES order) that fires on the row
+    signals = np.zeros(len(df), dtype='int8')
+    for name in STRATEGIES:
+        s = STRATEGY_ARRAYS[name](df, params)
+        signals = np.where(signals != 0, signals, s)
+    return signals
+
+
+def _next_exit(sells, k, prices, entry_price, risk):
+    # Index into `sells` of the first SELL at or after k that the risk rules let through
+    if risk is None:
+        return k
+    while k < len(sells):
+        chunk = sells[k:k + EXIT_SCAN_CHUNK]
+        change = (prices[chunk] - entry_price) / entry_price
+        allowed = ((change <= -risk['stop_loss_pct'])
+                   | (change >= risk['take_profit_pct'])
+                   | (change >= risk['min_gain_pct']))
+        hits = np.flatnonzero(allowed)
+        if len(hits):
+            return k + int(hits[0])
+        k += len(chunk)
+    return k
+
+
+def simulate_positions(signals, prices, times, risk=None):
+    """
+    Long-only state machine over plain arrays: BUY opens when flat, SELL
+    closes when long. Instead of visiting every bar, jump straight to the
+    next BUY while flat and the next SELL while long, so the loop runs once
+    per trade; the equity curve is then filled in segment by segment.
+    With `risk`, SELLs are gated like check_risk_limits (stop loss / take
+    profit / minimum gain).
+    """
+    n = len(prices)
+    buys = np.flatnonzero(signals[1:] == 1) + 1
+    sells = np.flatnonzero(signals[1:] == -1) + 1
+
+    balance_path = np.empty(n, dtype='float64')
+    entry_path = np.full(n, np.nan)
+    trades = []
+    balance = STARTING_BALANCE
+    last = 1    # first bar whose balance is not yet filled in
+
+    while True:
+        k = np.searchsorted(buys, last)
+        if k == len(buys):
+            break
+        entry_idx = int(buys[k])
+        entry_price = prices[entry_idx]
+
+        k = _next_exit(sells, np.searchsorted(sells, entry_idx + 1), prices, entry_price, risk)
+        exit_idx = int(sells[k]) if k < len(sells) else n
+        balance_path[last:exit_idx] = balance
+        entry_path[entry_idx:exit_idx] = entry_price
+        if exit_idx == n:
+            last = n
+            break
+
+        price = prices[exit_idx]
+        pnl = price - entry_price
+        trades.append({
+            'entry_time': times[entry_idx],
+            'exit_time': times[exit_idx],
+            'entry_price': entry_price,
+            'exit_price': price,
+            'pnl': pnl * TRADE_SIZE
+        })
+        balance += pnl * TRADE_SIZE
+        last = exit_idx
+
+    balance_path[last:] = balance
+
+    in_position = ~np.isnan(entry_path[1:])
+    equity = np.where(in_position,
+                      balance_path[1:] + (prices[1:] - entry_path[1:]) * TRADE_SIZE,
+                      balance_path[1:])
+    return trades, equity.tolist()
+
+
+def run_backtest_vectorized(df, strategy=None, risk=None, **params):
+    signals = compute_signals(df, strategy, **params)
+    prices = df['close'].to_numpy(dtype='float64')
+    return simulate_positions(signals, prices, df.index, risk)
+
 # === Metrics ===
-def summarize(trades, equity):
+def compute_metrics(trades, equity):
     pnl = [t['pnl'] for t in trades]
     equity = np.array(equity)
     returns = np.diff(equity) / equity[:-1]
 
     sharpe = np.mean(returns) / (np.std(returns) + 1e-6) * np.sqrt(252 * 24 * 60)  # annualized for minute data
     drawdown = np.max(np.maximum.accumulate(equity) - equity)
+    return {
+        'trades': len(trades),
+        'total_pnl': float(sum(pnl)),
+        'sharpe': float(sharpe),
+        'max_drawdown': float(drawdown)
+    }
+
+
+def summarize(trades, equity):
+    metrics = compute_metrics(trades, equity)
 
     print(f"\nBacktest Summary:")
-    print(f"Trades: {len(trades)}")
-    print(f"Total PnL: {sum(pnl):.2f} USDT")
-    print(f"Sharpe Ratio: {sharpe:.2f}")
-    print(f"Max Drawdown: {drawdown:.2f}")
+    print(f"Trades: {metrics['trades']}")
+    print(f"Total PnL: {metrics['total_pnl']:.2f} USDT")
+    print(f"Sharpe Ratio: {metrics['sharpe']:.2f}")
+    print(f"Max Drawdown: {metrics['max_drawdown']:.2f}")
 
-    return pd.DataFrame(trades), equity
+    return pd.DataFrame(trades), np.array(equity)
 
 # === Save Results ===
 def save_results(trade_df, equity):
@@ -149,6 +283,6 @@ if __name__ == '__main__':
     df = add_indicators(df)
     print(f"Loaded {len(df)} rows of historical data.")
 
-    trades, equity = run_backtest(df)
+    trades, equity = run_backtest_vectorized(df) if VECTORIZED else run_backtest(df)
     trade_df, eq_curve = summarize(trades, equity)
     save_results(trade_df, eq_curve)
@@ -0,0 +1,66 @@
+# benchmarks/bench_inference.py
+"""
+Per-bar ML inference latency at 1, 5 and 50 symbols:
+- per-symbol: one DataFrame + scaler.transform + model.predict per symbol (old path)
+- matrix:     one predict_returns() call on the stacked (n, features) matrix
+- batcher:    n threads calling BatchPredictor.predict concurrently (live path)
+
+    python benchmarks/bench_inference.py   # run from the repo root (loads models/)
+"""
+
+import os
+import sys
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+warnings.filterwarnings('ignore')
+from backend.ml import ml_strategy
+from backend.ml.inference import BatchPredictor
+
+REPEATS = 200
+BATCH_SIZES = [1, 5, 50]
+
+
+def per_symbol(X):
+    for row in X:
+        compiled = ml_strategy.model_registry.current
+        features = pd.DataFrame([row], columns=ml_strategy.FEATURES)
+        compiled.model.predict(compiled.scaler.transform(features))
+
+
+def matrix(X):
+    ml_strategy.predict_returns(X)
+
+
+def batcher(predictor, X):
+    threads = [threading.Thread(target=predictor.predict, args=(row,)) for row in X]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def timed_ms(func, *args):
+    func(*args)     # warm up
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(*args)
+    return 1000 * (time.perf_counter() - start) / REPEATS
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    print(f"{'symbols':>7s} | {'per-symbol ms/bar':>17s} | {'matrix ms/bar':>13s} | {'batcher ms/bar':>14s} | per-symbol us (matrix)")
+    for n in BATCH_SIZES:
+        X = rng.normal(size=(n, len(ml_strategy.FEATURES))) * 10 + 50
+        predictor = BatchPredictor(ml_strategy.predict_returns, expected=n)
+        old = timed_ms(per_symbol, X)
+        new = timed_ms(matrix, X)
+        live = timed_ms(batcher, predictor, X)
+        predictor.stop()
+        print(f"{n:7d} | {old:17.3f} | {new:13.3f} | {live:14.3f} | {1000 * new / n:.1f}")
@@ -0,0 +1,58 @@
+# benchmarks/bench_ohlcv_store.py
+"""
+Load time of the local OHLCV store for N days of 1-minute candles across
+several symbols, against reading the same candles from CSV (the old
+models/market_data.csv route). Writes a throwaway store under a temp dir.
+
+    python benchmarks/bench_ohlcv_store.py --days 365 --symbols 5
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend.data.ohlcv_store import OHLCVStore
+from bench_backtest import synthetic_candles
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--symbols', type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="ohlcv-bench-")
+    try:
+        store = OHLCVStore(os.path.join(root, "store"))
+        symbols = [f"sym{i}usdt" for i in range(args.symbols)]
+        frames = {s: synthetic_candles(args.days, seed=i) for i, s in enumerate(symbols)}
+
+        _, write_s = timed(lambda: [store.write_frame(s, df) for s, df in frames.items()])
+        csv_path = os.path.join(root, "one_symbol.csv")
+        frames[symbols[0]].to_csv(csv_path)
+
+        loaded, load_s = timed(lambda: {s: store.load(s) for s in symbols})
+        _, csv_s = timed(lambda: pd.read_csv(csv_path, index_col='timestamp', parse_dates=True))
+
+        rows = sum(len(df) for df in loaded.values())
+        same = all(np.array_equal(loaded[s].to_numpy(), frames[s].to_numpy()) and loaded[s].index.equals(frames[s].index)
+                   for s in symbols)
+        print(f"{rows:,} candles ({args.symbols} symbols x {args.days} days) | identical: {same}")
+        print(f"store write (one-off):      {write_s:8.2f}s")
+        print(f"store load, all symbols:    {load_s:8.3f}s")
+        print(f"CSV load, one symbol:       {csv_s:8.3f}s")
+    finally:
+        shutil.rmtree(root)
@@ -0,0 +1,6 @@
+# config.py
+# Shared trading configuration, importable without side effects
+# (no DB connections or exchange clients are created here).
+
+SYMBOLS = ["btcusdt", "ethusdt", "bnbusdt", "solusdt", "xrpusdt"]
+INTERVAL = "1m"
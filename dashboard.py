@@ -3,105 +3,198 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objs as go
-import requests
-from sqlalchemy import create_engine
 from datetime import datetime
 import pytz
+from sqlalchemy import text
 from streamlit_autorefresh import st_autorefresh
 
+from backend.db.database import get_engine
+from backend.data.rollups import load_candles
+from backend.data.downsample import downsample_ohlc
+from backend.analytics.performance import SELECT_SUMMARY_SQL, SELECT_EQUITY_SQL
+
 # === CONFIG ===
-DB_USER = 'postgres.ahrkjfvcriprqucdfcvs'
-DB_PASS = 'Hajara-2006#'
-DB_HOST = 'aws-0-eu-west-2.pooler.supabase.com'
-DB_PORT = '5432'
-DB_NAME = 'postgres'
 STARTING_BALANCE = 50000
 SYMBOL_LIST = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT"]
+REFRESH_MS = 10_000
+HISTORY_OPTIONS = [500, 2000, 10_000, 50_000]   # candles kept per session
+MAX_RENDER_CANDLES = 600    # drawn candles; longer histories are OHLC-bucketed
+SIGNAL_ROWS = 100
+EQUITY_POINTS = 2000        # newest closed-trade equity points charted
+# Query results are cached per (symbol, interval, strategy, since) for all sessions
+# of this server process: each key hits the DB at most once per TTL. Sessions in
+# the same view share the same `since` (the newest candle / highest row id already
+# seen). Signals and trades are tracked by id, not timestamp: rows replayed from the
+# write-behind spill file arrive late with their original, older timestamps
+CACHE_TTL = REFRESH_MS / 1000
+
+SELECT_SIGNALS_SQL = text('''
+    SELECT id, timestamp, symbol, strategy, action, price, reason,
+           MAX(id) OVER () AS last_id
+    FROM strategy_signals
+    WHERE executed = TRUE
+      AND (CAST(:strategy AS TEXT) IS NULL OR strategy = :strategy)
+      AND (CAST(:symbol AS TEXT) IS NULL OR symbol = :symbol)
+      AND (CAST(:after_id AS INTEGER) IS NULL OR id > :after_id)
+    ORDER BY timestamp DESC
+    LIMIT :limit
+''')
+
+# ExecutionEngine writes trade symbols upper-case; one index range scan per symbol
+TRADE_TOTALS_SQL = text('''
+    SELECT COALESCE(SUM(net_pnl), 0) AS pnl, COUNT(net_pnl) AS closed, MAX(id) AS last_id FROM trades
+    WHERE (CAST(:symbol AS TEXT) IS NULL OR symbol = :symbol)
+      AND (CAST(:after_id AS INTEGER) IS NULL OR id > :after_id)
+''')
 
 # === STREAMLIT SETUP ===
 st.set_page_config(page_title="📊 Trading Bot Dashboard", layout="wide")
-st_autorefresh(interval=10_000, key="refresh")  # Refresh every 10 seconds
+st_autorefresh(interval=REFRESH_MS, key="refresh")  # Refresh every 10 seconds
 st.sidebar.header("⚙️ Controls")
 
 symbol = st.sidebar.selectbox("Symbol", SYMBOL_LIST, index=0)
 interval = st.sidebar.selectbox("Timeframe", ["1m", "5m", "15m", "1h", "4h", "1d"], index=0)
 strategy_filter = st.sidebar.selectbox("Strategy", ["All", "RSI", "EMA Crossover", "MACD", "Bollinger Bands", "ML Strategy"])
+history = st.sidebar.select_slider("History (candles)", HISTORY_OPTIONS, value=2000)
 
 # === DATABASE ===
-DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-engine = create_engine(DATABASE_URL)
+engine = get_engine()
 utc = pytz.UTC
 
 # === FUNCTIONS ===
-def load_market_data(symbol, interval="1m", limit=2000):
-    try:
-        url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}"
-        response = requests.get(url)
-        response.raise_for_status()
-        raw = response.json()
-
-        df = pd.DataFrame(raw, columns=[
-            'timestamp', 'open', 'high', 'low', 'close',
-            'volume', 'close_time', 'quote_asset_volume',
-            'num_trades', 'taker_buy_base', 'taker_buy_quote', 'ignore'
-        ])
-
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df = df.astype({'open': float, 'high': float, 'low': float, 'close': float})
-        return df[['timestamp', 'open', 'high', 'low', 'close']]
+# Cached loaders raise instead of calling st.error, so failures are not cached
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def query_market_data(symbol, interval="1m", limit=2000, after=None):
+    # Own candles only: 1m from market_data, higher timeframes from the rollups the bot refreshes
+    return load_candles(engine, symbol, interval, limit, after)[['timestamp', 'open', 'high', 'low', 'close']]
 
+def load_market_data(symbol, interval="1m", limit=2000, after=None):
+    try:
+        return query_market_data(symbol, interval, limit, after)
     except Exception as e:
-        st.error(f"❌ Binance API error: {e}")
+        st.error(f"❌ Failed to load candles: {e}")
         return pd.DataFrame()
 
-def load_signals(strategy=None, symbol=None):
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def query_signals(strategy=None, symbol=None, limit=SIGNAL_ROWS, after_id=None):
+    params = {
+        'strategy': strategy if strategy and strategy != "All" else None,
+        'symbol': symbol.lower() if symbol else None,
+        'limit': limit,
+        'after_id': after_id,
+    }
+    df = pd.read_sql(SELECT_SIGNALS_SQL, engine, params=params)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    return df
+
+def load_signals(strategy=None, symbol=None, after_id=None):
+    """Newest executed signals with id > after_id; last_id is the highest matching id."""
     try:
-        query = "SELECT * FROM strategy_signals WHERE executed = TRUE"
-        filters = []
-
-        if strategy and strategy != "All":
-            filters.append(f"strategy = '{strategy}'")
-        if symbol:
-            filters.append(f"symbol = '{symbol.lower()}'")
-
-        if filters:
-            query += " AND " + " AND ".join(filters)
-
-        query += " ORDER BY timestamp DESC LIMIT 100"
-        df = pd.read_sql(query, engine)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
-        return df
-
+        return query_signals(strategy, symbol, after_id=after_id)
     except Exception as e:
         st.error(f"❌ Failed to load signals: {e}")
         return pd.DataFrame()
 
-def calculate_pnl(symbol=None):
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def query_trade_totals(symbol=None, after_id=None):
+    with engine.connect() as conn:
+        pnl, closed, last_id = conn.execute(TRADE_TOTALS_SQL, {
+            'symbol': symbol.upper() if symbol else None, 'after_id': after_id
+        }).one()
+    return float(pnl), int(closed), last_id
+
+def load_trade_totals(symbol=None, after_id=None):
+    """(net PnL, closed trades, highest trade id) of trades with id > after_id."""
     try:
-        query = "SELECT * FROM trades"
-        if symbol:
-            query += f" WHERE LOWER(symbol) = '{symbol.lower()}'"
-        query += " ORDER BY timestamp DESC"
+        return query_trade_totals(symbol, after_id)
+    except Exception as e:
+        st.error(f"❌ Failed to calculate PnL: {e}")
+        return 0.0, 0, None
 
-        df = pd.read_sql(query, engine)
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def query_performance():
+    # One small table the bot keeps current, instead of aggregating `trades`
+    return pd.read_sql(SELECT_SUMMARY_SQL, engine)
 
-        if df.empty or 'net_pnl' not in df.columns:
-            return STARTING_BALANCE, 0.0, 0
+def load_performance():
+    try:
+        return query_performance()
+    except Exception as e:
+        st.error(f"❌ Failed to load performance summary: {e}")
+        return pd.DataFrame()
 
-        pnl_total = df['net_pnl'].fillna(0).sum()
-        trade_count = df[df['net_pnl'].notnull()].shape[0]
-        balance = STARTING_BALANCE + pnl_total
-        return balance, pnl_total, trade_count
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def query_equity_curve(limit=EQUITY_POINTS):
+    df = pd.read_sql(SELECT_EQUITY_SQL, engine, params={'limit': limit})
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    return df.iloc[::-1].reset_index(drop=True)
 
+def load_equity_curve():
+    try:
+        return query_equity_curve()
     except Exception as e:
-        st.error(f"❌ Failed to calculate PnL: {e}")
-        return STARTING_BALANCE, 0, 0
+        st.error(f"❌ Failed to load equity curve: {e}")
+        return pd.DataFrame()
 
+# === Per-Session View (incremental refresh) ===
+def newest_signal_id(signals):
+    return int(signals['last_id'].iloc[0]) if not signals.empty else None
+
+def refresh_view(symbol, interval, strategy, history):
+    """
+    Candles, signals and trade totals for this session. The first run of a
+    view loads them in full; later refreshes fetch only candles at or after
+    the newest one shown (the last candle may still be forming) and signals
+    and trades with a higher id than any seen, and merge them in.
+    """
+    key = (symbol, interval, strategy, history)
+    view = st.session_state.get('view')
+    if view is None or view['key'] != key:
+        pnl, closed, last_trade_id = load_trade_totals(symbol)
+        signals = load_signals(strategy, symbol)
+        view = {
+            'key': key,
+            'candles': load_market_data(symbol, interval, history),
+            'signals': signals,
+            'last_signal_id': newest_signal_id(signals),
+            'pnl': pnl, 'trades': closed, 'last_trade_id': last_trade_id,
+            'figure': None,
+        }
+        st.session_state['view'] = view
+        return view
+
+    candles = view['candles']
+    if candles.empty:
+        view['candles'] = load_market_data(symbol, interval, history)
+    else:
+        new = load_market_data(symbol, interval, history, after=candles['timestamp'].iloc[-1])
+        if not new.empty:
+            kept = candles[candles['timestamp'] < new['timestamp'].iloc[0]]
+            view['candles'] = pd.concat([kept, new], ignore_index=True).tail(history).reset_index(drop=True)
+
+    new = load_signals(strategy, symbol, after_id=view['last_signal_id'])
+    if not new.empty:
+        # Late (spilled) rows may sort anywhere by timestamp
+        merged = pd.concat([new, view['signals']], ignore_index=True).drop_duplicates('id')
+        view['signals'] = merged.sort_values('timestamp', ascending=False).head(SIGNAL_ROWS).reset_index(drop=True)
+        view['last_signal_id'] = newest_signal_id(new)
+
+    pnl, closed, last_trade_id = load_trade_totals(symbol, after_id=view['last_trade_id'])
+    if last_trade_id is not None:
+        view['pnl'] += pnl
+        view['trades'] += closed
+        view['last_trade_id'] = last_trade_id
+    return view
+
+
+
+def signal_markers(signals, action):
+    if signals.empty:
+        return [], []
+    rows = signals[signals['action'].str.lower() == action]
+    return rows['timestamp'], rows['price']
 
 def plot_candlestick(df, signals):
-    if df.empty:
-        return go.Figure()
-
     fig = go.Figure()
 
     # Candlesticks
@@ -116,28 +209,27 @@ def plot_candlestick(df, signals):
         decreasing_line_color='red'
     ))
 
-    # Signals
-    if not signals.empty:
-        buy = signals[signals['action'].str.lower() == 'buy']
-        sell = signals[signals['action'].str.lower() == 'sell']
-
-        fig.add_trace(go.Scatter(
-            x=buy['timestamp'], y=buy['price'],
-            mode='markers+text',
-            name='Buy Signal',
-            marker=dict(color='green', size=10, symbol='triangle-up'),
-            text=['BUY'] * len(buy),
-            textposition="top center"
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=sell['timestamp'], y=sell['price'],
-            mode='markers+text',
-            name='Sell Signal',
-            marker=dict(color='red', size=10, symbol='triangle-down'),
-            text=['SELL'] * len(sell),
-            textposition="bottom center"
-        ))
+    # Signals (always present, possibly empty, so refreshes can update them in place)
+    buy_x, buy_y = signal_markers(signals, 'buy')
+    sell_x, sell_y = signal_markers(signals, 'sell')
+
+    fig.add_trace(go.Scatter(
+        x=buy_x, y=buy_y,
+        mode='markers+text',
+        name='Buy Signal',
+        marker=dict(color='green', size=10, symbol='triangle-up'),
+        text=['BUY'] * len(buy_x),
+        textposition="top center"
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=sell_x, y=sell_y,
+        mode='markers+text',
+        name='Sell Signal',
+        marker=dict(color='red', size=10, symbol='triangle-down'),
+        text=['SELL'] * len(sell_x),
+        textposition="bottom center"
+    ))
 
     fig.update_layout(
         template="plotly_dark",
@@ -148,25 +240,82 @@ def plot_candlestick(df, signals):
         hovermode="x unified",
         height=600,
         margin=dict(l=10, r=10, t=50, b=20),
-        legend=dict(orientation="h", y=1.02, x=1, xanchor="right", yanchor="bottom")
+        legend=dict(orientation="h", y=1.02, x=1, xanchor="right", yanchor="bottom"),
+        uirevision=f"{symbol}-{interval}"   # keep the user's zoom/pan across refreshes
     )
 
     return fig
 
+def plot_equity(df):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df['timestamp'], y=df['equity'], mode='lines', name='Equity',
+                             line=dict(color='lime')))
+    fig.add_trace(go.Scatter(x=df['timestamp'], y=df['equity'] + df['drawdown'], mode='lines',
+                             name='Peak', line=dict(color='gray', dash='dot')))
+    fig.update_layout(
+        template="plotly_dark",
+        title="Equity Curve (closed trades)",
+        xaxis_title="Time",
+        yaxis_title="Equity (USDT)",
+        height=350,
+        margin=dict(l=10, r=10, t=50, b=20),
+        legend=dict(orientation="h", y=1.02, x=1, xanchor="right", yanchor="bottom"),
+        uirevision="equity"
+    )
+    return fig
+
+def update_figure(fig, df, signals):
+    """Swap new data into the session's existing figure instead of rebuilding it."""
+    buy_x, buy_y = signal_markers(signals, 'buy')
+    sell_x, sell_y = signal_markers(signals, 'sell')
+    with fig.batch_update():
+        fig.data[0].update(x=df['timestamp'], open=df['open'], high=df['high'], low=df['low'], close=df['close'])
+        fig.data[1].update(x=buy_x, y=buy_y, text=['BUY'] * len(buy_x))
+        fig.data[2].update(x=sell_x, y=sell_y, text=['SELL'] * len(sell_x))
+    return fig
+
 # === DATA LOADING ===
-market_df = load_market_data(symbol, interval)
-signals_df = load_signals(strategy_filter, symbol)
-balance, pnl, trades = calculate_pnl(symbol)
+view = refresh_view(symbol, interval, strategy_filter, history)
+chart_df = downsample_ohlc(view['candles'], MAX_RENDER_CANDLES) if not view['candles'].empty else view['candles']
+signals_df = view['signals']
+if chart_df.empty:
+    view['figure'] = go.Figure()
+elif view['figure'] is None or not view['figure'].data:
+    view['figure'] = plot_candlestick(chart_df, signals_df)
+else:
+    view['figure'] = update_figure(view['figure'], chart_df, signals_df)
+pnl, trades = view['pnl'], view['trades']
+balance = STARTING_BALANCE + pnl
+performance_df = load_performance()
+equity_df = load_equity_curve()
 
 # === DISPLAY ===
 st.subheader("📈 Price Chart & Executed Signals")
-st.plotly_chart(plot_candlestick(market_df, signals_df), use_container_width=True)
+st.plotly_chart(view['figure'], use_container_width=True)
 
 col1, col2, col3 = st.columns(3)
 col1.metric("💰 Balance", f"${balance:,.2f}")
 col2.metric("📈 Net PnL", f"${pnl:,.2f}")
 col3.metric("📊 Trades", f"{trades}")
 
+st.subheader("🏁 Live Performance (bot session)")
+portfolio = performance_df[performance_df['scope'] == 'portfolio'] if not performance_df.empty else performance_df
+if not portfolio.empty:
+    p = portfolio.iloc[0]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("💼 Equity", f"${p['equity']:,.2f}", f"{p['net_pnl']:+,.2f}")
+    col2.metric("📉 Max Drawdown", f"${p['max_drawdown']:,.2f}")
+    col3.metric("🎯 Win Rate", f"{p['win_rate']:.1%}" if pd.notna(p['win_rate']) else "n/a")
+    col4.metric("⚖️ Rolling Sharpe", f"{p['rolling_sharpe']:.2f}" if pd.notna(p['rolling_sharpe']) else "n/a")
+    st.caption(f"Since {p['since']} · updated {p['updated_at']}")
+    if not equity_df.empty:
+        st.plotly_chart(plot_equity(equity_df), use_container_width=True)
+    attribution = performance_df[performance_df['scope'] != 'portfolio']
+    st.dataframe(attribution[['scope', 'name', 'trades', 'win_rate', 'net_pnl', 'fees', 'max_drawdown', 'rolling_sharpe']],
+                 use_container_width=True, hide_index=True)
+else:
+    st.info("No performance snapshot yet.")
+
 st.subheader("📋 Executed Strategy Signals")
 if not signals_df.empty:
     st.dataframe(signals_df[['timestamp', 'strategy', 'action', 'price', 'reason']], use_container_width=True)
@@ -0,0 +1,158 @@
+# portfolio_backtest.py
+"""
+Multi-symbol backtest through the live execution path.
+
+Every symbol is replayed in timestamp order into one real ExecutionEngine
+(FEE_RATE, POSITION_RISK sizing, check_risk_limits / register_trade) running
+on a SimulatedClock set to each candle's close time, with no DB writes and
+its own daily risk log. Votes use the array form of the live
+evaluate_all_strategies rules (ML included, one batched prediction per
+symbol), and only candles that can change state reach the engine: BUY votes
+while flat, and SELL votes while long whose price move can pass the
+stop-loss / take-profit / minimum-gain gate. A heap merges the symbols'
+next such candles, so cross-symbol ordering (shared balance, sizing) is
+exactly as if every candle had been replayed.
+Outputs:
+- Portfolio summary and per-symbol breakdown, trade log to portfolio_results.csv
+
+    python portfolio_backtest.py --days 90
+"""
+
+import argparse
+import heapq
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+import backtester
+from backend.execution.clock import SimulatedClock
+from backend.execution.execution_engine import ExecutionEngine
+from backend.execution.strategy_voting import strategy_vote_arrays, vote_array, vote_signal
+from backend.ml.ml_strategy import FEATURES, predict_returns
+from config import SYMBOLS
+
+STARTING_BALANCE = 50000    # same as the live bot
+INTERVAL_MS = 60_000
+
+
+# === Per-Symbol Votes ===
+def prepare_symbol(df, use_ml=True):
+    """Indicators, per-strategy signal vectors and the cumulative vote for one symbol's candles."""
+    df = backtester.add_indicators(df)
+    predictions = None
+    if use_ml and len(df):
+        predictions = predict_returns(df[FEATURES].to_numpy(dtype='float64'))
+    arrays = strategy_vote_arrays(df, predictions)
+    votes = vote_array(arrays)
+    open_ms = np.asarray((df.index - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1), dtype='int64')
+    return {
+        'times': open_ms + INTERVAL_MS,     # the live bot acts when the candle closes
+        'prices': df['close'].to_numpy(dtype='float64'),
+        'arrays': arrays,
+        'votes': votes,
+        'buys': np.flatnonzero(votes == 1),
+        'sells': np.flatnonzero(votes == -1),
+    }
+
+
+def _next_event(execution, symbol, s, cursor):
+    # Next bar >= cursor whose vote could change this symbol's position
+    position = execution.positions.get(symbol.upper())
+    if position is None:
+        k = np.searchsorted(s['buys'], cursor)
+        return int(s['buys'][k]) if k < len(s['buys']) else None
+    k = backtester._next_exit(s['sells'], np.searchsorted(s['sells'], cursor), s['prices'],
+                              position['price'], backtester.RISK_PARAMS)
+    return int(s['sells'][k]) if k < len(s['sells']) else None
+
+
+# === Replay ===
+def run_portfolio_backtest(frames, starting_balance=STARTING_BALANCE, use_ml=True):
+    """frames: {symbol: OHLCV frame indexed by UTC open time}. Returns (engine, prepared symbols, engine calls)."""
+    clock = SimulatedClock()
+    execution = ExecutionEngine(starting_balance, clock=clock, verbose=False, isolated=True)
+    symbols = {symbol: prepare_symbol(df, use_ml) for symbol, df in frames.items()}
+
+    heap = []
+
+    def schedule(order, symbol, cursor):
+        i = _next_event(execution, symbol, symbols[symbol], cursor)
+        if i is not None:
+            heapq.heappush(heap, (int(symbols[symbol]['times'][i]), order, symbol, i))
+
+    for order, symbol in enumerate(symbols):
+        schedule(order, symbol, 0)
+
+    calls = 0
+    while heap:
+        close_ms, order, symbol, i = heapq.heappop(heap)
+        s = symbols[symbol]
+        clock.set_ms(close_ms)
+        execution.execute_paper_trade(vote_signal(s['arrays'], i, s['votes'][i]), float(s['prices'][i]), symbol)
+        calls += 1
+        schedule(order, symbol, i + 1)
+
+    return execution, symbols, calls
+
+
+def realized_equity(trades, timeline_ms, starting_balance=STARTING_BALANCE):
+    """Balance after every closed trade, sampled at each candle close on the merged timeline."""
+    if not trades:
+        return np.full(len(timeline_ms), float(starting_balance))
+    exits = np.array([pd.Timestamp(t['exit_time']).value // 1_000_000 for t in trades], dtype='int64')
+    pnl = np.array([t['pnl'] for t in trades], dtype='float64')
+    order = np.argsort(exits, kind='stable')
+    cumulative = np.r_[0.0, np.cumsum(pnl[order])]
+    return starting_balance + cumulative[np.searchsorted(exits[order], timeline_ms, 'right')]
+
+
+def summarize_portfolio(execution, symbols, starting_balance=STARTING_BALANCE):
+    trades = execution.get_pnl_log()
+    timeline = np.unique(np.concatenate([s['times'] for s in symbols.values()])) if symbols else np.array([])
+    equity = realized_equity(trades, timeline, starting_balance)
+    metrics = backtester.compute_metrics(trades, equity) if len(equity) > 1 else {}
+
+    trade_df = pd.DataFrame(trades)
+    print(f"\nPortfolio Backtest Summary ({len(symbols)} symbols, {len(timeline)} candle closes):")
+    print(f"Trades: {len(trades)} | Open at end: {len(execution.positions)}")
+    if trades:
+        print(f"Net PnL: {trade_df['pnl'].sum():.2f} USDT | Fees: {trade_df['fees'].sum():.2f} | "
+              f"Win rate: {(trade_df['pnl'] > 0).mean():.1%}")
+    print(f"Final Balance: {execution.get_balance():.2f}")
+    if metrics:
+        print(f"Sharpe Ratio: {metrics['sharpe']:.2f} | Max Drawdown: {metrics['max_drawdown']:.2f}")
+
+    if trades:
+        by_symbol = trade_df.groupby('symbol').agg(trades=('pnl', 'size'), net_pnl=('pnl', 'sum'),
+                                                   fees=('fees', 'sum'), win_rate=('pnl', lambda p: (p > 0).mean()))
+        print(by_symbol.to_string())
+    return trade_df, equity
+
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--days', type=int, default=None, help="only the most recent N days")
+    parser.add_argument('--start', type=pd.Timestamp, default=None)
+    parser.add_argument('--end', type=pd.Timestamp, default=None)
+    parser.add_argument('--balance', type=float, default=STARTING_BALANCE)
+    parser.add_argument('--no-ml', action='store_true', help="leave the ML strategy out of the vote")
+    args = parser.parse_args()
+
+    start = args.start
+    if args.days:
+        start = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=args.days)
+    frames = {symbol.lower(): backtester.load_from_store(symbol, start, args.end) for symbol in args.symbols}
+    print(f"Loaded {sum(len(df) for df in frames.values())} candles for {len(frames)} symbols.")
+
+    began = time.perf_counter()
+    execution, symbols, calls = run_portfolio_backtest(frames, args.balance, use_ml=not args.no_ml)
+    print(f"[Portfolio] Replayed in {time.perf_counter() - began:.2f}s ({calls} engine calls)")
+
+    trade_df, equity = summarize_portfolio(execution, symbols, args.balance)
+    trade_df.to_csv("portfolio_results.csv", index=False)
@@ -0,0 +1,107 @@
+# replay_bot.py
+"""
+Replays recorded kline messages through the live bot's callback path
+(handle_socket_message -> streaming indicators -> strategy vote -> ML batch
+-> ExecutionEngine) with no exchange connection, and reports throughput and
+callback-to-execution latency.
+
+Messages come from a JSONL recording (RECORD_KLINES=klines.jsonl on the live
+bot) or from stored candles (synced from market_data). The bot runs on a
+SimulatedClock at market time with a fresh isolated ExecutionEngine and, by
+default, writes nothing to the DB.
+
+    python replay_bot.py --file klines.jsonl
+    python replay_bot.py --days 3 --speed 600       # 10 minutes of market per second
+    python replay_bot.py --days 1 --save klines.jsonl
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+import scalping_bot_framework as bot
+from backend.data.kline_replay import ReplaySocketManager, read_messages, store_messages, write_messages
+from backend.data.ohlcv_store import OHLCVStore
+from backend.db.schema import ensure_schema
+from backend.execution.clock import SimulatedClock
+from backend.ml.ml_strategy import batch_predictor
+from config import SYMBOLS, INTERVAL
+
+
+def print_report(summary, execution):
+    print(f"\n[Replay] {summary['delivered']} candles in {summary['wall_seconds']:.2f}s "
+          f"({summary['candles_per_second']:.0f} candles/s) | evaluated: {summary['evaluated']} | "
+          f"skipped (unknown symbol): {summary['skipped']}")
+    if summary['evaluated']:
+        print(f"[Replay] callback -> execution latency p50 {summary['p50_ms']:.2f}ms | p90 {summary['p90_ms']:.2f}ms | "
+              f"p99 {summary['p99_ms']:.2f}ms | max {summary['max_ms']:.2f}ms")
+    trades = execution.get_pnl_log()
+    print(f"[Replay] trades closed: {len(trades)} | open: {len(execution.positions)} | "
+          f"net PnL: {sum(t['pnl'] for t in trades):.2f} | balance: {execution.get_balance():.2f}")
+
+
+# === Main ===
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file', help="JSONL of recorded kline messages (default: stored candles)")
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--days', type=int, default=1, help="stored candles: the most recent N days")
+    parser.add_argument('--start', type=pd.Timestamp, default=None)
+    parser.add_argument('--end', type=pd.Timestamp, default=None)
+    parser.add_argument('--speed', type=float, default=None, help="N x real time (default: max speed)")
+    parser.add_argument('--no-bar-sync', action='store_true',
+                        help="don't wait for a bar's evaluations before sending the next bar")
+    parser.add_argument('--persist', action='store_true', help="write candles, signals, trades and performance to the DB")
+    parser.add_argument('--verbose', action='store_true', help="keep the bot's per-candle logging")
+    parser.add_argument('--save', help="write the replayed messages to this JSONL file and exit")
+    args = parser.parse_args()
+
+    symbols = [s.lower() for s in args.symbols if s.lower() in bot.candle_buffers]
+    if args.file:
+        messages = read_messages(args.file)
+    else:
+        store = OHLCVStore()
+        store.try_sync(bot.engine, symbols)
+        start = args.start
+        if start is None and args.end is None:
+            start = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=args.days)
+        messages = store_messages(store, symbols, start, args.end, INTERVAL)
+
+    if args.save:
+        print(f"[Replay] ✅ Saved {write_messages(args.save, messages)} messages to {args.save}")
+        sys.exit(0)
+
+    clock = SimulatedClock()
+    bot.use_replay(clock, persist=args.persist, log_candles=args.verbose)
+    if args.persist:
+        ensure_schema(bot.engine)
+        bot.restore_performance()   # replayed trades extend the stored performance record
+        bot.signal_writer.start()
+        bot.trade_writer.start()
+        bot.equity_writer.start()
+
+    manager = ReplaySocketManager(messages, speed=args.speed, clock=clock, bar_sync=not args.no_bar_sync)
+    manager.start()
+    for symbol in symbols:
+        manager.start_kline_socket(callback=bot.handle_socket_message(symbol), symbol=symbol, interval=INTERVAL)
+
+    try:
+        stats = manager.run()
+    except KeyboardInterrupt:
+        manager.stop()
+        stats = manager.stats
+    finally:
+        bot.evaluation_pool.shutdown(wait=True)
+        batch_predictor.stop()
+        if args.persist:
+            bot.signal_writer.stop()
+            bot.trade_writer.stop()
+            bot.equity_writer.stop()
+            bot.save_performance_job()
+
+    print_report(stats.summary(), bot.execution_engine)
+    for line in bot.stage_latency.summary_lines():
+        print(line)
@@ -1,59 +1,97 @@
-import os, sys, time
-from datetime import datetime, timezone
+import os, sys, time, threading, asyncio, signal, logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
 import pandas as pd
-import talib
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy import create_engine, text
-from binance import ThreadedWebsocketManager
 
 # === Path Fixes ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 # === Local Imports ===
-from strategies.rsi_strategy import evaluate_rsi
-from strategies.ema_crossover import evaluate_ema_crossover
-from strategies.macd_strategy import evaluate_macd
-from strategies.bb_strategy import evaluate_bollinger
-from backend.ml.ml_strategy import evaluate_ml_strategy
-from backend.ml.lgbm_model_trainer import train_lightgbm
+from backend.execution.strategy_voting import evaluate_all_strategies, StrategyExecutor, STRATEGY_FUNCTIONS
+from backend.ml.ml_strategy import batch_predictor, model_registry, warm_up as warm_up_model
+from backend.ml.retrain_worker import RetrainWorker
 from backend.execution.execution_engine import ExecutionEngine
+from backend.execution.clock import system_clock
+from backend.analytics.performance import PerformanceTracker, INSERT_EQUITY_SQL
+from backend.db.write_behind import WriteBehindWriter
+from backend.db.schema import ensure_schema
+from backend.db.database import get_engine, pool_stats
+from backend.db.statements import INSERT_MARKET_DATA_SQL, SELECT_RECENT_CANDLES_SQL, INSERT_SIGNAL_SQL, INSERT_TRADE_SQL
+from backend.data.candle_buffer import CandleBuffer, OHLCV_COLUMNS
+from backend.indicators.indicator_engine import IndicatorEngine, FEATURE_COLUMNS
+from backend.data.gaps import GapFiller
+from backend.data.rollups import refresh_rollups, invalidate_rollups
+from backend.data.kline_replay import KlineRecorder
+from backend.gateway.market_gateway import MarketGateway, STREAM_URL
+from backend.monitoring.latency import LatencyRecorder, MetricsServer
+from backend.monitoring.logs import get_logger, log_event
+from backend.data.rate_limiter import WeightRateLimiter
+from config import SYMBOLS, INTERVAL
+import backfill
 
 # === CONFIG ===
-DB_PARAMS = {
-    'dbname': 'postgres',
-    'user': 'postgres.ahrkjfvcriprqucdfcvs',
-    'password': 'Hajara-2006#',
-    'host': 'aws-0-eu-west-2.pooler.supabase.com',
-    'port': '5432'
-}
-SYMBOLS = ["btcusdt", "ethusdt", "bnbusdt", "solusdt", "xrpusdt"]
-INTERVAL = "1m"
+BUFFER_SIZE = 100       # candles kept in memory per symbol
+WARMUP_CANDLES = 500    # history replayed through the indicators at startup
+GAP_SCAN_DAYS = 1       # stored history checked for missing candles at startup
+SPILL_DIR = "spill"     # write-behind overflow when the DB is slow or down
 STARTING_BALANCE = 50000
+RECORD_KLINES = os.getenv("RECORD_KLINES")     # JSONL path: keep the raw stream for replay_bot.py
+MARKET_STREAM_URL = os.getenv("MARKET_STREAM_URL", STREAM_URL)   # ws://127.0.0.1:8765 = backend/gateway/local_stream.py
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # > 0: Prometheus text at http://127.0.0.1:<port>/metrics
+RETRAIN_WINDOW = 5000   # most recent candles per symbol used by the nightly retrain
 lstm_active = False
 
+# Replay mode swaps these (see use_replay / replay_bot.py)
+clock = system_clock    # timestamps for signals and trades
+persist_data = True     # False = candles and signals are not written to the DB
+verbose = True          # per-candle strategy logging
+
 # === DB Setup ===
-DB_URI = f"postgresql+psycopg2://{DB_PARAMS['user']}:{DB_PARAMS['password']}@{DB_PARAMS['host']}:{DB_PARAMS['port']}/{DB_PARAMS['dbname']}"
-engine = create_engine(DB_URI)
+engine = get_engine()
+
+# === Hot-Path Latency & Logging ===
+# Stages per symbol: store, features, queue (evaluation pool wait), vote,
+# strategy.<name>, risk, execution, db_log, and total (callback -> done)
+stage_latency = LatencyRecorder()
+log = get_logger("bot")
+
+# === Write-Behind Writers (signals & trades never block the callback) ===
+signal_writer = WriteBehindWriter(engine, INSERT_SIGNAL_SQL, "strategy_signals",
+                                  spill_path=os.path.join(SPILL_DIR, "strategy_signals.jsonl"))
+trade_writer = WriteBehindWriter(engine, INSERT_TRADE_SQL, "trades",
+                                 spill_path=os.path.join(SPILL_DIR, "trades.jsonl"))
+equity_writer = WriteBehindWriter(engine, INSERT_EQUITY_SQL, "equity_curve",
+                                  spill_path=os.path.join(SPILL_DIR, "equity_curve.jsonl"))
+
+# === Live Performance (equity, drawdown, rolling Sharpe, attribution) ===
+performance = PerformanceTracker(STARTING_BALANCE, clock, writer=equity_writer)
 
 # === Execution Engine ===
-execution_engine = ExecutionEngine(starting_balance=STARTING_BALANCE, engine=engine)
+execution_engine = ExecutionEngine(starting_balance=STARTING_BALANCE, engine=engine, writer=trade_writer, clock=clock,
+                                   latency=stage_latency, on_trade_closed=performance.on_trade_closed)
+
+# === In-Memory Candle Buffers & Streaming Indicators ===
+candle_buffers = {symbol: CandleBuffer(BUFFER_SIZE, OHLCV_COLUMNS + tuple(FEATURE_COLUMNS)) for symbol in SYMBOLS}
+indicator_engines = {symbol: IndicatorEngine() for symbol in SYMBOLS}
+symbol_locks = {symbol: threading.Lock() for symbol in SYMBOLS}
+gap_filler = None
+gateway = None
+
+# Strategy evaluation runs off the websocket thread, one worker per symbol,
+# so symbols closing in the same bar are evaluated (and ML-batched) together
+evaluation_pool = ThreadPoolExecutor(max_workers=len(SYMBOLS), thread_name_prefix="evaluate")
+# Each vote fans its strategies out on a shared pool with per-strategy deadlines;
+# a strategy that misses its deadline abstains (counted as strategy.<name>.timeout).
+# None = strategies run in turn without deadlines (replay)
+strategy_executor = StrategyExecutor(workers=len(SYMBOLS) * len(STRATEGY_FUNCTIONS), latency=stage_latency)
 
 # === Store OHLCV ===
 def store_to_db(symbol, candle):
+    if not persist_data:
+        return
     with engine.begin() as conn:
-        conn.execute(text(f'''
-            CREATE TABLE IF NOT EXISTS market_data (
-                symbol TEXT NOT NULL,
-                timestamp TIMESTAMPTZ NOT NULL,
-                open FLOAT, high FLOAT, low FLOAT, close FLOAT, volume FLOAT,
-                PRIMARY KEY (symbol, timestamp)
-            )
-        '''))
-        conn.execute(text(f'''
-            INSERT INTO market_data (symbol, timestamp, open, high, low, close, volume)
-            VALUES (:symbol, :timestamp, :open, :high, :low, :close, :volume)
-            ON CONFLICT (symbol, timestamp) DO NOTHING
-        '''), {
+        conn.execute(INSERT_MARKET_DATA_SQL, {
             'symbol': symbol,
             'timestamp': datetime.fromtimestamp(candle['t'] / 1000, tz=timezone.utc),
             'open': float(candle['o']),
@@ -63,106 +101,75 @@ def store_to_db(symbol, candle):
             'volume': float(candle['v'])
         })
 
+# === Warm Start Buffers (at startup, and again after a gap is refilled) ===
+def warm_start_symbol(symbol):
+    try:
+        df = pd.read_sql(SELECT_RECENT_CANDLES_SQL, engine, params={'symbol': symbol, 'limit': WARMUP_CANDLES})
+        df.sort_values('timestamp', inplace=True)
+        indicators = IndicatorEngine()
+        features = indicators.seed(df['close'].to_numpy())
+        for name in FEATURE_COLUMNS:
+            df[name] = features[name]
+        buffer = CandleBuffer(BUFFER_SIZE, OHLCV_COLUMNS + tuple(FEATURE_COLUMNS))
+        buffer.extend(df.tail(BUFFER_SIZE))
+        with symbol_locks[symbol]:
+            candle_buffers[symbol] = buffer
+            indicator_engines[symbol] = indicators
+        print(f"[Buffer] {symbol.upper()} warm-started with {len(buffer)} candles")
+    except Exception as e:
+        print(f"[Buffer Error] ❌ Failed to warm-start {symbol.upper()}: {e}")
+
+def warm_start_buffers():
+    for symbol in SYMBOLS:
+        warm_start_symbol(symbol)
+
+# === Gap Detection & Refill ===
+def on_gap_filled(symbol, start_ms, end_ms):
+    # Rebuild indicators over the now-contiguous history, and the rollup buckets
+    # covering the range (the per-minute refresh only looks at the newest ones)
+    warm_start_symbol(symbol)
+    try:
+        invalidate_rollups(engine, symbol, datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc),
+                           datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc))
+    except Exception as e:
+        print(f"[Rollup Error] ❌ Failed to rebuild {symbol.upper()} rollups after gap fill: {e}")
+
+def start_gap_filler():
+    global gap_filler
+    client = backfill.create_client()
+    limiter = WeightRateLimiter(backfill.WEIGHT_LIMIT_PER_MINUTE)
+    gap_filler = GapFiller(
+        refetch=lambda symbol, start_ms, end_ms: backfill.backfill_symbol(client, limiter, symbol, start_ms, end_ms)[1],
+        on_filled=on_gap_filled
+    )
+    gap_filler.start()
+
+    now = datetime.now(timezone.utc)
+    found = gap_filler.scan(engine, SYMBOLS, now - timedelta(days=GAP_SCAN_DAYS), now)
+    print(f"[Gap] Startup scan found {found} gap(s) in the last {GAP_SCAN_DAYS} day(s)")
+
 # === Load Features ===
 def load_features(symbol):
-    query = '''
-        SELECT * FROM market_data
-        WHERE symbol = %s
-        ORDER BY timestamp DESC
-        LIMIT 100
-    '''
-    df = pd.read_sql(query, engine, params=(symbol,))
-    if df.empty:
-        return df
-
-    df.sort_values('timestamp', inplace=True)
-    df['rsi'] = talib.RSI(df['close'], timeperiod=14)
-    df['ema_fast'] = talib.EMA(df['close'], timeperiod=9)
-    df['ema_slow'] = talib.EMA(df['close'], timeperiod=21)
-    macd, macdsignal, _ = talib.MACD(df['close'], fastperiod=12, slowperiod=26, signalperiod=9)
-    df['macd'] = macd
-    df['macd_signal'] = macdsignal
-    upper, middle, lower = talib.BBANDS(df['close'], timeperiod=20)
-    df['bb_upper'] = upper
-    df['bb_lower'] = lower
-    return df
+    return candle_buffers[symbol].to_frame()
 
 # === Log Executed Signal Only ===
 def log_signal_to_db(signal, price, symbol, executed=True):
-    try:
-        with engine.begin() as conn:
-            conn.execute(text('''
-                CREATE TABLE IF NOT EXISTS strategy_signals (
-                    id SERIAL PRIMARY KEY,
-                    timestamp TIMESTAMPTZ,
-                    symbol TEXT,
-                    strategy TEXT,
-                    action TEXT,
-                    price FLOAT,
-                    reason TEXT,
-                    executed BOOLEAN DEFAULT TRUE
-                )
-            '''))
-            conn.execute(text('''
-                INSERT INTO strategy_signals (timestamp, symbol, strategy, action, price, reason, executed)
-                VALUES (:timestamp, :symbol, :strategy, :action, :price, :reason, :executed)
-            '''), {
-                'timestamp': datetime.now(timezone.utc),
-                'symbol': symbol,
-                'strategy': signal['strategy'],
-                'action': signal['action'],
-                'price': price,
-                'reason': signal['reason'],
-                'executed': executed
-            })
-    except Exception as e:
-        print(f"[DB Error] ❌ Failed to log signal for {symbol}: {e}")
-
-# === Strategy Voting ===
-def evaluate_all_strategies(row, full_df):
-    strategy_functions = [
-        ("RSI", lambda r, df: evaluate_rsi(r, df)),
-        ("EMA Crossover", lambda r, df: evaluate_ema_crossover(r)),
-        ("MACD", lambda r, df: evaluate_macd(r)),
-        ("Bollinger Bands", lambda r, df: evaluate_bollinger(r)),
-        ("ML Strategy", lambda r, df: evaluate_ml_strategy())
-    ]
-
-    votes = {"BUY": 0, "SELL": 0}
-    signals = []
-
-    for name, func in strategy_functions:
-        try:
-            signal = func(row, full_df)
-            print(f"[{name}] Signal: {signal}")
-            if signal and signal["action"].upper() in votes:
-                action = signal["action"].upper()
-                votes[action] += 1
-                signals.append({
-                    "strategy": name,
-                    "action": action,
-                    "reason": signal.get("reason", "")
-                })
-        except Exception as e:
-            print(f"[{name} ERROR] {e}")
-
-    if votes["BUY"] >= 2:
-        return {
-            "action": "BUY",
-            "strategy": "cumulative_vote",
-            "reason": str([s['strategy'] for s in signals if s['action'] == 'BUY'])
-        }
-    elif votes["SELL"] >= 2:
-        return {
-            "action": "SELL",
-            "strategy": "cumulative_vote",
-            "reason": str([s['strategy'] for s in signals if s['action'] == 'SELL'])
-        }
-    return None
+    if not persist_data:
+        return
+    signal_writer.submit({
+        'timestamp': clock(),
+        'symbol': symbol,
+        'strategy': signal['strategy'],
+        'action': signal['action'],
+        'price': float(price),
+        'reason': signal['reason'],
+        'executed': executed
+    })
 
 # === Handle WebSocket Messages ===
 def handle_socket_message(symbol):
     def inner(msg):
+        received = time.perf_counter()
         try:
             if msg['e'] != 'kline' or not msg['k']['x']:
                 return
@@ -176,20 +183,73 @@ def handle_socket_message(symbol):
                 'c': float(kline['c']),
                 'v': float(kline['v']),
             }
-            store_to_db(symbol, candle)
-            df = load_features(symbol)
+            with stage_latency.timer(symbol, "store"):
+                store_to_db(symbol, candle)
+
+            with stage_latency.timer(symbol, "features"), symbol_locks[symbol]:
+                buffer = candle_buffers[symbol]
+                last_ts = buffer.last_timestamp()
+                if last_ts is not None and candle['t'] <= last_ts:
+                    return  # already processed (stream replay after reconnect)
+                if gap_filler:
+                    gap_filler.check_candle(symbol, last_ts, candle['t'])
+                features = indicator_engines[symbol].update(candle['c'])
+                buffer.append(candle['t'], {
+                    'open': candle['o'], 'high': candle['h'], 'low': candle['l'],
+                    'close': candle['c'], 'volume': candle['v'],
+                    **features
+                })
+                df = load_features(symbol)
             if df.empty or len(df) < 30:
                 return
-            row = df.iloc[-1]
-            signal = evaluate_all_strategies(row, df)
-            if signal:
-                executed = execution_engine.execute_paper_trade(signal, row['close'], symbol)
-                if executed:
-                    log_signal_to_db(signal, row['close'], symbol)
+            # The future is ignored by the websocket manager; the replay harness times it
+            return evaluation_pool.submit(process_candle, symbol, df, received)
         except Exception as e:
-            print(f"[{symbol.upper()} WebSocket Error] {e}")
+            log_event(log, logging.ERROR, "callback_error", symbol=symbol.upper(), error=e)
     return inner
 
+# === Evaluate & Execute One Closed Candle ===
+def process_candle(symbol, df, received=None):
+    if received is not None:
+        stage_latency.record(symbol, "queue", time.perf_counter() - received)
+    try:
+        row = df.iloc[-1]
+        with stage_latency.timer(symbol, "vote"):
+            signal = evaluate_all_strategies(row, df, verbose=verbose, latency=stage_latency, symbol=symbol.upper(),
+                                             executor=strategy_executor)
+        if signal:
+            executed = execution_engine.execute_paper_trade(signal, row['close'], symbol)
+            if executed:
+                with stage_latency.timer(symbol, "db_log"):
+                    log_signal_to_db(signal, row['close'], symbol)
+    except Exception as e:
+        log_event(log, logging.ERROR, "evaluation_error", symbol=symbol.upper(), error=e)
+    finally:
+        if received is not None:
+            stage_latency.record(symbol, "total", time.perf_counter() - received)
+
+# === Dashboard Rollups (higher-timeframe candles) ===
+def refresh_rollups_job():
+    try:
+        refresh_rollups(engine, SYMBOLS)
+    except Exception as e:
+        print(f"[Rollup Error] ❌ Failed to refresh candle rollups: {e}")
+
+# === Performance Snapshot (read by the dashboard) ===
+def restore_performance():
+    # Stats are cumulative across restarts: continue from the last snapshot
+    try:
+        rows = performance.restore(engine)
+        print(f"[Performance] ✅ Restored {rows} summary rows (tracking since {performance.since})")
+    except Exception as e:
+        print(f"[DB Error] ❌ Failed to restore performance snapshot, starting from zero: {e}")
+
+def save_performance_job():
+    try:
+        performance.save_snapshot(engine)
+    except Exception as e:
+        print(f"[DB Error] ❌ Failed to save performance snapshot: {e}")
+
 # === Log PnL Summary ===
 def log_pnl():
     pnl_log = execution_engine.get_pnl_log()
@@ -198,28 +258,126 @@ def log_pnl():
         for trade in pnl_log:
             print(f"Symbol: {trade['symbol']} | Entry: {trade['entry_time']} | Exit: {trade['exit_time']} | PnL: {trade['pnl']:.2f}")
         print(f"[Balance] ${execution_engine.get_balance():.2f}\n")
+        p = performance.portfolio
+        sharpe = p.rolling_sharpe()
+        print(f"[Performance] equity {p.equity:.2f} | max drawdown {p.max_drawdown:.2f} | "
+              f"win rate {p.wins / max(p.trades, 1):.1%} | rolling Sharpe "
+              f"{f'{sharpe:.2f}' if sharpe is not None else 'n/a'} (last {performance.window} trades)")
+
+    p = pool_stats()
+    print(f"[DB Pool] checked out {p.get('checked_out', 0)}/{p.get('size', 0)} (+{p.get('overflow', 0)} overflow) | "
+          f"checkouts {p['checkouts']} | wait avg {p['avg_wait_ms']:.1f}ms p95 {p['p95_wait_ms']:.1f}ms "
+          f"max {p['max_wait_ms']:.1f}ms | timeouts {p['timeouts']}")
+
+    if gap_filler:
+        for symbol, m in gap_filler.gap_counts().items():
+            print(f"[Gaps] {symbol.upper()} detected: {m['gaps_detected']} ({m['candles_missing']} candles) | "
+                  f"filled: {m['gaps_filled']} ({m['candles_filled']} candles) | retries: {m['retries']} | "
+                  f"failed: {m['gaps_failed']}")
+
+    if gateway:
+        g = gateway.summary()
+        print(f"[Gateway] candles {g['received']} | handled {g['handled']} | dropped {g['dropped']} | "
+              f"errors {g['errors']} | queued {g['queued']} (max {g['max_depth']}) | "
+              f"max lag {g['max_lag_ms']:.0f}ms | reconnects {g['reconnects']} | parse errors {g['parse_errors']}")
+
+    for line in stage_latency.summary_lines():
+        print(line)
+
+    job = retrain_worker.status()
+    if job:
+        took = f" in {job['duration']:.1f}s" if job['duration'] is not None else ""
+        print(f"[Retrain] last job {job['id']}: {job['status']}{took} | serving model {model_registry.version()}")
+
+# === Replay Mode ===
+def use_replay(replay_clock, persist=False, log_candles=False):
+    """Run the callback path on recorded klines: market time from replay_clock, a fresh
+    isolated ExecutionEngine, and (unless persist) no DB writes for candles, signals or trades.
+    Strategies run without wall-clock deadlines, so the same recording always gives the same votes."""
+    global clock, persist_data, verbose, execution_engine, performance, strategy_executor
+    if strategy_executor:
+        strategy_executor.shutdown(wait=False)
+        strategy_executor = None
+    warm_up_model()
+    clock = replay_clock
+    persist_data = persist
+    verbose = log_candles
+    performance = PerformanceTracker(STARTING_BALANCE, replay_clock, writer=equity_writer if persist else None)
+    execution_engine = ExecutionEngine(starting_balance=STARTING_BALANCE,
+                                       engine=engine if persist else None,
+                                       writer=trade_writer if persist else None,
+                                       clock=replay_clock, verbose=log_candles, isolated=True,
+                                       latency=stage_latency, on_trade_closed=performance.on_trade_closed)
 
 # === Retrain ML ===
-def activate_lightgbm():
+def on_model_published(job):
     global lstm_active
-    train_lightgbm()
+    model_registry.check()      # swap in now instead of waiting for the next poll
+    warm_up_model()
     lstm_active = True
-    print("[ML] ✅ LightGBM model retrained")
+    print(f"[ML] ✅ LightGBM model retrained, serving version {model_registry.version()}")
+
+retrain_worker = RetrainWorker(on_published=on_model_published)
+
+def activate_lightgbm():
+    # Training runs in a separate process; this only queues the job
+    retrain_worker.submit(SYMBOLS, RETRAIN_WINDOW)
+
+# === Event Loop ===
+async def run_gateway():
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, gateway.stop)
+        except NotImplementedError:
+            pass    # Windows: Ctrl+C arrives as KeyboardInterrupt instead
+    await gateway.run()
 
 # === Main Bot Runner ===
 if __name__ == '__main__':
-    twm = ThreadedWebsocketManager()
-    twm.start()
+    ensure_schema(engine)
+    restore_performance()
+    signal_writer.start()
+    trade_writer.start()
+    equity_writer.start()
+    warm_start_buffers()
+    start_gap_filler()
+    model_registry.start()
+    warm_up_model()             # the first cold predict would miss the ML deadline
+    metrics_server = MetricsServer(stage_latency, METRICS_PORT).start() if METRICS_PORT else None
 
+    gateway = MarketGateway(interval=INTERVAL, url=MARKET_STREAM_URL)
+    recorder = KlineRecorder(RECORD_KLINES) if RECORD_KLINES else None
     for symbol in SYMBOLS:
-        print(f"[WebSocket] 🔄 Starting stream for {symbol.upper()}...")
-        twm.start_kline_socket(callback=handle_socket_message(symbol), symbol=symbol, interval=INTERVAL)
+        callback = handle_socket_message(symbol)
+        gateway.subscribe(symbol, recorder.wrap(callback) if recorder else callback)
 
     scheduler = BackgroundScheduler()
     scheduler.add_job(log_pnl, 'interval', minutes=1)
+    scheduler.add_job(refresh_rollups_job, 'interval', minutes=1)
+    scheduler.add_job(save_performance_job, 'interval', minutes=1)
     scheduler.add_job(activate_lightgbm, 'cron', hour=0, minute=0)
     scheduler.start()
 
     print("[Bot] ✅ Multi-symbol scalping bot active")
-    while True:
-        time.sleep(1)
+    try:
+        asyncio.run(run_gateway())      # returns after SIGINT/SIGTERM once queued candles are handled
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    print("[Bot] 🛑 Shutting down, flushing pending writes...")
+    if recorder:
+        recorder.close()
+    if metrics_server:
+        metrics_server.stop()
+    scheduler.shutdown(wait=False)
+    gap_filler.stop()
+    evaluation_pool.shutdown(wait=True)
+    if strategy_executor:
+        strategy_executor.shutdown()
+    batch_predictor.stop()
+    model_registry.stop()
+    retrain_worker.stop(wait=False)
+    save_performance_job()
+    signal_writer.stop()
+    trade_writer.stop()
+    equity_writer.stop()
@@ -1,6 +1,13 @@
 # bb_strategy.py
+import logging
+
+import numpy as np
 import pandas as pd
 
+from backend.monitoring.logs import get_logger, log_event
+
+log = get_logger("strategy")
+
 def evaluate_bollinger(row, prev_row=None):
     try:
         if pd.isna(row['bb_upper']) or pd.isna(row['bb_lower']) or pd.isna(row['close']):
@@ -15,6 +22,26 @@ def evaluate_bollinger(row, prev_row=None):
             return {'action': 'SELL', 'reason': 'Price dropped below upper Bollinger Band (reversion)'}
 
     except Exception as e:
-        print(f"[BB Strategy Error] {e}")
+        log_event(log, logging.WARNING, "strategy_error", strategy="BB", error=e)
 
     return None
+
+
+# === Array form (vectorized backtests) ===
+# 1 = BUY, -1 = SELL, 0 = no signal. The reversion rules need the previous
+# candle; with use_prev=False this mirrors evaluate_bollinger(row) called
+# without prev_row (as the backtester and live bot do), which never signals.
+def evaluate_bollinger_array(close, bb_upper, bb_lower, use_prev=False):
+    close = np.asarray(close, dtype='float64')
+    signals = np.zeros(len(close), dtype='int8')
+    if not use_prev or len(close) < 2:
+        return signals
+
+    bb_upper = np.asarray(bb_upper, dtype='float64')
+    bb_lower = np.asarray(bb_lower, dtype='float64')
+    valid = ~(np.isnan(close) | np.isnan(bb_upper) | np.isnan(bb_lower))
+    buy = (close[1:] > bb_lower[1:]) & (close[:-1] < bb_lower[:-1])
+    sell = (close[1:] < bb_upper[1:]) & (close[:-1] > bb_upper[:-1])
+    signals[1:][valid[1:] & sell & ~buy] = -1
+    signals[1:][valid[1:] & buy] = 1
+    return signals
@@ -1,4 +1,5 @@
 # ema_crossover.py
+import numpy as np
 
 def evaluate_ema_crossover(row):
     if row['ema_fast'] is None or row['ema_slow'] is None:
@@ -10,3 +11,14 @@ def evaluate_ema_crossover(row):
         return {'action': 'SELL', 'reason': 'EMA fast crossed below EMA slow'}
 
     return None
+
+
+# === Array form (vectorized backtests) ===
+# 1 = BUY, -1 = SELL, 0 = no signal (NaN EMAs compare false, like the row form)
+def evaluate_ema_crossover_array(ema_fast, ema_slow):
+    ema_fast = np.asarray(ema_fast, dtype='float64')
+    ema_slow = np.asarray(ema_slow, dtype='float64')
+    signals = np.zeros(len(ema_fast), dtype='int8')
+    signals[ema_fast > ema_slow] = 1
+    signals[ema_fast < ema_slow] = -1
+    return signals
@@ -1,6 +1,13 @@
 # macd_strategy.py
+import logging
+
+import numpy as np
 import pandas as pd
 
+from backend.monitoring.logs import get_logger, log_event
+
+log = get_logger("strategy")
+
 def evaluate_macd(row):
     try:
         # Ensure MACD values are not NaN or None
@@ -14,8 +21,19 @@ def evaluate_macd(row):
             return {'action': 'SELL', 'reason': 'MACD crossed below signal line'}
 
     except KeyError as e:
-        print(f"[MACD Strategy Error] Missing column: {e}")
+        log_event(log, logging.WARNING, "strategy_error", strategy="MACD", error=f"missing column {e}")
     except Exception as e:
-        print(f"[MACD Strategy Error] {e}")
+        log_event(log, logging.WARNING, "strategy_error", strategy="MACD", error=e)
 
     return None
+
+
+# === Array form (vectorized backtests) ===
+# 1 = BUY, -1 = SELL, 0 = no signal
+def evaluate_macd_array(macd, macd_signal):
+    macd = np.asarray(macd, dtype='float64')
+    macd_signal = np.asarray(macd_signal, dtype='float64')
+    signals = np.zeros(len(macd), dtype='int8')
+    signals[macd > macd_signal] = 1
+    signals[macd < macd_signal] = -1
+    return signals
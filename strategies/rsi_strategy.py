@@ -1,7 +1,14 @@
 # rsi_strategy.py
 
+import logging
+
+import numpy as np
 import pandas as pd
 
+from backend.monitoring.logs import get_logger, log_event
+
+log = get_logger("strategy")
+
 def evaluate_rsi(row, prev_row=None):
     try:
         # Ensure RSI is valid
@@ -22,6 +29,18 @@ def evaluate_rsi(row, prev_row=None):
                 return {'action': 'SELL', 'reason': 'RSI just crossed above 70'}
 
     except Exception as e:
-        print(f"[RSI Strategy Error] {e}")
+        log_event(log, logging.WARNING, "strategy_error", strategy="RSI", error=e)
 
     return None
+
+
+# === Array form (vectorized backtests) ===
+# Signal vector over a whole column: 1 = BUY, -1 = SELL, 0 = no signal.
+# The crossing checks above can never fire (a crossing below 30 is already
+# below 40), so the thresholds alone reproduce evaluate_rsi row by row.
+def evaluate_rsi_array(rsi, buy_below=40, sell_above=60):
+    rsi = np.asarray(rsi, dtype='float64')
+    signals = np.zeros(len(rsi), dtype='int8')
+    signals[rsi < buy_below] = 1
+    signals[rsi > sell_above] = -1
+    return signals
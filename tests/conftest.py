@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os, sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Modules such as backtester create the shared engine at import; the tests never connect
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
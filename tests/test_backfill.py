@@ -0,0 +1,39 @@
+# tests/test_backfill.py
+from backfill import INTERVAL_MS, last_closed_open_ms
+
+
+def test_end_is_the_last_closed_candle():
+    minute = INTERVAL_MS['1m']
+    # At 10:05:30 the 10:05 candle is still forming; 10:04 is the last closed one
+    now = 10 * 60 * minute + 5 * minute + 30_000
+    assert last_closed_open_ms(now, '1m') == 10 * 60 * minute + 4 * minute
+    # Exactly on a boundary the candle that just opened is excluded
+    assert last_closed_open_ms(5 * minute, '1m') == 4 * minute
+
+
+def test_end_aligns_to_the_interval():
+    hour = INTERVAL_MS['1h']
+    assert last_closed_open_ms(5 * hour + 59 * 60_000, '1h') == 4 * hour
+
+
+def test_each_worker_thread_gets_its_own_client(monkeypatch):
+    import threading
+    import backfill
+
+    seen = []
+    monkeypatch.setattr(backfill, 'get_resume_points', lambda symbols, *args: {s: 0 for s in symbols})
+
+    def fake_backfill_symbol(client, limiter, symbol, start_ms, end_ms, interval):
+        seen.append((threading.get_ident(), client))
+        return 0, 0
+    monkeypatch.setattr(backfill, 'backfill_symbol', fake_backfill_symbol)
+
+    symbols = [f"sym{i}usdt" for i in range(12)]
+    backfill.run_backfill(symbols, object, workers=3)
+
+    assert len(seen) == len(symbols)
+    clients_by_thread = {}
+    for thread, client in seen:
+        clients_by_thread.setdefault(thread, set()).add(id(client))
+    assert all(len(clients) == 1 for clients in clients_by_thread.values())
+    assert len({c for clients in clients_by_thread.values() for c in clients}) == len(clients_by_thread)
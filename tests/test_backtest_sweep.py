@@ -0,0 +1,18 @@
+# tests/test_backtest_sweep.py
+import pytest
+
+import backfill
+import backtest_sweep
+from backend.data.kline_fixture import synthetic_klines
+
+
+@pytest.fixture(scope='module')
+def candles():
+    return backfill.klines_to_frame(synthetic_klines(1_700_000_000_000, 20_000, seed=3)).set_index('timestamp')
+
+
+@pytest.mark.parametrize('strategy', ['rsi', 'ema', 'macd', 'bb'])
+def test_every_combo_gives_a_different_backtest(candles, strategy):
+    ranked = backtest_sweep.run_sweep(candles, strategy=strategy, workers=2)
+    assert len(ranked) == len(backtest_sweep.expand_grid(backtest_sweep.strategy_grid(strategy)))
+    assert len(ranked[['trades', 'total_pnl']].round(6).drop_duplicates()) == len(ranked)
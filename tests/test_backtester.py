@@ -0,0 +1,47 @@
+# tests/test_backtester.py
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("talib")
+
+import backtester
+
+
+def synthetic_candles(days, seed=42):
+    n = days * 24 * 60
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 15, n))
+    spread = np.abs(rng.normal(0, 5, n))
+    return pd.DataFrame({
+        'open': close + rng.normal(0, 3, n),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(1, 50, n),
+    }, index=pd.date_range('2024-01-01', periods=n, freq='min', tz='UTC', name='timestamp'))
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return backtester.add_indicators(synthetic_candles(days=2))
+
+
+@pytest.mark.parametrize("strategy", list(backtester.STRATEGIES) + ['all'])
+def test_vectorized_backtest_matches_row_loop(candles, strategy, monkeypatch):
+    monkeypatch.setattr(backtester, "USE_STRATEGY", strategy)
+    row_trades, row_equity = backtester.run_backtest(candles)
+    vec_trades, vec_equity = backtester.run_backtest_vectorized(candles)
+    assert vec_trades == row_trades
+    assert vec_equity == row_equity
+    if strategy in ('rsi', 'all'):
+        assert row_trades, "fixture should produce trades"
+
+
+def test_risk_gated_exits_only_close_on_allowed_moves(candles):
+    risk = backtester.RISK_PARAMS
+    trades, _ = backtester.run_backtest_vectorized(candles, 'rsi', risk=risk)
+    for t in trades:
+        change = (t['exit_price'] - t['entry_price']) / t['entry_price']
+        assert (change <= -risk['stop_loss_pct'] or change >= risk['take_profit_pct']
+                or change >= risk['min_gain_pct'])
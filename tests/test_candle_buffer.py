@@ -0,0 +1,59 @@
+# tests/test_candle_buffer.py
+import numpy as np
+import pandas as pd
+
+from backend.data.candle_buffer import CandleBuffer
+
+MINUTE = 60_000
+
+
+def candle(i):
+    return {'open': i, 'high': i + 1, 'low': i - 1, 'close': i + 0.5, 'volume': 10 * i}
+
+
+def test_keeps_the_newest_candles_in_order_after_wrapping():
+    buffer = CandleBuffer(capacity=5)
+    for i in range(12):
+        assert buffer.append(i * MINUTE, candle(i))
+
+    assert len(buffer) == 5
+    assert buffer.last_timestamp() == 11 * MINUTE
+    np.testing.assert_array_equal(buffer.column('open'), [7, 8, 9, 10, 11])
+
+    df = buffer.to_frame()
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    assert df['timestamp'].is_monotonic_increasing
+    assert df['timestamp'].iloc[0] == pd.Timestamp(7 * MINUTE, unit='ms', tz='UTC')
+    np.testing.assert_array_equal(df['close'], [7.5, 8.5, 9.5, 10.5, 11.5])
+
+
+def test_rejects_duplicate_and_out_of_order_candles():
+    buffer = CandleBuffer(capacity=3)
+    assert buffer.append(2 * MINUTE, candle(2))
+    assert not buffer.append(2 * MINUTE, candle(99))
+    assert not buffer.append(1 * MINUTE, candle(1))
+    assert len(buffer) == 1
+    assert buffer.column('open')[0] == 2
+
+
+def test_missing_columns_stay_nan_and_slots_are_reset():
+    buffer = CandleBuffer(capacity=2, columns=('close', 'rsi'))
+    buffer.append(0, {'close': 1.0, 'rsi': 50.0})
+    buffer.append(MINUTE, {'close': 2.0, 'rsi': 55.0})
+    buffer.append(2 * MINUTE, {'close': 3.0})     # reuses the slot that held rsi=50
+    assert np.isnan(buffer.column('rsi')[-1])
+    np.testing.assert_array_equal(buffer.column('close'), [2.0, 3.0])
+
+
+def test_extend_matches_appending_row_by_row():
+    df = pd.DataFrame([candle(i) for i in range(8)])
+    df.insert(0, 'timestamp', pd.date_range('2024-01-01', periods=8, freq='min', tz='UTC'))
+
+    bulk = CandleBuffer(capacity=6)
+    bulk.extend(df)
+    single = CandleBuffer(capacity=6)
+    for _, row in df.iterrows():
+        single.append(row['timestamp'].value // 1_000_000, row.drop('timestamp').to_dict())
+
+    pd.testing.assert_frame_equal(bulk.to_frame(), single.to_frame())
+    assert bulk.to_frame()['timestamp'].iloc[-1] == df['timestamp'].iloc[-1]
@@ -0,0 +1,40 @@
+# tests/test_database.py
+import pytest
+from sqlalchemy import create_engine, exc
+
+from backend.db import database
+from backend.db.database import TimedQueuePool, database_url
+
+
+def test_missing_settings_raise_a_clear_error(monkeypatch):
+    for name in ('DATABASE_URL', 'DB_USER', 'DB_PASSWORD', 'DB_HOST'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('DB_USER', 'bot')
+    with pytest.raises(RuntimeError, match="DB_PASSWORD, DB_HOST"):
+        database_url()
+
+
+def test_url_is_built_from_parts(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    monkeypatch.setenv('DB_USER', 'bot')
+    monkeypatch.setenv('DB_PASSWORD', 'p#ss')
+    monkeypatch.setenv('DB_HOST', 'db.local')
+    url = database_url()
+    assert (url.username, url.password, url.host, url.port, url.database) == ('bot', 'p#ss', 'db.local', 5432, 'postgres')
+
+
+def test_only_pool_exhaustion_counts_as_a_timeout(tmp_path, monkeypatch):
+    stats = database.PoolStats()
+    monkeypatch.setattr(database, 'stats', stats)
+
+    broken = create_engine(f"sqlite:///{tmp_path}/missing/dir/x.db", poolclass=TimedQueuePool)
+    with pytest.raises(exc.OperationalError):
+        broken.connect()
+    assert stats.timeouts == 0
+
+    engine = create_engine(f"sqlite:///{tmp_path}/x.db", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert stats.timeouts == 1
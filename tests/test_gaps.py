@@ -0,0 +1,73 @@
+# tests/test_gaps.py
+import time
+from datetime import datetime, timezone
+
+from backend.data.gaps import GapFiller, expected_range
+
+MINUTE = 60_000
+
+
+def at(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_window_runs_from_the_first_expected_to_the_last_closed_candle():
+    # 10:00:30 -> 10:10:15: 10:01 is the first candle inside, 10:09 the last one closed
+    start, end = 600 * MINUTE + 30_000, 610 * MINUTE + 15_000
+    assert expected_range(at(start), at(end)) == (601 * MINUTE, 609 * MINUTE)
+    # Aligned bounds: the candle opening at start counts, the one opening at end is still forming
+    assert expected_range(at(600 * MINUTE), at(610 * MINUTE)) == (600 * MINUTE, 609 * MINUTE)
+
+
+def test_live_candles_that_skip_minutes_report_the_range_between():
+    filler = GapFiller(refetch=lambda *args: 0)
+    assert not filler.check_candle('btcusdt', 0, MINUTE)
+    assert filler.check_candle('btcusdt', MINUTE, 5 * MINUTE)
+    assert filler.queue.get_nowait() == ('btcusdt', 2 * MINUTE, 4 * MINUTE)
+    assert filler.gap_counts()['btcusdt']['candles_missing'] == 3
+
+
+def test_failed_refetch_is_retried_until_it_succeeds():
+    calls = []
+    filled = []
+
+    def refetch(symbol, start_ms, end_ms):
+        calls.append((symbol, start_ms, end_ms))
+        if len(calls) < 3:
+            raise ConnectionError("Binance unavailable")
+        return 3
+
+    filler = GapFiller(refetch, on_filled=lambda *key: filled.append(key), retry_delays=(0.01, 0.01, 0.01))
+    filler.start()
+    filler.report_gap('btcusdt', 2 * MINUTE, 4 * MINUTE)
+    filler.report_gap('btcusdt', 2 * MINUTE, 4 * MINUTE)    # already pending, ignored
+    assert wait_for(lambda: filled)
+    filler.stop()
+
+    assert calls == [('btcusdt', 2 * MINUTE, 4 * MINUTE)] * 3
+    assert filled == [('btcusdt', 2 * MINUTE, 4 * MINUTE)]
+    m = filler.gap_counts()['btcusdt']
+    assert (m['gaps_detected'], m['retries'], m['gaps_filled'], m['candles_filled'], m['gaps_failed']) == (1, 2, 1, 3, 0)
+
+
+def test_gives_up_after_the_last_retry_and_accepts_the_range_again():
+    def refetch(symbol, start_ms, end_ms):
+        raise ConnectionError("Binance unavailable")
+
+    filler = GapFiller(refetch, retry_delays=(0.01,))
+    filler.start()
+    filler.report_gap('ethusdt', MINUTE, MINUTE)
+    assert wait_for(lambda: filler.gap_counts()['ethusdt']['gaps_failed'] == 1)
+    filler.report_gap('ethusdt', MINUTE, MINUTE)
+    assert wait_for(lambda: filler.gap_counts()['ethusdt']['gaps_failed'] == 2)
+    filler.stop()
+
+    m = filler.gap_counts()['ethusdt']
+    assert (m['gaps_detected'], m['retries']) == (2, 2)
@@ -0,0 +1,35 @@
+# tests/test_logs.py
+import logging
+
+from backend.monitoring import logs
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def record(event, symbol="BTCUSDT"):
+    r = logging.LogRecord("bot.strategy", logging.WARNING, __file__, 0, event, None, None)
+    r.fields = {'symbol': symbol}
+    return r
+
+
+def test_log_filter_emits_limit_per_key_per_window(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(logs.time, "monotonic", fake)
+    limiter = logs.RateLimitFilter(limit=20, window=60.0)
+
+    emitted = sum(limiter.filter(record("strategy_error")) for _ in range(50))
+    assert emitted == 20
+    # Other symbols and events have their own budget
+    assert limiter.filter(record("strategy_error", symbol="ETHUSDT"))
+    assert limiter.filter(record("strategy_timeout"))
+
+    fake.now += 60.0
+    first = record("strategy_error")
+    assert limiter.filter(first)
+    assert first.fields['suppressed'] == 30
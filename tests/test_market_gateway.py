@@ -0,0 +1,112 @@
+# tests/test_market_gateway.py
+import asyncio
+import json
+import threading
+import time
+
+from backend.gateway import market_gateway
+from backend.gateway.local_stream import LocalKlineStream
+from backend.gateway.market_gateway import MarketGateway
+
+START_MS = 1_700_000_000_000
+
+
+def kline(symbol, i, closed=True):
+    open_ms = START_MS + i * 60_000
+    return {'e': 'kline', 'E': open_ms + 60_000, 's': symbol.upper(), 'k': {
+        't': open_ms, 'T': open_ms + 59_999, 's': symbol.upper(), 'i': '1m',
+        'o': '1.0', 'h': '1.0', 'l': '1.0', 'c': '1.0', 'v': '1.0', 'x': closed}}
+
+
+def raw(msg):
+    return json.dumps({'stream': f"{msg['s'].lower()}@kline_1m", 'data': msg})
+
+
+def subscribed(symbols, queue_size=10):
+    gateway = MarketGateway(url="ws://127.0.0.1:1", queue_size=queue_size)
+    handled = {}
+    lock = threading.Lock()
+    for symbol in symbols:
+        def callback(msg, symbol=symbol):
+            with lock:
+                handled.setdefault(symbol, []).append(msg['k']['t'])
+        gateway.subscribe(symbol, callback)
+    gateway.queues = {symbol: asyncio.Queue(maxsize=queue_size) for symbol in symbols}
+    return gateway, handled
+
+
+async def run_until(gateway, done, timeout=10.0):
+    task = asyncio.create_task(gateway.run())
+    deadline = time.monotonic() + timeout
+    while not done() and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    gateway.stop()
+    await task
+
+
+def test_dispatch_queues_closed_candles_per_symbol():
+    gateway, _ = subscribed(['btcusdt', 'ethusdt'])
+    gateway._dispatch(raw(kline('btcusdt', 0)))
+    gateway._dispatch(raw(kline('btcusdt', 1, closed=False)))     # still forming
+    gateway._dispatch(raw(kline('ethusdt', 0)))
+    gateway._dispatch(raw(kline('solusdt', 0)))                   # not subscribed
+
+    assert gateway.queues['btcusdt'].qsize() == 1
+    assert gateway.queues['ethusdt'].qsize() == 1
+    assert gateway.metrics['btcusdt']['received'] == 1
+
+
+def test_full_queue_drops_the_oldest_candle():
+    gateway, _ = subscribed(['btcusdt'], queue_size=2)
+    for i in range(3):
+        gateway._dispatch(raw(kline('btcusdt', i)))
+
+    q = gateway.queues['btcusdt']
+    assert [q.get_nowait()['k']['t'] for _ in range(q.qsize())] == [START_MS + 60_000, START_MS + 120_000]
+    assert gateway.metrics['btcusdt']['dropped'] == 1
+    assert gateway.metrics['btcusdt']['max_depth'] == 2
+
+
+def test_bad_message_is_skipped_without_dropping_the_stream():
+    messages = [kline('btcusdt', 0), kline('btcusdt', 1), kline('btcusdt', 2)]
+    del messages[1]['k']['x']       # malformed payload in the middle
+
+    async def scenario():
+        stream = await LocalKlineStream(messages, port=0).start()
+        gateway, handled = subscribed(['btcusdt'])
+        gateway.url = stream.url
+        try:
+            await run_until(gateway, lambda: len(handled.get('btcusdt', [])) == 2)
+        finally:
+            await stream.stop()
+        return gateway, handled
+
+    gateway, handled = asyncio.run(scenario())
+    assert handled['btcusdt'] == [START_MS, START_MS + 120_000]
+    assert gateway.parse_errors == 1
+    assert gateway.reconnects == 0
+
+
+def test_reconnects_after_the_stream_drops(monkeypatch):
+    monkeypatch.setattr(market_gateway, 'RECONNECT_DELAYS', (0.05,))
+    messages = [kline('btcusdt', i) for i in range(3)]
+
+    async def scenario():
+        stream = await LocalKlineStream(messages, port=0).start()
+        gateway, handled = subscribed(['btcusdt'])
+        gateway.url = stream.url
+        task = asyncio.create_task(run_until(gateway, lambda: len(handled.get('btcusdt', [])) == 6))
+        while len(handled.get('btcusdt', [])) < 3:
+            await asyncio.sleep(0.02)
+        await stream.stop()     # closes the connection
+        stream = await LocalKlineStream(messages, port=stream.port).start()
+        try:
+            await task
+        finally:
+            await stream.stop()
+        return gateway, handled
+
+    gateway, handled = asyncio.run(scenario())
+    assert len(handled['btcusdt']) == 6     # the new connection replays the same candles
+    assert gateway.reconnects >= 1
+    assert gateway.parse_errors == 0
@@ -0,0 +1,73 @@
+# tests/test_performance.py
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend.analytics.performance import PerformanceTracker
+from backend.db.schema import MIGRATIONS
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def trades(n, seed=3):
+    rng = np.random.default_rng(seed)
+    symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+    voters = [['RSI', 'MACD'], ['EMA Crossover', 'ML Strategy'], ['RSI', 'EMA Crossover', 'MACD']]
+    return [{
+        'symbol': symbols[i % 3], 'pnl': float(rng.normal(2, 20)), 'fees': 7.5,
+        'exit_time': START + timedelta(minutes=i), 'strategies': voters[i % 3],
+    } for i in range(n)]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    summary_ddl = next(s for v, _, statements in MIGRATIONS if v == 4
+                       for s in statements if 'performance_summary' in s)
+    with engine.begin() as conn:
+        conn.execute(text(summary_ddl))
+        conn.execute(text('ALTER TABLE performance_summary ADD COLUMN returns TEXT'))   # migration 5
+    return engine
+
+
+def comparable(tracker):
+    return [{k: v for k, v in row.items() if k not in ('since', 'updated_at')} for row in tracker.rows()]
+
+
+def test_restart_continues_from_the_snapshot(engine):
+    clock = lambda: START
+    history = trades(150)
+
+    uninterrupted = PerformanceTracker(50_000, clock, window=40)
+    for t in history:
+        uninterrupted.on_trade_closed(t)
+
+    first = PerformanceTracker(50_000, clock, window=40)
+    for t in history[:90]:
+        first.on_trade_closed(t)
+    assert first.save_snapshot(engine) == 1 + 3 + 4
+
+    restarted = PerformanceTracker(50_000, clock, window=40)
+    assert restarted.restore(engine) == 8
+    assert restarted.save_snapshot(engine) == 0     # nothing new since the restore
+    for t in history[90:]:
+        restarted.on_trade_closed(t)
+
+    for ours, reference in zip(comparable(restarted), comparable(uninterrupted)):
+        assert ours.keys() == reference.keys()
+        for key, value in reference.items():
+            assert ours[key] == pytest.approx(value, rel=1e-9, abs=1e-12), (ours['name'], key)
+
+
+def test_portfolio_stats_match_the_trades():
+    tracker = PerformanceTracker(1_000, lambda: START)
+    for pnl in (10.0, -30.0, 5.0, 40.0):
+        tracker.on_trade_closed({'symbol': 'BTCUSDT', 'pnl': pnl, 'fees': 1.0, 'exit_time': START})
+    p = tracker.portfolio
+    assert (p.trades, p.wins) == (4, 3)
+    assert p.equity == pytest.approx(1_025.0)
+    assert p.peak_equity == pytest.approx(1_025.0)
+    assert p.max_drawdown == pytest.approx(30.0)
+    assert tracker.by_strategy['unknown'].trades == 4
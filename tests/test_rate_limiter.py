@@ -0,0 +1,54 @@
+# tests/test_rate_limiter.py
+import pytest
+
+from backend.data.rate_limiter import WeightRateLimiter
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_takes_weight_without_waiting_while_tokens_last():
+    fake = FakeTime()
+    limiter = WeightRateLimiter(limit_per_minute=1200, clock=fake, sleep=fake.sleep)
+    for _ in range(12):
+        limiter.acquire(100)
+    assert fake.slept == []
+    assert limiter.tokens == pytest.approx(0)
+
+
+def test_waits_for_the_refill_when_empty():
+    fake = FakeTime()
+    limiter = WeightRateLimiter(limit_per_minute=1200, clock=fake, sleep=fake.sleep)
+    limiter.acquire(1200)
+    limiter.acquire(20)     # refills at 20 per second
+    assert sum(fake.slept) == pytest.approx(1.0)
+    assert limiter.waited_seconds == pytest.approx(1.0)
+
+
+def test_server_reported_weight_pulls_the_bucket_down():
+    fake = FakeTime()
+    limiter = WeightRateLimiter(limit_per_minute=1200, clock=fake, sleep=fake.sleep)
+    limiter.observe_used_weight(1190)
+    assert limiter.tokens == pytest.approx(10)
+    limiter.observe_used_weight(None)
+    assert limiter.tokens == pytest.approx(10)
+    limiter.acquire(30)
+    assert sum(fake.slept) == pytest.approx(1.0)
+
+
+def test_weight_above_capacity_is_rejected():
+    fake = FakeTime()
+    limiter = WeightRateLimiter(limit_per_minute=60, clock=fake, sleep=fake.sleep)
+    with pytest.raises(ValueError):
+        limiter.acquire(61)
+    assert fake.slept == []
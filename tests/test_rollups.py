@@ -0,0 +1,16 @@
+# tests/test_rollups.py
+from datetime import datetime, timezone
+
+from backend.data.rollups import ROLLUP_INTERVALS, bucket_floor
+
+
+def test_buckets_are_epoch_aligned():
+    ts = datetime(2024, 3, 5, 13, 47, 30, tzinfo=timezone.utc)
+    assert bucket_floor(ts, ROLLUP_INTERVALS['5m']) == datetime(2024, 3, 5, 13, 45, tzinfo=timezone.utc)
+    assert bucket_floor(ts, ROLLUP_INTERVALS['4h']) == datetime(2024, 3, 5, 12, tzinfo=timezone.utc)
+    assert bucket_floor(ts, ROLLUP_INTERVALS['1d']) == datetime(2024, 3, 5, tzinfo=timezone.utc)
+
+
+def test_bucket_start_is_its_own_floor():
+    start = datetime(2024, 3, 5, 13, 45, tzinfo=timezone.utc)
+    assert bucket_floor(start, ROLLUP_INTERVALS['15m']) == start
@@ -0,0 +1,46 @@
+# tests/test_strategy_voting.py
+import threading
+
+from backend.execution import strategy_voting
+from backend.execution.strategy_voting import StrategyExecutor, evaluate_all_strategies
+from backend.monitoring.latency import LatencyRecorder
+
+
+def use_strategies(monkeypatch, functions):
+    monkeypatch.setattr(strategy_voting, 'STRATEGY_FUNCTIONS', functions)
+    monkeypatch.setattr(strategy_voting, 'STRATEGY_STAGES',
+                        {name: "strategy." + name.lower() for name, _ in functions})
+
+
+def test_strategy_past_its_deadline_abstains(monkeypatch):
+    release = threading.Event()
+
+    def slow(row, df):
+        release.wait(5)
+        return {"action": "BUY"}
+
+    use_strategies(monkeypatch, [
+        ("Fast", lambda r, df: {"action": "BUY"}),
+        ("Also Fast", lambda r, df: {"action": "SELL"}),
+        ("Slow", slow),
+    ])
+    latency = LatencyRecorder()
+    executor = StrategyExecutor(workers=3, deadlines={"Slow": 0.020}, default_deadline=1.0, latency=latency)
+    try:
+        # With the slow BUY the vote would be BUY; without it, 1 BUY and 1 SELL decide nothing
+        assert evaluate_all_strategies(None, None, verbose=False, symbol="BTCUSDT", executor=executor) is None
+        assert latency.counters == {('btcusdt', 'strategy.slow.timeout'): 1}
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_without_an_executor_every_strategy_votes(monkeypatch):
+    use_strategies(monkeypatch, [
+        ("Fast", lambda r, df: {"action": "BUY"}),
+        ("Also Fast", lambda r, df: {"action": "SELL"}),
+        ("Slow", lambda r, df: {"action": "BUY"}),
+    ])
+    signal = evaluate_all_strategies(None, None, verbose=False, symbol="BTCUSDT")
+    assert signal["action"] == "BUY"
+    assert signal["strategies"] == ["Fast", "Slow"]
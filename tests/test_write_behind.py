@@ -0,0 +1,110 @@
+# tests/test_write_behind.py
+import json
+import threading
+
+from sqlalchemy import create_engine, text
+
+from backend.db.write_behind import WriteBehindWriter
+
+INSERT_SQL = text("INSERT INTO events (id, value) VALUES (:id, :value)")
+
+
+def make_engine(tmp_path, create=True):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    if create:
+        create_table(engine)
+    return engine
+
+
+def create_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE events (id INTEGER PRIMARY KEY, value TEXT NOT NULL)"))
+
+
+def stored_ids(engine):
+    with engine.connect() as conn:
+        return [r[0] for r in conn.execute(text("SELECT id FROM events ORDER BY id"))]
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_queued_records_are_written_in_batches(tmp_path):
+    engine = make_engine(tmp_path)
+    writer = WriteBehindWriter(engine, INSERT_SQL, "events", batch_size=10, flush_interval=0.05,
+                               spill_path=str(tmp_path / "events.jsonl"))
+    for i in range(25):
+        writer.submit({'id': i, 'value': 'x'})
+    writer.start()
+    writer.stop()
+
+    assert stored_ids(engine) == list(range(25))
+    assert writer.stats['written'] == 25
+    assert writer.stats['batches'] == 3
+    assert not (tmp_path / "events.jsonl").exists()
+
+
+def test_rejected_rows_are_dead_lettered_without_blocking_the_batch(tmp_path):
+    engine = make_engine(tmp_path)
+    writer = WriteBehindWriter(engine, INSERT_SQL, "events", batch_size=10,
+                               spill_path=str(tmp_path / "events.jsonl"))
+    for i in range(5):
+        writer.submit({'id': i, 'value': None if i == 2 else 'x'})   # NOT NULL violation
+    writer.start()
+    writer.stop()
+
+    assert stored_ids(engine) == [0, 1, 3, 4]
+    dead = read_jsonl(tmp_path / "events.dead.jsonl")
+    assert [d['record']['id'] for d in dead] == [2]
+    assert writer.stats['dead_lettered'] == 1
+    assert not (tmp_path / "events.jsonl").exists()
+
+
+def test_spilled_rows_are_replayed_once_the_database_is_back(tmp_path):
+    engine = make_engine(tmp_path, create=False)    # no table yet: every write fails
+    spill = tmp_path / "events.jsonl"
+    writer = WriteBehindWriter(engine, INSERT_SQL, "events", batch_size=10, spill_path=str(spill))
+    for i in range(5):
+        writer.submit({'id': i, 'value': 'x'})
+    writer.start()
+    writer.stop()
+    assert [r['id'] for r in read_jsonl(spill)] == list(range(5))
+    assert writer.stats['written'] == 0
+
+    create_table(engine)
+    with open(spill, 'a') as f:
+        f.write(json.dumps({'id': 5, 'value': None}) + '\n')     # a poison row must not loop forever
+    writer.start()      # replays on start
+    writer.submit({'id': 6, 'value': 'x'})
+    writer.stop()
+
+    assert stored_ids(engine) == [0, 1, 2, 3, 4, 6]
+    assert writer.stats['replayed'] == 5
+    assert [d['record']['id'] for d in read_jsonl(tmp_path / "events.dead.jsonl")] == [5]
+    assert not spill.exists()
+
+
+def test_stop_spills_what_it_could_not_flush_in_time(tmp_path):
+    engine = make_engine(tmp_path)
+    release = threading.Event()
+    writer = WriteBehindWriter(engine, INSERT_SQL, "events", batch_size=1, flush_interval=0.01,
+                               spill_path=str(tmp_path / "events.jsonl"))
+    write = writer._write
+
+    def slow_write(batch):
+        release.wait(5)
+        write(batch)
+    writer._write = slow_write
+
+    writer.start()
+    for i in range(5):
+        writer.submit({'id': i, 'value': 'x'})
+    writer.stop(timeout=0.2)
+    spilled = [r['id'] for r in read_jsonl(tmp_path / "events.jsonl")]
+    release.set()
+
+    assert spilled
+    assert writer.queue_depth() == 0
+    assert writer.stats['spilled'] == len(spilled)